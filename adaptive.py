@@ -0,0 +1,127 @@
+from typing import Any, Dict, Hashable, Optional
+import os
+import time
+
+from fetch import rate_limiter
+from metrics import metrics
+
+# Configuration
+# Unchanged polls in a row before an online item's interval is stretched
+ADAPTIVE_QUIET_POLLS = int(os.getenv("ADAPTIVE_QUIET_POLLS", "3"))
+# Factor the interval grows by at each back-off step
+ADAPTIVE_BACKOFF = float(os.getenv("ADAPTIVE_BACKOFF", "2"))
+# Longest interval, as a multiple of the job's own interval
+ADAPTIVE_MAX_FACTOR = float(os.getenv("ADAPTIVE_MAX_FACTOR", "8"))
+# Share of the rate budget adaptive jobs aim to stay under; above it every interval is stretched
+ADAPTIVE_BUDGET_FRACTION = float(os.getenv("ADAPTIVE_BUDGET_FRACTION", "0.5"))
+
+adaptive_stats = {
+    "polls": 0,
+    "skipped": 0,
+    "changes": 0,
+}
+
+metrics.register_collector("adaptive", lambda: {**adaptive_stats, "budget_pressure": budget_pressure()})
+
+
+def budget_pressure() -> float:
+    """
+    How far the request rate is above the adaptive target (1.0 = at or under it)
+
+    Measured against the limit the shared rate limiter actually enforces
+    (after clamping, and tightened by the API's rate-limit headers), not the
+    CALLS setting.
+
+    Returns:
+        Factor every adaptive interval is multiplied by
+    """
+    return max(1.0, rate_limiter.utilisation() / ADAPTIVE_BUDGET_FRACTION)
+
+
+class _ItemState:
+    __slots__ = ("state", "interval", "quiet", "last_polled")
+
+    def __init__(self, interval: float):
+        self.state: Any = None
+        self.interval = interval
+        self.quiet = 0
+        self.last_polled: Optional[float] = None
+
+
+class AdaptivePoller:
+    """
+    Per-item polling intervals for a job that ticks every `base_interval` seconds.
+
+    An item (player, character, world) whose observed state has not changed for
+    ADAPTIVE_QUIET_POLLS polls is polled less and less often, up to
+    ADAPTIVE_MAX_FACTOR times the base interval; inactive (offline) items back
+    off on every poll. Any change brings the item back to the base interval.
+    """
+
+    def __init__(self, base_interval: float):
+        self.base_interval = base_interval
+        self.max_interval = base_interval * ADAPTIVE_MAX_FACTOR
+        self._items: Dict[Hashable, _ItemState] = {}
+
+    def due(self, key: Hashable) -> bool:
+        """True if the item should be polled on this tick (counts a skip otherwise)."""
+        item = self._items.get(key)
+        if item is None or item.last_polled is None:
+            return True
+        # Ticks are jittered, so an item is due at the tick closest to its deadline
+        elapsed = time.monotonic() - item.last_polled
+        if elapsed >= item.interval * budget_pressure() - self.base_interval / 2:
+            return True
+        adaptive_stats["skipped"] += 1
+        return False
+
+    def observe(self, key: Hashable, state: Any, active: bool = True) -> bool:
+        """
+        Record what a poll of the item saw
+
+        Args:
+            key: Item key
+            state: Anything comparable that changes when the item does (levels, world, ...)
+            active: False for items that cannot change right now (offline players)
+
+        Returns:
+            True if the state differs from the previous poll
+        """
+        item = self._items.get(key)
+        if item is None:
+            item = self._items[key] = _ItemState(self.base_interval)
+            changed = False
+        else:
+            changed = state != item.state
+        item.state = state
+        item.last_polled = time.monotonic()
+        adaptive_stats["polls"] += 1
+
+        if changed:
+            adaptive_stats["changes"] += 1
+            item.interval = self.base_interval
+            item.quiet = 0
+        else:
+            item.quiet += 1
+            if not active or item.quiet >= ADAPTIVE_QUIET_POLLS:
+                item.interval = min(self.max_interval, item.interval * ADAPTIVE_BACKOFF)
+        return changed
+
+    def wake(self, key: Hashable) -> None:
+        """Poll the item on the next tick (e.g. the roster shows the player came online)."""
+        item = self._items.get(key)
+        if item is not None:
+            item.interval = self.base_interval
+            item.quiet = 0
+            item.last_polled = None
+
+    def forget(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def summary(self) -> str:
+        """Short description for status messages."""
+        if not self._items:
+            return "no items polled yet"
+        backed_off = sum(1 for item in self._items.values() if item.interval > self.base_interval)
+        longest = max(item.interval for item in self._items.values())
+        return f"{backed_off}/{len(self._items)} backed off, longest interval {longest:.0f}s"
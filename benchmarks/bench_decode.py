@@ -0,0 +1,100 @@
+"""
+Decode benchmark: stdlib json.loads into full dicts (the old response.json()
+path) versus fetch.decode_json + PlayerProfile.from_json projection.
+
+Usage:
+    python benchmarks/bench_decode.py                    # run on benchmarks/payloads/*.json
+    python benchmarks/bench_decode.py --record Salted    # save live ?fullResult profiles first
+
+Without recorded payloads a synthetic profile shaped like a ?fullResult
+response (many characters, quest lists, professions) is used instead.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fetch import API_BASE, decode_json, orjson  # noqa: E402
+from records import PlayerProfile  # noqa: E402
+import synthetic  # noqa: E402
+
+PAYLOAD_DIR = Path(__file__).resolve().parent / "payloads"
+
+
+async def record(players: list[str]) -> None:
+    import aiohttp
+    PAYLOAD_DIR.mkdir(exist_ok=True)
+    async with aiohttp.ClientSession() as session:
+        for player in players:
+            async with session.get(f"{API_BASE}/v3/player/{player}?fullResult") as response:
+                response.raise_for_status()
+                body = await response.read()
+            (PAYLOAD_DIR / f"{player.lower()}.json").write_bytes(body)
+            print(f"Recorded {player} ({len(body) / 1024:.0f} KiB)")
+
+
+def synthetic_payload() -> bytes:
+    rng = random.Random(0)
+    return json.dumps(synthetic.profile(rng, "BenchPlayer", synthetic.make_uuid(rng), characters=12)).encode()
+
+
+def load_payloads() -> list[tuple[str, bytes]]:
+    payloads = [(path.name, path.read_bytes()) for path in sorted(PAYLOAD_DIR.glob("*.json"))]
+    return payloads or [("synthetic", synthetic_payload())]
+
+
+def old_path(body: bytes):
+    return json.loads(body)
+
+
+def new_path(body: bytes):
+    return PlayerProfile.from_json(decode_json(body))
+
+
+def time_it(fn, body: bytes, repeat: int) -> float:
+    fn(body)  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(body)
+    return (time.perf_counter() - start) / repeat
+
+
+def retained_bytes(fn, body: bytes, copies: int = 50) -> float:
+    """Memory kept alive per decoded profile (what a profile cache would hold)."""
+    gc.collect()
+    tracemalloc.start()
+    kept = [fn(body) for _ in range(copies)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current / copies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", nargs="+", metavar="PLAYER", help="Record live profiles before benchmarking")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.record))
+
+    print(f"Fast decoder: {'orjson' if orjson is not None else 'not installed (stdlib json)'}")
+    for name, body in load_payloads():
+        old_time, new_time = time_it(old_path, body, args.repeat), time_it(new_path, body, args.repeat)
+        old_mem, new_mem = retained_bytes(old_path, body), retained_bytes(new_path, body)
+        print(f"\n{name} ({len(body) / 1024:.0f} KiB)")
+        print(f"  json.loads (full dicts):      {old_time * 1000:7.3f} ms  {old_mem / 1024:8.1f} KiB retained")
+        print(f"  decode_json + PlayerProfile:  {new_time * 1000:7.3f} ms  {new_mem / 1024:8.1f} KiB retained")
+        print(f"  speed-up x{old_time / new_time:.2f}, memory x{old_mem / new_mem:.1f} smaller")
+
+
+if __name__ == "__main__":
+    main()
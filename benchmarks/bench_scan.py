@@ -0,0 +1,222 @@
+"""
+End-to-end benchmark of the sweep commands against the local mock API.
+
+Starts benchmarks/mock_api.py in a separate process, points the bot at it
+and drives the real command handlers with a fake Interaction:
+
+    scan     /scan-hunted over every world
+    world    /detect-world loops on --worlds worlds for --world-ticks ticks
+    compare  /advance-tracking compare loop over --compare-characters characters
+
+For each scenario it reports wall time, API calls (counted by the mock),
+API calls per match, peak Python memory and Discord messages sent.
+
+Usage:
+    python benchmarks/bench_scan.py --players 3000 --latency 80 --jitter 40
+    python benchmarks/bench_scan.py --scenarios scan --rate-limit 180 --json before.json
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import aiohttp
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from mock_api import add_population_arguments, build_api, population_argv  # noqa: E402
+
+
+async def wait_for_mock(base: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{base}/_stats") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Mock API at {base} did not start")
+            await asyncio.sleep(0.2)
+
+
+async def mock_request(base: str, method: str, path: str) -> dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.request(method, f"{base}{path}") as response:
+            return await response.json()
+
+
+async def wait_for_runs(job, runs: int) -> None:
+    while job.runs < runs:
+        await asyncio.sleep(0.01)
+
+
+async def run_scenarios(args: argparse.Namespace, base: str) -> list:
+    # Bot modules read their configuration at import time
+    import fetch
+    import player_data
+    from cache import NegativeCache
+    from commands.scan_hunted import run_scan_hunted
+    from commands.detect_world import run_detect_world
+    from commands.advanced_tracker import run_advanced_tracker
+    from decode_pool import decode_pool
+    from fake_discord import FakeInteraction
+    from notifier import notifier
+    from shared_state import scheduler
+    from tracker_registry import TrackedCharacter, tracker_registry
+
+    fetch.rate_limiter.configure(args.calls, args.period)
+    servers = [f"{region}{number}" for region in args.regions.split(",")
+               for number in range(1, args.servers_per_region + 1)]
+
+    async def scan(interaction):
+        await run_scan_hunted(interaction, args.target_level, args.level_range, args.concurrency)
+        text = "\n".join(interaction.log.contents())
+        return text.count("[MATCH]")
+
+    async def world(interaction):
+        worlds = servers[:args.worlds]
+        interactions = [FakeInteraction() for _ in worlds]
+        for world_id, world_interaction in zip(worlds, interactions):
+            await run_detect_world(world_interaction, world_id, args.target_level, args.level_range, interval=10)
+        jobs = [scheduler.get(f"detect-world:{world_id}") for world_id in worlds]
+        for tick in range(1, args.world_ticks + 1):
+            if tick > 1:
+                for job in jobs:
+                    scheduler.run_now(job.key)
+            await asyncio.gather(*(wait_for_runs(job, tick) for job in jobs))
+        await scheduler.stop_all("detect-world")
+        await notifier.flush_all()
+        text = "\n".join(content for world_interaction in interactions for content in world_interaction.log.contents())
+        interaction.log.entries += [entry for world_interaction in interactions for entry in world_interaction.log.entries]
+        return sum(int(found) for found in re.findall(r"Found (\d+) hunted players", text))
+
+    async def compare(interaction):
+        await run_advanced_tracker(interaction, compare=True, interval=10)
+        job = scheduler.get(f"compare:{interaction.guild_id}_{interaction.channel_id}")
+        for tick in range(1, args.compare_ticks + 1):
+            if tick > 1:
+                # Each real tick is a full period apart, so nothing is reused from the previous one
+                player_data.profile_cache.clear()
+                scheduler.run_now(job.key)
+            await wait_for_runs(job, tick)
+        await scheduler.stop_all("compare")
+        await notifier.flush_all()
+        # "Matches" for the compare loop are tracked-character checks
+        return len(tracker_registry.characters) * args.compare_ticks
+
+    # Seed the advanced tracker with characters from the same population the mock serves
+    registry = await tracker_registry.load()
+    population = list(build_api(args).profiles.values())
+    await registry.upsert_characters(
+        TrackedCharacter(profile["username"], character["type"], profile["uuid"], char_uuid, 1.0, {})
+        for profile in population[:args.compare_characters]
+        for char_uuid, character in list(profile["characters"].items())[:1])
+    del population
+
+    results = []
+    for name in args.scenarios.split(","):
+        scenario = {"scan": scan, "world": world, "compare": compare}[name]
+        player_data.profile_cache.clear()
+        player_data.negative_cache = NegativeCache()
+        await mock_request(base, "POST", "/_reset")
+
+        interaction = FakeInteraction()
+        tracemalloc.start()
+        started = time.perf_counter()
+        # Own task per scenario, so request priorities set by one command do not leak into the next
+        matches = await asyncio.create_task(scenario(interaction))
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = await mock_request(base, "GET", "/_stats")
+        results.append({
+            "scenario": name,
+            "wall_s": round(wall, 3),
+            "api_calls": stats["requests"],
+            "by_endpoint": stats["by_endpoint"],
+            "throttled": stats["throttled"],
+            "not_modified": stats["not_modified"],
+            "matches": matches,
+            "calls_per_match": round(stats["requests"] / matches, 2) if matches else None,
+            "peak_mib": round(peak / 2 ** 20, 2),
+            "discord_messages": interaction.log.count("send", "channel", "respond"),
+            "discord_edits": interaction.log.count("edit"),
+        })
+
+    await fetch.close_session()
+    decode_pool.shutdown()
+    return results
+
+
+def print_results(results: list) -> None:
+    print(f"\n{'scenario':<9} {'wall s':>8} {'calls':>7} {'429s':>5} {'304s':>5} {'matches':>8} {'calls/match':>12} "
+          f"{'peak MiB':>9} {'msgs':>5} {'edits':>6}")
+    for r in results:
+        per_match = f"{r['calls_per_match']:.2f}" if r["calls_per_match"] is not None else "-"
+        print(f"{r['scenario']:<9} {r['wall_s']:>8.2f} {r['api_calls']:>7} {r['throttled']:>5} {r['not_modified']:>5} "
+              f"{r['matches']:>8} "
+              f"{per_match:>12} {r['peak_mib']:>9.2f} {r['discord_messages']:>5} {r['discord_edits']:>6}")
+    for r in results:
+        print(f"  {r['scenario']}: {r['by_endpoint']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_population_arguments(parser)
+    parser.add_argument("--scenarios", default="scan,world,compare")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--target-level", type=int, default=26)
+    parser.add_argument("--level-range", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=20, help="/scan-hunted concurrency")
+    parser.add_argument("--worlds", type=int, default=5, help="Worlds tracked by the world scenario")
+    parser.add_argument("--world-ticks", type=int, default=3)
+    parser.add_argument("--compare-characters", type=int, default=50)
+    parser.add_argument("--compare-ticks", type=int, default=2)
+    parser.add_argument("--calls", type=int, default=100000, help="Client rate limit (calls per --period)")
+    parser.add_argument("--period", type=float, default=60)
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    # Paths must survive the chdir into the scratch directory below
+    args.fixtures = args.fixtures.resolve() if args.fixtures else None
+    args.json = args.json.resolve() if args.json else None
+
+    base = f"http://127.0.0.1:{args.port}"
+    mock = subprocess.Popen([sys.executable, str(BENCH_DIR / "mock_api.py"), "--port", str(args.port),
+                             *population_argv(args)], stdout=subprocess.DEVNULL)
+    workdir = tempfile.TemporaryDirectory()
+    try:
+        asyncio.run(wait_for_mock(base))
+        os.environ.update({
+            "WYNNCRAFT_API_BASE": base,
+            "TRACKER_DB_PATH": str(Path(workdir.name) / "tracker.db"),
+            "SERVER_REGIONS": args.regions,
+            "SERVERS_PER_REGION": str(args.servers_per_region),
+        })
+        os.chdir(workdir.name)  # Keep the legacy tracker files of the checkout out of the benchmark
+        results = asyncio.run(run_scenarios(args, base))
+    finally:
+        mock.terminate()
+        mock.wait()
+        workdir.cleanup()
+
+    print_results(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
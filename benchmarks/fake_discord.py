@@ -0,0 +1,87 @@
+"""Minimal stand-ins for the discord.py objects the commands touch, recording what they send."""
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+import itertools
+
+_ids = itertools.count(1)
+
+
+class FakeMessage:
+    def __init__(self, log: "MessageLog", content: Optional[str]):
+        self.log = log
+        self.id = next(_ids)
+        self.content = content
+
+    async def edit(self, content: Optional[str] = None, **kwargs: Any) -> "FakeMessage":
+        self.log.record("edit", content)
+        self.content = content
+        return self
+
+    async def add_reaction(self, emoji: str) -> None:
+        pass
+
+    async def clear_reactions(self) -> None:
+        pass
+
+
+class MessageLog:
+    def __init__(self):
+        self.entries: List[Tuple[str, Optional[str]]] = []
+
+    def record(self, kind: str, content: Optional[str]) -> None:
+        self.entries.append((kind, content))
+
+    def count(self, *kinds: str) -> int:
+        return sum(1 for kind, _ in self.entries if kind in kinds)
+
+    def contents(self) -> List[str]:
+        return [content for kind, content in self.entries if content and kind != "edit"]
+
+
+class FakeFollowup:
+    def __init__(self, log: MessageLog):
+        self.log = log
+
+    async def send(self, content: Optional[str] = None, wait: bool = False, **kwargs: Any) -> FakeMessage:
+        self.log.record("send", content)
+        return FakeMessage(self.log, content)
+
+
+class FakeResponse:
+    def __init__(self, log: MessageLog):
+        self.log = log
+
+    async def defer(self, **kwargs: Any) -> None:
+        self.log.record("defer", None)
+
+    async def send_message(self, content: Optional[str] = None, **kwargs: Any) -> None:
+        self.log.record("respond", content)
+
+
+class FakeChannel:
+    def __init__(self, log: MessageLog, channel_id: int):
+        self.log = log
+        self.id = channel_id
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> FakeMessage:
+        self.log.record("channel", content)
+        return FakeMessage(self.log, content)
+
+
+class FakeUser:
+    id = 1
+    mention = "<@1>"
+
+
+class FakeInteraction:
+    """Enough of discord.Interaction for the command handlers."""
+
+    def __init__(self, channel_id: Optional[int] = None):
+        self.log = MessageLog()
+        self.channel_id = channel_id or next(_ids)
+        self.guild_id = 1
+        self.user = FakeUser()
+        self.created_at = datetime.now(timezone.utc)
+        self.response = FakeResponse(self.log)
+        self.followup = FakeFollowup(self.log)
+        self.channel = FakeChannel(self.log, self.channel_id)
@@ -0,0 +1,310 @@
+"""
+Local stand-in for the parts of the Wynncraft API the bot uses.
+
+Serves a synthetic population (or recorded profiles) with configurable
+latency and rate limiting so sweeps can be benchmarked without touching
+the real API:
+
+    GET /v3/player?identifier=uuid[&server=EU1]       online roster
+    GET /v3/player/{uuid or name}[?fullResult]        player profile
+    GET /v3/player/{name}/characters/{char_uuid}      single character
+    GET /v3/leaderboards/{hichContent,huntedContent}  gamemode leaderboards
+    GET /v3/leaderboards/types                        (connection warm-up)
+    GET /_stats, POST /_reset                         request counters
+
+Profile, character and leaderboard responses carry an ETag (or Last-Modified)
+and are gzip-compressed for clients that accept it, like the real API behind
+its CDN; see --validators and --compression.
+
+Usage:
+    python benchmarks/mock_api.py --players 3000 --latency 80 --jitter 40
+    WYNNCRAFT_API_BASE=http://127.0.0.1:8089 python main.py
+"""
+from collections import Counter, deque
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+
+from aiohttp import web
+
+import synthetic
+
+LEADERBOARD_SIZE = 100
+POPULATION_OPTIONS = ["--players", "--regions", "--servers-per-region", "--hunted-fraction", "--hich-fraction",
+                      "--characters", "--fixtures", "--seed", "--latency", "--jitter", "--latency-dist",
+                      "--rate-limit", "--rate-window", "--error-rate", "--validators", "--compression"]
+# Endpoints whose responses can be revalidated
+CACHEABLE_ENDPOINTS = ("profile", "character", "leaderboard")
+# Gamemodes a character needs to appear on each leaderboard
+LEADERBOARDS = {"hichContent": synthetic.HICH_GAMEMODES, "huntedContent": ("hunted",)}
+
+
+def dumps(data: Any) -> bytes:
+    return json.dumps(data).encode()
+
+
+class MockWynncraft:
+    """In-memory population plus the latency / rate-limit model."""
+
+    def __init__(self, profiles: List[Dict[str, Any]], latency: float = 0.0, jitter: float = 0.0,
+                 distribution: str = "normal", rate_limit: int = 0, rate_window: float = 60.0,
+                 error_rate: float = 0.0, seed: int = 0, validators: str = "etag", compression: str = "gzip"):
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.distribution = distribution
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self.validators = validators
+        self.compression = compression
+        # The population never changes, so everything was last modified at startup
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.rng = random.Random(seed)
+
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, str] = {}
+        self.rosters: Dict[str, Dict[str, str]] = {}
+        for profile in profiles:
+            player_uuid = profile["uuid"]
+            self.profiles[player_uuid] = profile
+            self.by_name[profile["username"].lower()] = player_uuid
+            if profile.get("online") and profile.get("server"):
+                self.rosters.setdefault(profile["server"], {})[player_uuid] = profile["server"]
+        self._bodies: Dict[str, bytes] = {}
+
+        self.counts: Counter = Counter()
+        self.throttled = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._window: deque = deque()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": sum(self.counts.values()), "by_endpoint": dict(self.counts),
+                "throttled": self.throttled, "not_modified": self.not_modified,
+                "bytes_sent": self.bytes_sent, "players": len(self.profiles)}
+
+    def reset(self) -> None:
+        self.counts.clear()
+        self.throttled = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._window.clear()
+
+    def validator_headers(self, body: bytes) -> Dict[str, str]:
+        if self.validators == "etag":
+            return {"ETag": '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'}
+        if self.validators == "last-modified":
+            return {"Last-Modified": self.last_modified}
+        return {}
+
+    def is_not_modified(self, request: web.Request, validators: Dict[str, str]) -> bool:
+        if "ETag" in validators:
+            return request.headers.get("If-None-Match") == validators["ETag"]
+        if "Last-Modified" in validators:
+            return request.headers.get("If-Modified-Since") == validators["Last-Modified"]
+        return False
+
+    def delay(self) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.distribution == "fixed":
+            return self.latency
+        if self.distribution == "uniform":
+            return max(0.0, self.rng.uniform(self.latency - self.jitter, self.latency + self.jitter))
+        if self.distribution == "lognormal":
+            # Mean `latency`, spread `jitter`: long tail like a loaded real API
+            sigma = math.sqrt(math.log(1 + (self.jitter / self.latency) ** 2))
+            return self.rng.lognormvariate(math.log(self.latency) - sigma ** 2 / 2, sigma)
+        return max(0.0, self.rng.gauss(self.latency, self.jitter))
+
+    def rate_headers(self) -> Dict[str, str]:
+        if not self.rate_limit:
+            return {}
+        reset = self.rate_window - (time.monotonic() - self._window[0]) if self._window else self.rate_window
+        return {"RateLimit-Limit": str(self.rate_limit),
+                "RateLimit-Remaining": str(max(0, self.rate_limit - len(self._window))),
+                "RateLimit-Reset": str(max(1, math.ceil(reset)))}
+
+    def throttle(self) -> bool:
+        """Record a request; True if it must be answered with 429."""
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return True
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= self.rate_window:
+            self._window.popleft()
+        if len(self._window) >= self.rate_limit:
+            return True
+        self._window.append(now)
+        return False
+
+    def resolve(self, identifier: str) -> str:
+        player_uuid = identifier if identifier in self.profiles else self.by_name.get(identifier.lower())
+        if player_uuid is None:
+            raise web.HTTPNotFound()
+        return player_uuid
+
+    def profile_body(self, identifier: str) -> bytes:
+        player_uuid = self.resolve(identifier)
+        body = self._bodies.get(player_uuid)
+        if body is None:
+            body = self._bodies[player_uuid] = dumps(self.profiles[player_uuid])
+        return body
+
+    def leaderboard(self, gamemodes=synthetic.HICH_GAMEMODES) -> Dict[str, Any]:
+        entries = []
+        for profile in self.profiles.values():
+            for char_uuid, character in profile["characters"].items():
+                if set(gamemodes) <= set(character["gamemode"]):
+                    entries.append((character["level"], profile, char_uuid, character))
+        entries.sort(key=lambda entry: -entry[0])
+        return {str(rank): {"name": profile["username"], "uuid": profile["uuid"],
+                            "characterType": character["type"].lower(), "characterUuid": char_uuid,
+                            "characterData": {"level": character["level"], "deaths": character["deaths"],
+                                              "gamemode": character["gamemode"]}}
+                for rank, (_, profile, char_uuid, character) in enumerate(entries[:LEADERBOARD_SIZE], 1)}
+
+
+def create_app(api: MockWynncraft) -> web.Application:
+    @web.middleware
+    async def model(request: web.Request, handler):
+        if request.path.startswith("/_"):
+            return await handler(request)
+        endpoint = request.match_info.route.name or request.path
+        api.counts[endpoint] += 1
+        await asyncio.sleep(api.delay())
+        if api.throttle():
+            api.throttled += 1
+            return web.json_response({"error": "Too many requests"}, status=429,
+                                     headers={"Retry-After": "1", **api.rate_headers()})
+        response = await handler(request)
+        response.headers.update(api.rate_headers())
+        if endpoint in CACHEABLE_ENDPOINTS and isinstance(response, web.Response) and response.body is not None:
+            validators = api.validator_headers(response.body)
+            if api.is_not_modified(request, validators):
+                api.not_modified += 1
+                return web.Response(status=304, headers={**validators, **api.rate_headers()})
+            response.headers.update(validators)
+        if api.compression == "gzip" and isinstance(response, web.Response):
+            response.enable_compression()
+        if isinstance(response, web.Response) and response.body is not None:
+            api.bytes_sent += len(response.body)  # Before compression
+        return response
+
+    async def roster(request: web.Request) -> web.Response:
+        server = request.query.get("server")
+        if server:
+            players = api.rosters.get(server, {})
+        else:
+            players = {player_uuid: world for roster in api.rosters.values() for player_uuid, world in roster.items()}
+        return web.json_response({"total": len(players), "players": players})
+
+    async def player(request: web.Request) -> web.Response:
+        return web.Response(body=api.profile_body(request.match_info["identifier"]), content_type="application/json")
+
+    async def character(request: web.Request) -> web.Response:
+        profile = api.profiles[api.resolve(request.match_info["identifier"])]
+        data = profile["characters"].get(request.match_info["char_uuid"])
+        if data is None:
+            raise web.HTTPNotFound()
+        return web.json_response(data)
+
+    async def leaderboard(request: web.Request) -> web.Response:
+        gamemodes = LEADERBOARDS.get(request.match_info["board"])
+        if gamemodes is None:
+            raise web.HTTPNotFound()
+        return web.json_response(api.leaderboard(gamemodes))
+
+    async def leaderboard_types(request: web.Request) -> web.Response:
+        return web.json_response(list(LEADERBOARDS))
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(api.stats())
+
+    async def reset(request: web.Request) -> web.Response:
+        api.reset()
+        return web.json_response(api.stats())
+
+    app = web.Application(middlewares=[model])
+    app.router.add_get("/v3/player", roster, name="roster")
+    app.router.add_get("/v3/player/{identifier}", player, name="profile")
+    app.router.add_get("/v3/player/{identifier}/characters/{char_uuid}", character, name="character")
+    app.router.add_get("/v3/leaderboards/types", leaderboard_types, name="leaderboard_types")
+    app.router.add_get("/v3/leaderboards/{board}", leaderboard, name="leaderboard")
+    app.router.add_get("/_stats", stats)
+    app.router.add_post("/_reset", reset)
+    return app
+
+
+def add_population_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--players", type=int, default=1500, help="Online players to generate")
+    parser.add_argument("--regions", default="EU,NA,AS")
+    parser.add_argument("--servers-per-region", type=int, default=20)
+    parser.add_argument("--hunted-fraction", type=float, default=0.1)
+    parser.add_argument("--hich-fraction", type=float, default=0.2, help="Share of hunted characters that are HICH")
+    parser.add_argument("--characters", type=int, default=6, help="Characters per player")
+    parser.add_argument("--fixtures", type=Path, help="Directory of recorded ?fullResult profiles to serve first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=50, help="Mean response latency (ms)")
+    parser.add_argument("--jitter", type=float, default=20, help="Latency spread (ms)")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "normal", "lognormal"], default="lognormal")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per window before 429s (0 = unlimited)")
+    parser.add_argument("--rate-window", type=float, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--validators", choices=["etag", "last-modified", "none"], default="etag",
+                        help="Cache validators on profile, character and leaderboard responses")
+    parser.add_argument("--compression", choices=["gzip", "none"], default="gzip",
+                        help="Compress responses for clients sending Accept-Encoding")
+
+
+def population_argv(args: argparse.Namespace) -> List[str]:
+    """Command line reproducing the population options of `args` (to start the server from a runner)."""
+    argv = []
+    for option in POPULATION_OPTIONS:
+        value = getattr(args, option.lstrip("-").replace("-", "_"))
+        if value is not None:
+            argv += [option, str(value)]
+    return argv
+
+
+def build_api(args: argparse.Namespace) -> MockWynncraft:
+    servers = [f"{region}{number}" for region in args.regions.split(",")
+               for number in range(1, args.servers_per_region + 1)]
+
+    profiles = []
+    if args.fixtures:
+        for path in sorted(args.fixtures.glob("*.json")):
+            profile = json.loads(path.read_bytes())
+            # Recorded players may have been offline; put them on a world so scans see them
+            profile["online"], profile["server"] = True, profile.get("server") or servers[len(profiles) % len(servers)]
+            profiles.append(profile)
+
+    profiles += synthetic.population(max(0, args.players - len(profiles)), servers, args.seed,
+                                     args.hunted_fraction, args.hich_fraction, args.characters)
+    return MockWynncraft(profiles, args.latency, args.jitter, args.latency_dist, args.rate_limit,
+                         args.rate_window, args.error_rate, args.seed, args.validators, args.compression)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_population_arguments(parser)
+    args = parser.parse_args()
+
+    api = build_api(args)
+    print(f"Mock Wynncraft API: {len(api.profiles)} players on {len(api.rosters)} worlds "
+          f"at http://{args.host}:{args.port}", flush=True)
+    web.run_app(create_app(api), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Deterministic synthetic Wynncraft data shaped like the real API responses,
+shared by the decode benchmark and the mock API server.
+"""
+from typing import Any, Dict, List, Optional
+import random
+import uuid
+
+CLASSES = ["MAGE", "ARCHER", "WARRIOR", "ASSASSIN", "SHAMAN"]
+GAMEMODES = ["craftsman", "hardcore", "ironman", "ultimate_ironman"]
+HICH_GAMEMODES = ["hunted", "ironman", "craftsman", "hardcore"]
+PROFESSIONS = ["alchemism", "armouring", "cooking", "farming", "fishing", "jeweling",
+               "mining", "scribing", "tailoring", "weaponsmithing", "woodcutting", "woodworking"]
+
+
+def make_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def character(rng: random.Random, hunted: bool = False, hich: bool = False, quests: int = 150) -> Dict[str, Any]:
+    if hich:
+        gamemode = list(HICH_GAMEMODES)
+    else:
+        gamemode = rng.sample(GAMEMODES, rng.randint(0, 2)) + (["hunted"] if hunted else [])
+    return {
+        "type": rng.choice(CLASSES), "nickname": None, "level": rng.randint(1, 106),
+        "xp": rng.randint(0, 10 ** 7), "xpPercent": rng.randint(0, 99), "totalLevel": rng.randint(1, 1690),
+        "wars": 0, "playtime": round(rng.random() * 500, 2), "mobsKilled": rng.randint(0, 10 ** 5),
+        "chestsFound": rng.randint(0, 2000), "blocksWalked": rng.randint(0, 10 ** 7),
+        "itemsIdentified": rng.randint(0, 500), "logins": rng.randint(0, 3000),
+        "deaths": 0 if hich else rng.randint(0, 20), "discoveries": rng.randint(0, 600),
+        "preEconomy": False, "pvp": {"kills": 0, "deaths": 0}, "gamemode": gamemode,
+        "skillPoints": {s: rng.randint(0, 150) for s in ["strength", "dexterity", "intelligence", "defence", "agility"]},
+        "professions": {p: {"level": rng.randint(1, 132), "xpPercent": rng.randint(0, 99)} for p in PROFESSIONS},
+        "dungeons": {"total": 12, "list": {f"Dungeon {i}": rng.randint(0, 9) for i in range(18)}},
+        "raids": {"total": 3, "list": {f"Raid {i}": rng.randint(0, 9) for i in range(4)}},
+        "quests": [f"Quest number {i}" for i in rng.sample(range(400), quests)],
+    }
+
+
+def profile(rng: random.Random, username: str, player_uuid: str, server: Optional[str] = "EU1",
+            characters: int = 6, hunted_fraction: float = 0.1, hich_fraction: float = 0.2) -> Dict[str, Any]:
+    """A ?fullResult profile; the active character is hunted with probability `hunted_fraction`."""
+    chars = {}
+    for i in range(characters):
+        hunted = i == 0 and rng.random() < hunted_fraction
+        chars[make_uuid(rng)] = character(rng, hunted=hunted, hich=hunted and rng.random() < hich_fraction)
+    active = next(iter(chars))
+    return {
+        "username": username, "online": server is not None, "server": server, "activeCharacter": active,
+        "uuid": player_uuid, "rank": "Player", "supportRank": None,
+        "firstJoin": "2020-01-01T00:00:00.000Z", "lastJoin": "2025-01-01T00:00:00.000Z", "playtime": 1000.5,
+        "guild": None, "globalData": {"wars": 0, "totalLevel": 5000, "killedMobs": 10 ** 6, "chestsFound": 10 ** 4,
+                                      "dungeons": {"total": 50, "list": {}}, "raids": {"total": 5, "list": {}},
+                                      "completedQuests": 900, "pvp": {"kills": 0, "deaths": 0}},
+        "ranking": {f"ranking{i}": rng.randint(1, 10 ** 5) for i in range(60)},
+        "characters": chars,
+    }
+
+
+def population(players: int, servers: List[str], seed: int = 0, hunted_fraction: float = 0.1,
+               hich_fraction: float = 0.2, characters: int = 6) -> List[Dict[str, Any]]:
+    """`players` online profiles spread across `servers`."""
+    rng = random.Random(seed)
+    return [profile(rng, f"Player{i}", make_uuid(rng), rng.choice(servers), characters,
+                    hunted_fraction, hich_fraction)
+            for i in range(players)]
@@ -0,0 +1,129 @@
+from typing import Dict, List, Optional, Tuple
+import os
+
+from fetch import rate_limiter
+from shared_state import scheduler
+
+# Configuration
+# Projected use above this share of the API budget gets a warning
+BUDGET_WARN_FRACTION = float(os.getenv("BUDGET_WARN_FRACTION", "0.8"))
+# New fixed-interval polling jobs that would push projected use above this share are refused (0 = never refuse)
+BUDGET_REFUSE_FRACTION = float(os.getenv("BUDGET_REFUSE_FRACTION", "1.0"))
+
+# What one item of each workload is
+ITEM_LABELS = {"tracker": "players", "detect-world": "worlds", "compare": "characters", "scan": "servers"}
+
+# Requests and seconds per item per run, until the workload has been measured on this bot
+DEFAULT_REQUESTS_PER_ITEM = {"tracker": 0.5, "detect-world": 6.0, "compare": 1.0, "scan": 25.0}
+DEFAULT_SECONDS_PER_ITEM = {"tracker": 0.2, "detect-world": 1.0, "compare": 0.2, "scan": 1.5}
+
+
+class Workload:
+    """A running or proposed job, reduced to what it costs."""
+    __slots__ = ("label", "kind", "items", "interval", "requests_per_run", "seconds_per_run", "running", "measured")
+
+    def __init__(self, label: str, kind: str, items: Optional[int], interval: float, requests_per_run: float,
+                 seconds_per_run: float, running: bool, measured: bool):
+        self.label = label
+        self.kind = kind
+        self.items = items
+        self.interval = interval
+        self.requests_per_run = requests_per_run
+        self.seconds_per_run = seconds_per_run
+        self.running = running
+        self.measured = measured
+
+    @property
+    def calls_per_minute(self) -> float:
+        return self.requests_per_run * 60 / self.interval
+
+
+def item_cost(kind: str) -> Tuple[float, float, bool]:
+    """
+    Cost of one item of a workload kind, from measured runs when there are any
+
+    Returns:
+        (requests per item, seconds per item, measured)
+    """
+    stats = scheduler.kind_stats.get(kind)
+    if stats and stats["items"]:
+        return stats["requests"] / stats["items"], stats["seconds"] / stats["items"], True
+    return DEFAULT_REQUESTS_PER_ITEM.get(kind, 1.0), DEFAULT_SECONDS_PER_ITEM.get(kind, 1.0), False
+
+
+def running_workloads() -> List[Workload]:
+    """Every registered polling job, costed by its own measured ticks where possible."""
+    workloads = []
+    for job in scheduler.jobs():
+        per_item, seconds_per_item, measured = item_cost(job.kind)
+        if job.runs:
+            # Real average, so adaptive jobs are credited for the polls they skip
+            requests = job.requests / job.runs
+            seconds = job.last_duration or 0.0
+            measured = True
+        else:
+            requests = per_item * (job.items or 1)
+            seconds = seconds_per_item * (job.items or 1)
+        workloads.append(Workload(job.description, job.kind, job.items, job.interval, requests, seconds,
+                                  running=True, measured=measured))
+    return workloads
+
+
+def proposed_workload(kind: str, items: int, interval: float) -> Workload:
+    per_item, seconds_per_item, measured = item_cost(kind)
+    label = f"{kind} over {items} {ITEM_LABELS.get(kind, 'items')} every {interval:.0f}s"
+    return Workload(label, kind, items, interval, per_item * items, seconds_per_item * items,
+                    running=False, measured=measured)
+
+
+def budget_per_minute() -> float:
+    return rate_limiter.calls * 60 / rate_limiter.period
+
+
+def plan(extra: Optional[List[Workload]] = None) -> Dict[str, object]:
+    """
+    Project API use of the running jobs plus `extra` proposed ones
+
+    Returns:
+        {"workloads", "demand", "budget", "utilisation", "headroom", "tick_seconds": {label: seconds}}
+    """
+    workloads = running_workloads() + list(extra or [])
+    demand = sum(workload.calls_per_minute for workload in workloads)
+    budget = budget_per_minute()
+    utilisation = demand / budget if budget else float("inf")
+    # Over budget, every tick also waits in the rate limiter's queue for its share of the window
+    slowdown = max(1.0, utilisation)
+    return {
+        "workloads": workloads,
+        "demand": demand,
+        "budget": budget,
+        "utilisation": utilisation,
+        "headroom": budget - demand,
+        "tick_seconds": {workload.label: workload.seconds_per_run * slowdown for workload in workloads},
+    }
+
+
+def check_admission(kind: str, items: int, interval: float, adaptive: bool = False) -> Tuple[bool, Optional[str]]:
+    """
+    Decide whether a new polling job fits in the API budget
+
+    Args:
+        kind: Job kind ("tracker", "detect-world", "compare")
+        items: Players, worlds or characters it will poll
+        interval: Seconds between ticks
+        adaptive: Adaptive jobs stretch their own intervals under pressure, so they are only warned about
+
+    Returns:
+        (allowed, message to show the user or None)
+    """
+    projection = plan([proposed_workload(kind, items, interval)])
+    utilisation = projection["utilisation"]
+    summary = (f"`{projection['demand']:.0f}` calls/min projected against a budget of "
+               f"`{projection['budget']:.0f}` (`{utilisation:.0%}`)")
+    if BUDGET_REFUSE_FRACTION and utilisation > BUDGET_REFUSE_FRACTION and not adaptive:
+        return False, (f"⛔ Not started: with this loop, {summary}, which means sustained 429s. "
+                       f"Use a longer `interval`, `adaptive:True`, or stop other loops (see `/budget`).")
+    if utilisation > BUDGET_WARN_FRACTION:
+        note = " Adaptive intervals will be stretched to fit." if adaptive else ""
+        return True, f"⚠️ API budget is tight: {summary}.{note}"
+    return True, None
@@ -0,0 +1,221 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+import time
+
+
+class TTLCache:
+    """
+    In-memory cache with a per-entry time-to-live and LRU eviction.
+
+    Entries older than `ttl` seconds are treated as missing unless a caller
+    asks for a looser `max_age`; entries are kept for up to `max_retention`
+    seconds for such callers. Once `max_size` entries are stored the least
+    recently used one is dropped.
+
+    An entry can also be reached through aliases (e.g. a profile keyed by
+    UUID and looked up by username); aliases do not count towards `max_size`
+    and are dropped with their entry.
+    """
+
+    def __init__(self, ttl: float, max_size: int, max_retention: Optional[float] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_retention = max(ttl, max_retention or ttl)
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._aliases: Dict[Hashable, Hashable] = {}
+        self._aliases_of: Dict[Hashable, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key
+            max_age: Freshness bound for this lookup instead of the cache TTL
+                (capped by max_retention)
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        key = self._aliases.get(key, key)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+        if age > self.max_retention:
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if age > (self.ttl if max_age is None else max_age):
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, aliases: Iterable[Hashable] = ()) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Canonical cache key
+            value: Value to cache
+            aliases: Other keys that look up the same entry
+        """
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        for alias in aliases:
+            if alias == key or self._aliases.get(alias) == key:
+                continue
+            previous = self._aliases.get(alias)
+            if previous is not None:
+                self._aliases_of[previous].discard(alias)
+            self._aliases[alias] = key
+            self._aliases_of.setdefault(key, set()).add(alias)
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        for alias in self._aliases_of.pop(key, ()):
+            del self._aliases[alias]
+
+    def invalidate(self, key: Hashable) -> None:
+        self._drop(self._aliases.get(key, key))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._aliases.clear()
+        self._aliases_of.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "aliases": len(self._aliases),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "max_retention": self.max_retention,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class NegativeCache:
+    """
+    Remembers why a player was rejected by a hunted query and for how long that
+    reason can be trusted, so repeated sweeps can skip them without a request.
+
+    Reasons:
+        not_hunted:  active character has neither the hunted gamemode nor "A Hunter's Calling"
+        over_level:  active character is above the query's level window (levels only go up)
+        under_level: active character is below the query's level window (may level up soon)
+    """
+
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._entries: dict[str, dict[str, Any]] = {}
+        self.skips = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def record(self, key: str, reason: str, ttl: float, name: Optional[str], level: int,
+               character_id: Optional[str], server: Optional[str] = None) -> None:
+        self._entries[key] = {
+            "reason": reason,
+            "name": name,
+            "level": level,
+            "character_id": character_id,
+            "server": server,
+            "expires_at": time.monotonic() + ttl,
+        }
+        if len(self._entries) > self.max_size:
+            self._prune()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for expired in [key for key, entry in self._entries.items() if entry["expires_at"] <= now]:
+            del self._entries[expired]
+        # Still over the cap: drop the oldest recorded entries
+        while len(self._entries) > self.max_size:
+            del self._entries[next(iter(self._entries))]
+
+    def lookup(self, key: str, target_level: int, level_range: int,
+               server: Optional[str] = None) -> Optional[dict[str, Any]]:
+        """
+        Return the rejection entry if it still rules the player out of this query
+
+        Args:
+            key: Player UUID
+            target_level: Query target level
+            level_range: Query level range
+            server: World the player is currently on, if known; a world change may
+                mean a character switch, so it drops the entry
+
+        Returns:
+            The entry (with the cached player name) or None if the player must be checked
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if time.monotonic() >= entry["expires_at"] or (
+                server and entry["server"] and server != entry["server"]):
+            del self._entries[key]
+            self.invalidations += 1
+            self.misses += 1
+            return None
+
+        reason = entry["reason"]
+        if (reason == "not_hunted"
+                or (reason == "over_level" and entry["level"] > target_level + level_range)
+                or (reason == "under_level" and entry["level"] < target_level - level_range)):
+            self.skips += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    def observe_active_character(self, key: str, character_id: Optional[str]) -> None:
+        """Drop the entry if a freshly seen profile shows a different active character."""
+        entry = self._entries.get(key)
+        if entry is not None and entry["character_id"] != character_id:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.skips + self.misses
+        reasons: dict[str, int] = {}
+        for entry in self._entries.values():
+            reasons[entry["reason"]] = reasons.get(entry["reason"], 0) + 1
+        return {
+            "size": len(self._entries),
+            "skips": self.skips,
+            "misses": self.misses,
+            "skip_ratio": self.skips / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "reasons": reasons,
+        }
@@ -0,0 +1,73 @@
+from typing import Any, Dict
+import os
+import time
+
+# Configuration
+# Consecutive failures (5xx, timeouts, connection errors) that open the circuit
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open circuit fails fast before a probe request is let through
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+
+
+class CircuitBreaker:
+    """
+    Fails requests fast while an endpoint is down.
+
+    closed:    requests flow; `threshold` consecutive failures open the circuit
+    open:      requests are rejected without touching the network for `cooldown` seconds
+    half_open: one probe request is allowed; success closes the circuit, failure reopens it,
+               a throttled probe (429) says nothing either way and lets the next request probe
+    """
+
+    def __init__(self, name: str, threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """True if a request may be sent now."""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "half_open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            print(f"[INFO] API circuit for {self.name} closed again")
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_neutral(self) -> None:
+        """The request was answered without telling whether the endpoint is healthy (a 429)."""
+        self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+            if self.state == "closed":
+                self.times_opened += 1
+                print(f"[WARN] API circuit for {self.name} opened after {self.failures} failures; "
+                      f"failing fast for {self.cooldown:.0f}s")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "open": int(self.state != "closed"),
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
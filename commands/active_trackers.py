@@ -14,54 +14,48 @@ from concurrent.futures import ThreadPoolExecutor
 from ratelimit import limits, sleep_and_retry
 import importlib
 
-from shared_state import tracker_task, detect_world_tasks
+from shared_state import scheduler
 
-async def run_active_trackers(
-        interaction: discord.Interaction,
-        stop_all: Optional[bool] = None):
-    global tracker_task, detect_world_tasks
+JOB_LABELS = {
+    "tracker": "Player Trackers",
+    "detect-world": "World Trackers",
+    "compare": "Compare Loops",
+}
 
-    active_count = 0
-    tracker_status = "❌ No player tracker running"
 
-    if tracker_task and not tracker_task.done():
-        active_count += 1
-        tracker_status = "✅ Player tracker is running"
+def format_job(job) -> str:
+    status = job.status()
+    if status["running"]:
+        timing = "running now"
+    else:
+        timing = f"next run in `{status['next_run_in']:.0f}s`"
+    last = f", last tick `{status['last_duration']:.1f}s`" if status["last_duration"] is not None else ""
+    errors = f", ⚠️ `{status['errors']}` error(s)" if status["errors"] else ""
+    return f"- {status['description']} — `{status['runs']}` run(s), {timing}{last}{errors}"
 
-    world_trackers = []
-    for world, task in list(detect_world_tasks.items()):
-        if not task.done():
-            world_trackers.append(f"- World `{world}`")
-            active_count += 1
+
+async def run_active_trackers(
+        interaction: discord.Interaction,
+        stop_all: Optional[bool] = None):
+    jobs = scheduler.jobs()
 
     # Handle stopping all trackers if requested
     if stop_all:
-        stop_count = 0
-
-        # Stop the player tracker if running
-        if tracker_task and not tracker_task.done():
-            tracker_task.cancel()
-            tracker_task = None
-            stop_count += 1
-
-        # Stop all world trackers
-        for world, task in list(detect_world_tasks.items()):
-            if not task.done():
-                task.cancel()
-                del detect_world_tasks[world]
-                stop_count += 1
-
-        await interaction.response.send_message(f"🛑 Stopped {stop_count} active tracker(s).")
+        await interaction.response.defer(thinking=True)
+        stop_count = await scheduler.stop_all()
+        await interaction.followup.send(f"🛑 Stopped {stop_count} active tracker(s).")
         return
 
     # Otherwise just list the active trackers
-    if active_count == 0:
+    if not jobs:
         await interaction.response.send_message("🔍 No active trackers running.")
-    else:
-        response = f"🔍 **{active_count} Active Tracker(s):**\n\n{tracker_status}"
+        return
 
-        if world_trackers:
-            response += "\n\n**World Trackers:**\n" + "\n".join(world_trackers)
+    response = f"🔍 **{len(jobs)} Active Tracker(s):**"
+    for kind, label in JOB_LABELS.items():
+        kind_jobs = [job for job in jobs if job.kind == kind]
+        if kind_jobs:
+            response += f"\n\n**{label}:**\n" + "\n".join(format_job(job) for job in kind_jobs)
 
-        response += "\n\nUse `/active-trackers stop_all:True` to stop all trackers."
-        await interaction.response.send_message(response)
\ No newline at end of file
+    response += "\n\nUse `/active-trackers stop_all:True` to stop all trackers."
+    await interaction.response.send_message(response)
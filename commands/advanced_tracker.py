@@ -1,15 +1,95 @@
 import discord
-import aiofiles
 from discord import app_commands, Interaction
 from typing import Optional
 from fetch import fetch_json
 import textwrap
-from player_data import get_advanced_tracked_players, get_detail_character_data
+from player_data import get_advanced_tracked_players, get_detail_character_data, get_player_profile, \
+    get_character_snapshot
+from tracker_registry import tracker_registry, TrackedCharacter
+from tracker_store import tracker_store
+from shared_state import scheduler
+from scheduler import StopJob, count_items
+from notifier import notifier
+from adaptive import AdaptivePoller
+from budget import check_admission
 import asyncio
 import aiohttp
+import time
+
+PROGRESS_DEFAULT_HOURS = 24
+PROGRESS_TOP = 10
+
+
+def character_levels(character: TrackedCharacter) -> dict:
+    """Flatten a tracked character into {skill: level} for the progress history."""
+    return {"combat": character.combat_level, **character.professions}
+
+
+async def send_progress_report(interaction: discord.Interaction, progress: str, hours: int):
+    """
+    Answer progress questions from the local history (no API calls)
+
+    Args:
+        interaction: Discord interaction (already deferred)
+        progress: Player name, or "all" to rank every tracked character by combat levels gained
+        hours: Size of the window in hours
+    """
+    now = time.time()
+    since = now - hours * 3600
+    registry = await tracker_registry.load()
+
+    if progress.lower() == "all":
+        rows = await tracker_store.progress_since(since)
+        ranking = []
+        for char_uuid, skill, start_level, end_level, start_at, _ in rows:
+            character = registry.get_character(char_uuid)
+            if skill != "combat" or character is None:
+                continue
+            elapsed_hours = max((now - start_at) / 3600, 1 / 60)
+            gained = end_level - start_level
+            ranking.append((gained / elapsed_hours, gained, character))
+
+        ranking = [entry for entry in ranking if entry[1] > 0]
+        if not ranking:
+            await interaction.followup.send(f"📭 No combat progress recorded in the last `{hours}` hour(s).")
+            return
+
+        ranking.sort(key=lambda entry: entry[0], reverse=True)
+        lines = [
+            f"{position}. `{character.name}` ({character.char_class}) - `+{gained:.2f}` levels, `{rate:.2f}`/h"
+            for position, (rate, gained, character) in enumerate(ranking[:PROGRESS_TOP], start=1)
+        ]
+        await interaction.followup.send(
+            f"🏁 **Fastest levelling in the last `{hours}` hour(s):**\n" + "\n".join(lines))
+        return
+
+    characters = registry.characters_for_name(progress)
+    if not characters:
+        await interaction.followup.send(f"⚠️ `{progress}` is not advance-tracked.")
+        return
+
+    rows = await tracker_store.progress_since(since, [character.char_uuid for character in characters])
+    if not rows:
+        await interaction.followup.send(f"📭 No history for `{progress}` in the last `{hours}` hour(s).")
+        return
+
+    sections = []
+    for character in characters:
+        skill_lines = []
+        for char_uuid, skill, start_level, end_level, start_at, _ in sorted(rows, key=lambda row: row[1]):
+            if char_uuid != character.char_uuid:
+                continue
+            elapsed_hours = max((now - start_at) / 3600, 1 / 60)
+            gained = end_level - start_level
+            skill_lines.append(
+                f"  - {skill.capitalize()}: {start_level:.2f} → {end_level:.2f} "
+                f"(`+{gained:.2f}`, `{gained / elapsed_hours:.2f}`/h)")
+        if skill_lines:
+            sections.append(f"• `{character.name}` ({character.char_class}):\n" + "\n".join(skill_lines))
+
+    await interaction.followup.send(
+        f"📈 **Progress over the last `{hours}` hour(s):**\n" + "\n".join(sections))
 
-ADVANCED_TRACKER_FILE_PATH = "advanced_tracker.txt"
-advanced_compare_tasks = {}
 
 async def run_advanced_tracker(interaction: discord.Interaction,
     add: Optional[str] = None,
@@ -18,14 +98,21 @@ async def run_advanced_tracker(interaction: discord.Interaction,
     list_entries: Optional[bool] = None,
     compare: Optional[bool] = None,
     interval: Optional[int] = None,
-    stop:Optional[bool] = None):
+    stop:Optional[bool] = None,
+    progress: Optional[str] = None,
+    hours: Optional[int] = None,
+    adaptive: Optional[bool] = None):
 
     await interaction.response.defer(thinking=True)
 
 
     # Only one action allowed
-    if sum(bool(x) for x in [add, remove, list_entries,compare]) != 1:
-        await interaction.followup.send("⚠️ Use one of: `add`, `remove`, or `list_entries=True`.")
+    if sum(bool(x) for x in [add, remove, list_entries,compare,progress]) != 1:
+        await interaction.followup.send("⚠️ Use one of: `add`, `remove`, `list_entries=True`, `compare=True` or `progress`.")
+        return
+
+    if progress:
+        await send_progress_report(interaction, progress, hours or PROGRESS_DEFAULT_HOURS)
         return
 
     if add:
@@ -34,25 +121,24 @@ async def run_advanced_tracker(interaction: discord.Interaction,
             return
 
         # 1. Get player UUID from base endpoint
-        profile_url = f"https://api.wynncraft.com/v3/player/{add}?fullResult"
-        profile_data = await fetch_json(profile_url)
+        profile_data = await get_player_profile(add, fresh=True)
 
-        if not profile_data or "uuid" not in profile_data:
+        if not profile_data:
             await interaction.followup.send(f"❌ Failed to fetch UUID for `{add}`.")
             return
 
-        player_uuid = profile_data["uuid"]
+        player_uuid = profile_data.uuid
 
         # 2. Get character data
-        combat_level, char_class, prof_levels =  await get_detail_character_data(add,char_uuid)
-
-        line = f"{add},{char_class},{player_uuid},{char_uuid},combat:{combat_level:.2f}," + ",".join(prof_levels) + "\n"
+        combat_level, char_class, prof_levels = await get_detail_character_data(add, char_uuid, profile_data)
 
         try:
-            async with aiofiles.open(ADVANCED_TRACKER_FILE_PATH, "a") as f:
-                await f.write(line)
+            character = TrackedCharacter.from_row(
+                (add, char_class, player_uuid, char_uuid, combat_level, ",".join(prof_levels)))
+            await tracker_registry.upsert_characters([character])
+            await tracker_store.append_progress([(char_uuid, time.time(), character_levels(character))])
         except Exception as e:
-            await interaction.followup.send(f"❌ Failed to write to file: {e}")
+            await interaction.followup.send(f"❌ Failed to save tracked character: {e}")
             return
 
         await interaction.followup.send(
@@ -61,49 +147,35 @@ async def run_advanced_tracker(interaction: discord.Interaction,
 
     elif remove:
         try:
-            async with aiofiles.open(ADVANCED_TRACKER_FILE_PATH, "r") as f:
-                lines = await f.readlines()
-
-            updated = [line for line in lines if not line.lower().startswith(remove.lower() + ",")]
-
-            async with aiofiles.open(ADVANCED_TRACKER_FILE_PATH, "w") as f:
-                await f.writelines(updated)
-
+            await tracker_registry.remove_characters(remove)
             await interaction.followup.send(f"🗑️ Removed `{remove}` from tracked characters.")
         except Exception as e:
             await interaction.followup.send(f"⚠️ Error removing entry: {e}")
 
     elif list_entries:
         try:
-            async with aiofiles.open(ADVANCED_TRACKER_FILE_PATH, "r") as f:
-                lines = await f.readlines()
+            characters = await get_advanced_tracked_players()
 
-            if not lines:
+            if not characters:
                 await interaction.followup.send("📭 No tracked characters.")
                 return
 
             all_rows = []
 
-            for line in lines:
-                parts = line.strip().split(",")
-                if len(parts) < 4:
-                    continue
-
-                player = parts[0]
-                character_class = parts[1]
-                profs = dict(item.split(":") for item in parts[4:] if ":" in item)
+            for character in characters:
+                profs = character.professions
 
-                fishing = float(profs.get("fishing", 0))
-                mining = float(profs.get("mining", 0))
-                woodcutting = float(profs.get("woodcutting", 0))
-                farming = float(profs.get("farming", 0))
+                fishing = profs.get("fishing", 0.0)
+                mining = profs.get("mining", 0.0)
+                woodcutting = profs.get("woodcutting", 0.0)
+                farming = profs.get("farming", 0.0)
 
                 avg = (fishing + mining + woodcutting + farming) / 4
 
                 row = {
-                    "Player": player,
-                    "Class": character_class,
-                    "Combat": profs.get("combat", "N/A"),
+                    "Player": character.name,
+                    "Class": character.char_class,
+                    "Combat": f"{character.combat_level:.2f}",
                     "Fishing": fishing,
                     "Mining": mining,
                     "Woodcutting": woodcutting,
@@ -168,11 +240,10 @@ async def run_advanced_tracker(interaction: discord.Interaction,
     # Inside run_advanced_tracker...
     elif compare:
         world_key = f"{interaction.guild_id}_{interaction.channel_id}"
+        job_key = f"compare:{world_key}"
 
         if stop:
-            task = advanced_compare_tasks.pop(world_key, None)
-            if task and not task.done():
-                task.cancel()
+            if await scheduler.unregister(job_key):
                 await interaction.followup.send("🛑 Compare tracking loop stopped.")
             else:
                 await interaction.followup.send("⚠️ No active compare loop to stop.")
@@ -183,7 +254,7 @@ async def run_advanced_tracker(interaction: discord.Interaction,
             return
 
         # Check if there's already a task running
-        if world_key in advanced_compare_tasks and not advanced_compare_tasks[world_key].done():
+        if scheduler.is_active(job_key):
             await interaction.followup.send(
                 "⚠️ A compare loop is already running. Stop it first before starting a new one.")
             return
@@ -195,40 +266,43 @@ async def run_advanced_tracker(interaction: discord.Interaction,
         # to avoid spamming the same status repeatedly
         active_character_notified = {}
 
+        # Characters whose current levels are already in the progress history
+        history_seeded = set()
+
+        # Poll characters that are offline or not levelling less often
+        poller = AdaptivePoller(interval) if adaptive else None
+
         # Define check_and_compare_player_levels
         async def check_and_compare_player_levels():
             try:
                 tracked_players = await get_advanced_tracked_players()
                 if not tracked_players:
                     return None  # No need to notify if there are no tracked players
+                count_items(len(tracked_players))
 
                 results = []
-                updated_lines = []
+                changed_characters = []
+                snapshots = []
                 changes_detected = False
 
-                for line in tracked_players:
-                    parts = line.strip().split(",")
-                    if len(parts) < 5:
-                        updated_lines.append(line if line.endswith("\n") else line + "\n")
+                for tracked in tracked_players:
+                    player_name = tracked.name
+                    char_uuid = tracked.char_uuid
+                    if poller is not None and not poller.due(char_uuid):
                         continue
 
-                    player_name = parts[0]
-                    char_uuid = parts[3]
-
                     # Fetch online status and active character
-                    profile_url = f"https://api.wynncraft.com/v3/player/{player_name}?fullResult"
-                    profile_data = await fetch_json(profile_url)
+                    profile_data = await get_player_profile(player_name)
 
-                    if not profile_data or "uuid" not in profile_data:
-                        updated_lines.append(line if line.endswith("\n") else line + "\n")
+                    if not profile_data:
                         continue
 
                     # Check if player is actually online
-                    is_online = profile_data.get("online", False)
-                    world = profile_data.get("server", "Offline") if is_online else "Offline"
+                    is_online = profile_data.online
+                    world = (profile_data.server or "Offline") if is_online else "Offline"
 
                     # Check if this is the active character - only valid if player is online
-                    active_char_uuid = profile_data.get("activeCharacter") if is_online else None
+                    active_char_uuid = profile_data.active_character if is_online else None
                     is_active = is_online and active_char_uuid == char_uuid
 
                     # Create a unique key for this player-character combination
@@ -247,30 +321,23 @@ async def run_advanced_tracker(interaction: discord.Interaction,
                         # Player was active but isn't anymore, reset notification state
                         del active_character_notified[active_key]
 
-                    # Fetch character data for stat tracking
-                    char_url = f"https://api.wynncraft.com/v3/player/{player_name}/characters/{char_uuid}"
-                    char_data = await fetch_json(char_url)
+                    # Character stats come from the same profile: one request per player per tick
+                    char_data = await get_character_snapshot(player_name, char_uuid, profile_data)
 
-                    if not char_data or "type" not in char_data:
-                        updated_lines.append(line if line.endswith("\n") else line + "\n")
+                    if char_data is None:
                         continue
 
-                    combat_level = int(char_data.get("level", 0)) + (char_data.get("xpPercent", 0) * 0.01)
-                    professions = char_data.get("professions", {})
-
-                    current_prof_levels = {}
-                    for prof, prof_data in professions.items():
-                        level = prof_data.get("level", 0)
-                        xp_percent = prof_data.get("xpPercent", 0)
-                        adjusted_level = level + (xp_percent * 0.01)
-                        current_prof_levels[prof] = adjusted_level
+                    # Levels as level + xpPercent * 0.01
+                    combat_level = char_data.combat_level
+                    current_prof_levels = dict(char_data.professions)
+                    if poller is not None:
+                        # Only the character being played can level
+                        poller.observe(char_uuid, (world, is_active, combat_level, sorted(current_prof_levels.items())),
+                                       active=is_active)
 
-                    # Parse previous levels
-                    previous_combat_level = float(parts[4].split(":")[1])
-                    previous_prof_levels = {
-                        part.split(":")[0]: float(part.split(":")[1])
-                        for part in parts[5:] if ":" in part
-                    }
+                    # Previous levels
+                    previous_combat_level = tracked.combat_level
+                    previous_prof_levels = tracked.professions
 
                     # Detect changes - using a threshold to avoid noise from tiny changes
                     combat_increase = combat_level - previous_combat_level > 0.01
@@ -279,6 +346,15 @@ async def run_advanced_tracker(interaction: discord.Interaction,
 
                     level_changed = combat_increase or prof_increases
 
+                    # Record the observation: every change, plus a baseline for characters without history
+                    observed_at = time.time()
+                    current_levels = {"combat": combat_level, **current_prof_levels}
+                    if level_changed:
+                        snapshots.append((char_uuid, observed_at, current_levels))
+                    elif char_uuid not in history_seeded and not await tracker_store.has_progress(char_uuid):
+                        snapshots.append((char_uuid, observed_at, current_levels))
+                    history_seeded.add(char_uuid)
+
                     if level_changed:
                         changes_detected = True
                         changes = []
@@ -303,24 +379,14 @@ async def run_advanced_tracker(interaction: discord.Interaction,
 
                         results.append(f"🔄 `{player_name}` updated stats:\n" + "\n".join(changes))
 
-                        new_line = (
-                                f"{player_name},{char_data.get('type')},{profile_data['uuid']},{char_uuid},"
-                                f"combat:{combat_level:.2f}," +
-                                ",".join(f"{k}:{v:.2f}" for k, v in sorted(current_prof_levels.items())) +
-                                "\n"
-                        )
-
-                        updated_lines.append(new_line)
-                    else:
-                        # No level changes but we still want to recognize active notification changes
-                        if active_changed:
-                            updated_lines.append(line if line.endswith("\n") else line + "\n")
-                        else:
-                            updated_lines.append(line if line.endswith("\n") else line + "\n")
-
-                # Rewrite the file with updated lines
-                async with aiofiles.open(ADVANCED_TRACKER_FILE_PATH, "w") as f:
-                    await f.writelines(updated_lines)
+                        changed_characters.append(TrackedCharacter(
+                            player_name, char_data.type, profile_data.uuid, char_uuid, combat_level,
+                            current_prof_levels
+                        ))
+
+                # Only characters whose levels moved are written back
+                await tracker_registry.upsert_characters(changed_characters)
+                await tracker_store.append_progress(snapshots)
 
                 if changes_detected:
                     return f"{tracker_user.mention}\n" + "\n\n".join(results)
@@ -329,26 +395,29 @@ async def run_advanced_tracker(interaction: discord.Interaction,
             except Exception as e:
                 return f"⚠️ Error during comparison: `{e}`"
 
-        # Define start_periodic_check
-        async def start_periodic_check():
+        # One compare pass per scheduler tick
+        async def compare_tick():
             try:
-                await interaction.followup.send(
-                    f"🟢 Started compare loop with interval: `{interval}` seconds. Will notify when player stats increase or players become active on tracked characters.")
+                result = await check_and_compare_player_levels()
+                if result:  # Only send messages when there are changes
+                    await notifier.send(interaction, result)
+            except Exception as e:
+                await notifier.send(interaction, f"⚠️ Compare loop encountered an error and stopped: `{e}`", flush=True)
+                raise StopJob()
 
-                while True:
-                    result = await check_and_compare_player_levels()
-                    if result:  # Only send messages when there are changes
-                        await interaction.channel.send(result)
-                    await asyncio.sleep(interval)
+        async def on_stop():
+            print(f"Compare loop for {world_key} was stopped.")
 
-            except asyncio.CancelledError:
-                print(f"Compare loop for {world_key} was stopped.")
-                return
-            except Exception as e:
-                await interaction.channel.send(f"⚠️ Compare loop encountered an error and stopped: `{e}`")
-                # Remove task from active tasks
-                advanced_compare_tasks.pop(world_key, None)
+        registry = await tracker_registry.load()
+        allowed, budget_note = check_admission("compare", len(registry.characters), interval, bool(adaptive))
+        if budget_note:
+            await interaction.followup.send(budget_note)
+        if not allowed:
+            return
 
-        # Start loop and store task
-        task = asyncio.create_task(start_periodic_check())
-        advanced_compare_tasks[world_key] = task
\ No newline at end of file
+        await interaction.followup.send(
+            f"🟢 Started compare loop with interval: `{interval}` seconds{' (adaptive)' if adaptive else ''}. Will notify when player stats increase or players become active on tracked characters.")
+        scheduler.register(job_key, "compare", interval, compare_tick,
+                           description=f"Compare loop in <#{interaction.channel_id}> every {interval}s"
+                                       + (" (adaptive)" if adaptive else ""),
+                           on_stop=on_stop)
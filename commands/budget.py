@@ -0,0 +1,75 @@
+from typing import Optional
+import discord
+
+from budget import ITEM_LABELS, BUDGET_WARN_FRACTION, plan, proposed_workload
+from commands.scan_hunted import SERVER_REGIONS, SERVERS_PER_REGION
+from commands.stats import format_seconds
+from fetch import rate_limiter
+from tracker_registry import tracker_registry
+
+# Rows shown before the table is cut short (Discord's 2000 character limit)
+MAX_ROWS = 12
+
+
+async def default_items(kind: str) -> int:
+    """Size of a proposed workload when the command does not give one."""
+    registry = await tracker_registry.load()
+    if kind == "tracker":
+        return len(registry.players)
+    if kind == "compare":
+        return len(registry.characters)
+    if kind == "scan":
+        return len(SERVER_REGIONS) * SERVERS_PER_REGION
+    return 1
+
+
+async def run_budget(interaction: discord.Interaction,
+                     kind: Optional[str] = None,
+                     items: Optional[int] = None,
+                     interval: Optional[int] = None):
+    extra = []
+    if kind:
+        if kind not in ITEM_LABELS:
+            await interaction.response.send_message(
+                f"⚠️ Unknown workload `{kind}`. Use one of: " + ", ".join(f"`{k}`" for k in ITEM_LABELS))
+            return
+        if interval is None or interval < 10:
+            await interaction.response.send_message("⚠️ Please provide a valid `interval` (>= 10 seconds).")
+            return
+        extra.append(proposed_workload(kind, items if items is not None else await default_items(kind), interval))
+
+    projection = plan(extra)
+    workloads = projection["workloads"]
+    if not workloads:
+        await interaction.response.send_message(
+            f"📭 No polling jobs running. Budget: `{projection['budget']:.0f}` calls/min "
+            f"(`{rate_limiter.calls}` per `{rate_limiter.period:.0f}s`).")
+        return
+
+    rows = [f"{'workload':<40} {'items':>6} {'every':>6} {'req/run':>8} {'calls/min':>9} {'tick':>6}"]
+    for workload in workloads[:MAX_ROWS]:
+        label = ("" if workload.running else "+ ") + workload.label.replace("`", "")
+        rows.append(
+            f"{label[:40]:<40} {workload.items if workload.items is not None else '-':>6} "
+            f"{workload.interval:>5.0f}s {workload.requests_per_run:>7.1f}{'' if workload.measured else '*'} "
+            f"{workload.calls_per_minute:>9.1f} {format_seconds(projection['tick_seconds'][workload.label]):>6}")
+    if len(workloads) > MAX_ROWS:
+        rows.append(f"... {len(workloads) - MAX_ROWS} more")
+    rows.append(f"{'total':<40} {'':>6} {'':>6} {'':>8} {projection['demand']:>9.1f}")
+
+    utilisation = projection["utilisation"]
+    if utilisation > 1:
+        verdict = "⛔ Over budget: expect sustained 429s and ever longer ticks"
+    elif utilisation > BUDGET_WARN_FRACTION:
+        verdict = "⚠️ Tight: little room for interactive commands and scans"
+    else:
+        verdict = "✅ Sustainable"
+
+    lines = [
+        "📐 **API budget plan** (`+` = proposed, `*` = estimated, not measured yet)",
+        "```\n" + "\n".join(rows) + "\n```",
+        f"{verdict}: `{projection['demand']:.0f}` of `{projection['budget']:.0f}` calls/min "
+        f"(`{utilisation:.0%}`), headroom `{projection['headroom']:.0f}` calls/min · "
+        f"used in the current window: `{rate_limiter.utilisation():.0%}`",
+    ]
+    await interaction.response.send_message("\n".join(lines))
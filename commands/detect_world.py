@@ -12,19 +12,24 @@ from discord.ext import commands
 from commands.scan_hunted import run_scan_hunted
 from concurrent.futures import ThreadPoolExecutor
 from ratelimit import limits, sleep_and_retry
-import aiofiles
 
-from player_data import get_player_data, check_player_details, get_tracked_players, get_advanced_tracked_players, get_detail_character_data
-from fetch import fetch_json
-from shared_state import tracker_task, detect_world_tasks
+from player_data import get_player_data, check_player_details, get_detail_character_data
+from fetch import fetch_json, request_priority
+from adaptive import AdaptivePoller
+from budget import check_admission
+from shared_state import scheduler
+from scheduler import StopJob, count_items
+from tracker_registry import tracker_registry, TrackedCharacter
+from notifier import notifier
+from progress import ProgressReporter
 
 # Configuration (from .emv)
 TARGET_LEVEL = int(os.getenv("TARGET_LEVEL", "26"))
 LEVEL_RANGE = int(os.getenv("LEVEL_RANGE", "10"))
 SERVER_REGIONS = os.getenv("SERVER_REGIONS", "EU,NA,AS").split(",")
 SERVERS_PER_REGION = int(os.getenv("SERVERS_PER_REGION", "20"))
-TRACKER_FILE_PATH = "tracker.txt"
-ADVANCED_TRACKER_FILE_PATH = "advaced_tracker.txt"
+# Seconds before a player who stayed on the world is fully re-checked
+RECHECK_AFTER = int(os.getenv("DETECT_WORLD_RECHECK_AFTER", "300"))
 
 async def run_detect_world(
 interaction: discord.Interaction,
@@ -33,22 +38,21 @@ interaction: discord.Interaction,
         level_range: int = LEVEL_RANGE,
         interval: Optional[int] = None,
         stop: Optional[bool] = None,
+        adaptive: Optional[bool] = None,
 ):
-    global detect_world_tasks
+    job_key = f"detect-world:{world}"
 
     # Handle task stop
     if stop:
-        task = detect_world_tasks.get(world)
-        if task and not task.done():
-            task.cancel()
-            del detect_world_tasks[world]
+        if scheduler.is_active(job_key):
             await interaction.response.send_message(f"🛑 World tracker for `{world}` stopped.")
+            await scheduler.unregister(job_key)
         else:
             await interaction.response.send_message(f"⚠️ No active tracker found for world `{world}`.")
         return
 
     # Prevent duplicate tasks
-    if world in detect_world_tasks and not detect_world_tasks[world].done():
+    if scheduler.is_active(job_key):
         await interaction.response.send_message(
             f"⚠️ World `{world}` is already being tracked. Use `/detect-world world:{world} stop:True` to stop it first."
         )
@@ -56,95 +60,159 @@ interaction: discord.Interaction,
 
     await interaction.response.defer(thinking=True)
 
-    async def world_tracker_loop():
-        new_tracked = []
+    # Roster state carried between ticks: uuid -> {"name", "matches", "checked_at"}
+    known_players: dict[str, dict[str, Any]] = {}
+    scan_count = 0
+    # Set once a roster has been fetched, so later ticks report only changes
+    have_baseline = False
+    progress = ProgressReporter(interaction, f"🔍 Tracking world `{world}`", unit="scans")
+    # Scan a world whose hunted players have not changed in a while less often
+    poller = AdaptivePoller(interval) if adaptive and interval else None
+
+    async def world_tracker_tick():
+        nonlocal scan_count, have_baseline
+        if poller is not None and not poller.due(world):
+            return
+        count_items(1)
+        scan_count += 1
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        # First-time or updated status
+        if interval:
+            progress.update(done=scan_count, detail=f"Scan #`{scan_count}` at `{timestamp}`")
+            if progress.message is None:
+                await progress.start()
+
         try:
-            scan_count = 0
-            status_message = None
-
-            while True:
-                scan_count += 1
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                # First-time or updated status
-                content = f"🔍 Scanning world `{world}` (Scan #`{scan_count}`) at `{timestamp}`"
-                if interval:
-                    try:
-                        if status_message:
-                            await status_message.edit(content=content)
-                        else:
-                            status_message = await interaction.followup.send(content)
-                    except discord.HTTPException:
-                        status_message = await interaction.followup.send(content)
-
-                try:
-                    server_data = await get_player_data(world)
-
-                    if not server_data or "players" not in server_data:
-                        await interaction.followup.send(f"⚠️ No data found for world `{world}`.")
-                        break
-
-                    tracked_players = await get_advanced_tracked_players()
-                    tracked_names = {line.split(",")[0].lower() for line in tracked_players}
-
-                    match_messages = []
-                    server_matches = 0
-
-                    for player_uuid in server_data.get("players", []):
-                        player_name, matches = await check_player_details(player_uuid, level, level_range)
-
-                        for match in matches:
-                            server_matches += 1
-                            is_hich = match["is_hich"]
-                            match_messages.append(
-                                f"`{match['player_name']}`{' [HICH]' if is_hich else ''} - "
-                                f"Class: `{match['character_type']}`, Level: `{match['level']}`"
-                            )
-
-                            character_uuid = match['character_id']
-                            if is_hich and player_name.lower() not in tracked_names:
-                                combat_level, char_class, prof_levels = await get_detail_character_data(player_uuid,character_uuid)
-                                new_tracked.append(
-                                    f"{player_name},{char_class},{uuid},{character_uuid},combat:{combat_level:.2f}," + ",".join(
-                                        prof_levels) + "\n")
-
-                        if new_tracked:
-                            async with aiofiles.open(TRACKER_FILE_PATH, "a") as f:
-                                f.write(new_tracked)
-
-                        await asyncio.sleep(0)  # Yield control after each player
-
-                    if match_messages:
-                        await interaction.followup.send(
-                            f"📝 **Found {server_matches} hunted players in `{world}`:**\n" +
-                            "\n".join(match_messages)
-                        )
-                    else:
-                        if not interval:
-                            await interaction.followup.send(
-                                f"⛔ No level `{level}±{level_range}` hunted players found in `{world}`.")
-                        else:
-                            print(f"⛔ No hunted players found in `{world}`.")  # Debugging purposes
-
-                except Exception as e:
-                    await interaction.followup.send(f"⚠️ Error scanning world `{world}`: {e}")
-                    print(f"[ERROR] World scan error ({world}):", e)
+            server_data = await get_player_data(world)
 
+            if server_data is None:
+                # Not an empty world: keep the known roster and try again next tick
                 if not interval:
-                    break
-
-                await asyncio.sleep(interval)
-
-        except asyncio.CancelledError:
-            print(f"[INFO] Tracker for world {world} was cancelled.")
-            await interaction.followup.send(f"🛑 World tracker for `{world}` stopped.")
+                    await interaction.followup.send(f"⚠️ Could not fetch the roster of `{world}`, try again later.")
+                    raise StopJob()
+                print(f"[WARN] {world} scan #{scan_count}: roster fetch failed, keeping the previous roster")
+                return
+
+            if "players" not in server_data:
+                await notifier.send(interaction, f"⚠️ No data found for world `{world}`.", flush=True)
+                raise StopJob()
+
+            registry = await tracker_registry.load()
+
+            # Diff the roster against the previous tick
+            now = time.monotonic()
+            roster = set(server_data.get("players", []))
+            joined = roster - known_players.keys()
+            left = known_players.keys() - roster
+            stale = {player_uuid for player_uuid in roster - joined
+                     if now - known_players[player_uuid]["checked_at"] >= RECHECK_AFTER}
+
+            # Only newcomers and stale entries cost an API call
+            to_check = list(joined | stale)
+            results = await asyncio.gather(
+                *(check_player_details(player_uuid, level, level_range, world) for player_uuid in to_check))
+
+            events = []
+            for player_uuid, (player_name, matches) in zip(to_check, results):
+                if player_name is None:
+                    # The profile could not be fetched: keep what we knew and retry next tick
+                    continue
+                previous = known_players.get(player_uuid)
+                was_match = bool(previous and previous["matches"])
+                known_players[player_uuid] = {
+                    "name": player_name,
+                    "matches": matches,
+                    "checked_at": now,
+                }
+
+                if have_baseline and matches and not was_match:
+                    verb = "joined" if player_uuid in joined else "now matches"
+                    events.append(f"➕ `{player_name}` {verb} `{world}`")
+                elif was_match and not matches:
+                    events.append(f"➖ `{player_name}` no longer matches")
+
+                for match in matches:
+                    character_uuid = match['character_id']
+                    if match["is_hich"] and not registry.is_character_tracked(player_name, player_uuid):
+                        combat_level, char_class, prof_levels = await get_detail_character_data(
+                            player_uuid, character_uuid, match["profile"])
+                        await registry.upsert_characters([TrackedCharacter.from_row(
+                            (player_name, char_class, player_uuid, character_uuid, combat_level, ",".join(prof_levels)))])
+
+            for player_uuid in left:
+                previous = known_players.pop(player_uuid)
+                if previous["matches"]:
+                    events.append(f"🚪 `{previous['name']}` left `{world}`")
+
+            if poller is not None:
+                hunted_here = frozenset(uuid for uuid, player in known_players.items() if player["matches"])
+                poller.observe(world, hunted_here, active=bool(roster))
+
+            progress.update(add_checked=len(to_check))
+            print(f"[INFO] {world} scan #{scan_count}: {len(roster)} online, {len(joined)} joined, "
+                  f"{len(left)} left, {len(to_check)} checked")
+
+            match_messages = []
+            for player in known_players.values():
+                for match in player["matches"]:
+                    is_hich = match["is_hich"]
+                    match_messages.append(
+                        f"`{match['player_name']}`{' [HICH]' if is_hich else ''} - "
+                        f"Class: `{match['character_type']}`, Level: `{match['level']}`"
+                    )
+
+            if have_baseline:
+                # Interval ticks only report what changed since the previous scan
+                if events:
+                    await notifier.send(
+                        interaction,
+                        f"📝 **Changes in `{world}`** ({len(match_messages)} hunted players online):\n" +
+                        "\n".join(events)
+                    )
+            elif match_messages:
+                await notifier.send(
+                    interaction,
+                    f"📝 **Found {len(match_messages)} hunted players in `{world}`:**\n" +
+                    "\n".join(match_messages)
+                )
+            else:
+                if not interval:
+                    await interaction.followup.send(
+                        f"⛔ No level `{level}±{level_range}` hunted players found in `{world}`.")
+                else:
+                    print(f"⛔ No hunted players found in `{world}`.")  # Debugging purposes
+            have_baseline = True
+
+        except StopJob:
+            raise
         except Exception as e:
-            await interaction.followup.send(f"⚠️ Unexpected error in world tracker `{world}`: {e}")
-            print(f"[CRITICAL] Tracker loop error ({world}):", e)
-        finally:
-            detect_world_tasks.pop(world, None)
+            await notifier.send(interaction, f"⚠️ Error scanning world `{world}`: {e}")
+            print(f"[ERROR] World scan error ({world}):", e)
+
+    async def on_stop():
+        print(f"[INFO] Tracker for world {world} was cancelled.")
+        await progress.finish()
+        await notifier.send(interaction, f"🛑 World tracker for `{world}` stopped.", flush=True)
 
     # Start the tracking loop
     if interval:
-        await interaction.followup.send(f"🔁 Starting to track world `{world}` every `{interval}` seconds.")
-    detect_world_tasks[world] = asyncio.create_task(world_tracker_loop())
\ No newline at end of file
+        allowed, budget_note = check_admission("detect-world", 1, interval, bool(poller))
+        if budget_note:
+            await interaction.followup.send(budget_note)
+        if not allowed:
+            return
+        await interaction.followup.send(f"🔁 Starting to track world `{world}` every `{interval}` seconds"
+                                        + (" (adaptive)." if poller else "."))
+        scheduler.register(job_key, "detect-world", interval, world_tracker_tick,
+                           description=f"World `{world}` (level {level}±{level_range}) every {interval}s"
+                                       + (" (adaptive)" if poller else ""),
+                           on_stop=on_stop)
+    else:
+        # A one-off sweep of the world: behind interactive commands, ahead of polling loops
+        request_priority.set("scan")
+        try:
+            await world_tracker_tick()
+        except StopJob:
+            pass
+        await notifier.flush(interaction)
@@ -2,32 +2,83 @@ from datetime import datetime
 import asyncio
 from discord import Interaction
 from discord import app_commands
-from typing import Optional
-from player_data import get_player_data, check_player_details, get_tracked_players, get_detail_character_data, \
-    get_advanced_tracked_players
+from typing import Optional, Tuple, List, Dict, Any
+from player_data import get_player_data, check_player_details, get_detail_character_data
+from tracker_registry import tracker_registry, TrackedCharacter
+from notifier import notifier
+from fetch import request_priority
+from scheduler import RequestTally, current_tally
+from shared_state import scheduler
+import time
+from progress import ProgressReporter
 import os
-import aiofiles
 
 # Configuration (from .emv)
 TARGET_LEVEL = int(os.getenv("TARGET_LEVEL", "26"))
 LEVEL_RANGE = int(os.getenv("LEVEL_RANGE", "10"))
 SERVER_REGIONS = os.getenv("SERVER_REGIONS", "EU,NA,AS").split(",")
 SERVERS_PER_REGION = int(os.getenv("SERVERS_PER_REGION", "20"))
-TRACKER_FILE_PATH = "tracker.txt"
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "20"))
+
+
+async def scan_server(
+        server_id: str,
+        target_level: int,
+        level_range: int,
+        limiter: asyncio.Semaphore) -> Tuple[str, int, List[Tuple[str, Optional[str], List[Dict[str, Any]]]]]:
+    """
+    Fetch a server's roster and check every player on it concurrently
+
+    Args:
+        server_id: Server to scan (e.g. EU1)
+        target_level: Target level to search for
+        level_range: Level range around target
+        limiter: Shared semaphore bounding in-flight requests across all servers
+
+    Returns:
+        (server_id, player_count, [(player_uuid, player_name, matches), ...])
+    """
+    async with limiter:
+        server_data = await get_player_data(server_id)
+
+    if server_data is None:
+        print(f"[WARN] Could not fetch the roster of {server_id}, skipping it")
+        server_data = {}
+    players = list(server_data.get("players", []))
+
+    async def check(player_uuid: str):
+        async with limiter:
+            player_name, matches = await check_player_details(player_uuid, target_level, level_range, server_id)
+        return player_uuid, player_name, matches
+
+    results = await asyncio.gather(*(check(player_uuid) for player_uuid in players))
+    return server_id, len(players), results
 
 
 async def run_scan_hunted(
         interaction: Interaction,
         target_level: int = TARGET_LEVEL,
-        level_range: int = LEVEL_RANGE):
+        level_range: int = LEVEL_RANGE,
+        concurrency: int = SCAN_CONCURRENCY):
     """
     Scan Wynncraft servers for hunted players within a specific level range
 
+    All world rosters are fetched in parallel and players are checked concurrently
+    across servers; the global rate limiter in fetch.py still caps the request rate.
+
     Args:
         interaction: Discord interaction
         target_level: Target level to search for
         level_range: Level range around target
+        concurrency: Maximum number of requests in flight for this scan (1 = sequential)
     """
+    # Hundreds of profile requests: let interactive commands go first
+    request_priority.set("scan")
+    # Measure what a full scan costs, for /budget
+    tally = RequestTally()
+    current_tally.set(tally)
+    scan_started = time.monotonic()
+
     # Track total matches found
     total_matches = 0
     total_hich_matches = 0
@@ -37,90 +88,81 @@ async def run_scan_hunted(
     await interaction.response.defer(thinking=True)
     await interaction.followup.send(f"Starting scan at `{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}`\n" + "-" * 60)
 
-    # Send a status message that we'll update
-    status_message = await interaction.followup.send("Initialising scan...")
+    server_ids = [f"{region}{server_number}"
+                  for region in SERVER_REGIONS
+                  for server_number in range(1, SERVERS_PER_REGION + 1)]
+    tally.items = len(server_ids)
+
+    # Status message that we'll update (edits are debounced by the reporter)
+    progress = await ProgressReporter(interaction, "🔍 Scanning", total=len(server_ids)).start()
 
     # Get tracked players for HICH detection
-    tracked_players = await get_advanced_tracked_players()
-    tracked_names = [line.split(",")[0].lower() for line in tracked_players]
-
-    # Main logic
-    for region in SERVER_REGIONS:
-        for server_number in range(1, SERVERS_PER_REGION + 1):
-            server_id = f"{region}{server_number}"
-
-            # Use thread executor for API calls to prevent blocking the event loop
-            server_data = await get_player_data(server_id)
-
-
-            # Get player count for this server
-            players_in_server = len(server_data.get("players", []))
-            total_players_scanned += players_in_server
-
-            # Update status message instead of sending a new one
-            await status_message.edit(content=f"Scanning server `{server_id}`... Found `{players_in_server}` players")
-
-            # If server is empty, continue to next server
-            if players_in_server == 0:
-                continue
-
-            # Data to send as final statistics
-            server_matches = 0
-            server_hich_matches = 0
-            match_messages = []
-
-            # Process each player in the server
-            for player_uuid in server_data.get("players", []):
-                # Use thread executor for API calls to prevent blocking the event loop
-                player_name, matches = await check_player_details(player_uuid, target_level, level_range)
-
-                # Process matches if any found
-                for match in matches:
-                    server_matches += 1
-                    total_matches += 1
-
-                    # Add HICH label if applicable
-                    hich_label = ""
-                    if match['is_hich']:
-                        hich_label = " [HICH]"
-                        server_hich_matches += 1
-                        total_hich_matches += 1
-
-                        # Track newly detected HICH/HUICH players
-                        if player_name.lower() not in tracked_names:
-                            combat_level, char_class, prof_levels = await get_detail_character_data(player_name,player_uuid)
-
-                            line = f"{player_name},{char_class},{player_uuid},{match['character_id']},combat:{combat_level:.2f}," + ",".join(prof_levels) + "\n"
-                            async with aiofiles.open(TRACKER_FILE_PATH, "a") as tracker_file:
-                                await tracker_file.write(line)
-                            match_messages.append(f"📝 Added new HICH/HUICH player: `{player_name}` to the advanced tracker")
-                        else:
-                            match_messages.append("This HICH/HUICH is already in the tracker")
-
-                    match_messages.append(
-                        f"{interaction.user.mention} [MATCH]{hich_label} `{match['player_name']}` - Class: `{match['character_type']}`, Level: `{match['level']}` in `{server_id}`"
-                    )
-
-                # Allow other tasks to run after processing each player
-                await asyncio.sleep(0)
-
-            # Send match information if any found
-            if match_messages:
-                await interaction.followup.send("\n".join(match_messages))
-                hich_info = f" ({server_hich_matches} HICH)" if server_hich_matches > 0 else ""
-                await interaction.followup.send(
-                    f"Found {server_matches} matching characters{hich_info} on {server_id}")
-
-            # Status update every 5 servers - update the progress in the status message
-            if server_number % 5 == 0:
-                progress_message = f"Progress: `{region}` servers `1-{server_number}` complete. Total players scanned: `{total_players_scanned}`"
-                await status_message.edit(content=progress_message)
-
-            # Allow other tasks to run after processing each server
-            await asyncio.sleep(0)
+    registry = await tracker_registry.load()
+    limiter = asyncio.Semaphore(max(1, concurrency))
+    servers_done = 0
+
+    # Main logic - servers are reported as soon as they finish, each in its own group
+    for next_server in asyncio.as_completed(
+            [scan_server(server_id, target_level, level_range, limiter) for server_id in server_ids]):
+        server_id, players_in_server, results = await next_server
+        servers_done += 1
+        total_players_scanned += players_in_server
+
+        # Update status message instead of sending a new one
+        progress.update(done=servers_done, checked=total_players_scanned,
+                        detail=f"Scanned server `{server_id}`... Found `{players_in_server}` players")
+
+        # If server is empty, continue to next server
+        if players_in_server == 0:
+            continue
+
+        # Data to send as final statistics
+        server_matches = 0
+        server_hich_matches = 0
+        match_messages = []
+
+        # Process each player in the server
+        for player_uuid, player_name, matches in results:
+            # Process matches if any found
+            for match in matches:
+                server_matches += 1
+                total_matches += 1
+
+                # Add HICH label if applicable
+                hich_label = ""
+                if match['is_hich']:
+                    hich_label = " [HICH]"
+                    server_hich_matches += 1
+                    total_hich_matches += 1
+
+                    # Track newly detected HICH/HUICH players
+                    if not registry.is_character_tracked(player_name, player_uuid):
+                        combat_level, char_class, prof_levels = await get_detail_character_data(
+                            player_uuid, match['character_id'], match['profile'])
+
+                        await registry.upsert_characters([TrackedCharacter.from_row(
+                            (player_name, char_class, player_uuid, match['character_id'], combat_level, ",".join(prof_levels)))])
+                        match_messages.append(f"📝 Added new HICH/HUICH player: `{player_name}` to the advanced tracker")
+                    else:
+                        match_messages.append("This HICH/HUICH is already in the tracker")
+
+                match_messages.append(
+                    f"{interaction.user.mention} [MATCH]{hich_label} `{match['player_name']}` - Class: `{match['character_type']}`, Level: `{match['level']}` in `{server_id}`"
+                )
+
+        # Queue match information if any found; the notifier packs servers into shared messages
+        if match_messages:
+            hich_info = f" ({server_hich_matches} HICH)" if server_hich_matches > 0 else ""
+            match_messages.append(f"Found {server_matches} matching characters{hich_info} on {server_id}")
+            await notifier.send(interaction, "\n".join(match_messages))
+
+    # Deliver any queued matches before the completion notice
+    await notifier.flush(interaction)
 
     # Update status message with completion notice
-    await status_message.edit(content="Scan complete! Check results below.")
+    progress.detail = "Scan complete! Check results below."
+    await progress.finish()
+    scheduler.record_run("scan", tally, time.monotonic() - scan_started)
 
     # Final statistics
     final_message = "\n" + "=" * 60 + "\n"
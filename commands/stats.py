@@ -0,0 +1,73 @@
+import discord
+
+from metrics import metrics
+from rate_limiter import PRIORITIES
+from shared_state import scheduler
+
+
+def format_seconds(value) -> str:
+    if value is None:
+        return "-"
+    if value == float("inf"):
+        return ">10s"
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s"
+
+
+def endpoint_table() -> str:
+    header = f"{'endpoint':<11} {'reqs':>6} {'2xx':>6} {'429':>4} {'4xx':>4} {'5xx':>4} {'err':>4} " \
+             f"{'retry':>5} {'fast':>4} {'p50':>6} {'p95':>6} {'MiB':>6} {'live':>4}"
+    rows = [header]
+    for family, m in metrics.endpoints.items():
+        if not m.requests:
+            continue
+        rows.append(
+            f"{family:<11} {m.requests:>6} {m.status_share('2'):>6} {m.statuses.get('429', 0):>4} "
+            f"{m.status_share('4') - m.statuses.get('429', 0):>4} {m.status_share('5'):>4} {m.errors:>4} "
+            f"{m.retries:>5} {m.short_circuited:>4} {format_seconds(m.latency.quantile(0.5)):>6} {format_seconds(m.latency.quantile(0.95)):>6} "
+            f"{m.bytes_received / 2 ** 20:>6.1f} {m.in_flight:>4}")
+    if len(rows) == 1:
+        rows.append("(no API requests yet)")
+    return "\n".join(rows)
+
+
+async def run_stats(interaction: discord.Interaction):
+    collected = metrics.collect()
+    profile_cache = collected.get("profile_cache", {})
+    negative_cache = collected.get("negative_cache", {})
+    limiter = collected.get("rate_limiter", {})
+    coalesce = collected.get("coalesce", {})
+    decode = collected.get("decode", {})
+    notifier = collected.get("notifier", {})
+    http_cache = collected.get("http_cache", {})
+    adaptive = collected.get("adaptive", {})
+    received = sum(m.bytes_received for m in metrics.endpoints.values())
+    transferred = sum(m.wire_bytes for m in metrics.endpoints.values())
+
+    lines = [
+        "📊 **API metrics** (latency percentiles are bucket upper bounds)",
+        "```\n" + endpoint_table() + "\n```",
+        f"🗃️ Profile cache: `{profile_cache.get('hit_ratio', 0):.0%}` hits "
+        f"(`{profile_cache.get('size', 0)}` entries) · Negative cache: `{negative_cache.get('skip_ratio', 0):.0%}` "
+        f"skipped (`{negative_cache.get('size', 0)}` entries)",
+        f"🔗 Coalesced requests: `{coalesce.get('coalesced', 0)}` · Rate limit: "
+        f"`{limiter.get('used_in_window', 0)}/{limiter.get('calls', 0)}` used this window"
+        + (f", server says `{limiter['server_remaining']}` left" if limiter.get("server_remaining") is not None else ""),
+        f"⚙️ Decoded off the loop: `{decode.get('offloaded', 0)}` / inline: `{decode.get('inline', 0)}` · "
+        f"Notifications: `{notifier.get('notifications', 0)}` in `{notifier.get('messages_sent', 0)}` message(s)",
+        f"🗄️ Not modified (304): `{http_cache.get('not_modified', 0)}` · "
+        f"`{http_cache.get('bytes_saved', 0) / 2 ** 20:.1f}` MiB not downloaded again · "
+        f"`{http_cache.get('decode_skipped', 0)}` decodes skipped · "
+        f"`{http_cache.get('entries', 0)}` stored (`{http_cache.get('bytes', 0) / 2 ** 20:.1f}` MiB) · "
+        f"Compression: `{received / transferred if transferred else 1:.1f}x`",
+        "🚦 Request queues: " + " · ".join(
+            f"{priority} `{limiter.get(f'{priority}_queued', 0)}` waiting, "
+            f"avg wait `{format_seconds(limiter.get(f'{priority}_avg_wait', 0.0))}`"
+            for priority in PRIORITIES),
+        f"🔁 Active polling jobs: `{len(scheduler.jobs())}` · Adaptive polls: `{adaptive.get('polls', 0)}` made, "
+        f"`{adaptive.get('skipped', 0)}` skipped, budget pressure `{adaptive.get('budget_pressure', 1.0):.1f}x`",
+    ]
+    open_circuits = [name[len("breaker_"):] for name, values in collected.items()
+                     if name.startswith("breaker_") and values.get("open")]
+    if open_circuits:
+        lines.append(f"🚧 API circuit open (failing fast): `{', '.join(open_circuits)}`")
+    await interaction.response.send_message("\n".join(lines))
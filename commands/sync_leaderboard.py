@@ -1,10 +1,9 @@
 from asyncio import get_event_loop
-from typing import Final, Any, Optional
+from typing import Final, Any, Dict, List, Optional, Tuple
 import os
 import discord
 from requests import get, RequestException
 import asyncio
-import aiofiles
 from dotenv import load_dotenv
 from discord import Intents, Message, app_commands
 from discord.ext import commands
@@ -13,75 +12,179 @@ from concurrent.futures import ThreadPoolExecutor
 from ratelimit import limits, sleep_and_retry
 import importlib
 
-from player_data import get_player_data, check_player_details, get_advanced_tracked_players, get_detail_character_data
-from fetch import fetch_json
-from shared_state import tracker_task, detect_world_tasks
+from player_data import get_player_data, check_player_details, get_detail_character_data
+from fetch import API_BASE, fetch_json, request_priority
+from shared_state import scheduler
+from tracker_registry import tracker_registry, TrackedCharacter
+from tracker_store import tracker_store, LeaderboardEntry
+from notifier import notifier
+import time
 
 # Configuration (from .emv)
 TARGET_LEVEL = int(os.getenv("TARGET_LEVEL", "26"))
 LEVEL_RANGE = int(os.getenv("LEVEL_RANGE", "10"))
 SERVER_REGIONS = os.getenv("SERVER_REGIONS", "EU,NA,AS").split(",")
 SERVERS_PER_REGION = int(os.getenv("SERVERS_PER_REGION", "20"))
-TRACKER_FILE_PATH = "tracker.txt"
-ADVANCED_FILE_PATH = "advanced_tracker.txt"
+# Leaderboards synced when the command does not name any
+SYNC_LEADERBOARDS = os.getenv("SYNC_LEADERBOARDS", "hichContent")
+# Character lookups in flight at once while enriching new leaderboard entries
+SYNC_ENRICH_CONCURRENCY = int(os.getenv("SYNC_ENRICH_CONCURRENCY", "8"))
+
+
+def parse_board(board: str, data: Dict[str, Any]) -> Dict[str, Tuple[LeaderboardEntry, Dict[str, Any]]]:
+    """
+    Index a leaderboard response by character
+
+    Returns:
+        {char_uuid: ((rank, level, deaths), raw entry)}
+    """
+    entries = {}
+    for rank, entry in data.items():
+        if not isinstance(entry, dict) or not entry.get("characterUuid"):
+            continue
+        character_data = entry.get("characterData") or {}
+        try:
+            rank = int(rank)
+        except ValueError:
+            rank = 0
+        entries[entry["characterUuid"]] = (
+            (rank, int(character_data.get("level", 0)), int(character_data.get("deaths", 0))), entry)
+    return entries
+
+
+async def sync_board(board: str, level: int, hunted_range: int) -> Optional[Dict[str, Any]]:
+    """
+    Diff one leaderboard against its last synced snapshot
+
+    Args:
+        board: Leaderboard type (e.g. "hichContent")
+        level: Target level
+        hunted_range: Level range around target
+
+    Returns:
+        {"board", "entries", "changed", "matched": [raw entry, ...], "to_enrich": {char_uuid: raw entry}},
+        or None if the leaderboard could not be downloaded
+    """
+    # Download and snapshot read overlap; an unchanged board is a 304 from the HTTP cache
+    leaderboard_data, (criteria, previous) = await asyncio.gather(
+        fetch_json(f"{API_BASE}/v3/leaderboards/{board}"),
+        tracker_store.load_leaderboard_snapshot(board))
+    if not isinstance(leaderboard_data, dict) or not leaderboard_data:
+        return None
+
+    if criteria != f"{level}:{hunted_range}":
+        previous = {}  # Different level range: every entry has to be looked at again
+
+    registry = await tracker_registry.load()
+    current = parse_board(board, leaderboard_data)
+    matched = []
+    to_enrich = {}
+    changed = 0
+    for char_uuid, (state, entry) in current.items():
+        rank, level_value, deaths = state
+        # Skip players with deaths
+        if deaths > 0 or not level - hunted_range <= level_value <= level + hunted_range:
+            continue
+        matched.append(entry)
+
+        if previous.get(char_uuid) == state:
+            continue  # Processed by an earlier sync (and maybe untracked on purpose since)
+        changed += 1
+        if not registry.is_character_tracked(entry.get("name", "Unknown"), entry.get("uuid", "")):
+            to_enrich[char_uuid] = entry
+
+    return {"board": board, "criteria": f"{level}:{hunted_range}", "snapshot": current,
+            "matched": matched, "changed": changed, "to_enrich": to_enrich}
+
+
+async def enrich(entries: Dict[str, Dict[str, Any]]) -> Tuple[List[TrackedCharacter], List[str]]:
+    """
+    Look up combat and profession levels of new leaderboard characters
+
+    Args:
+        entries: {char_uuid: raw leaderboard entry}
+
+    Returns:
+        (tracker rows to add, character UUIDs whose lookup failed)
+    """
+    limiter = asyncio.Semaphore(SYNC_ENRICH_CONCURRENCY)
+
+    async def lookup(char_uuid: str, entry: Dict[str, Any]):
+        async with limiter:
+            return await get_detail_character_data(entry.get("uuid", ""), char_uuid)
+
+    results = await asyncio.gather(*(lookup(char_uuid, entry) for char_uuid, entry in entries.items()))
+    rows, failed = [], []
+    for (char_uuid, entry), (combat_level, char_class, prof_levels) in zip(entries.items(), results):
+        if char_class == "Unknown" and not combat_level:
+            failed.append(char_uuid)
+            continue
+        rows.append(TrackedCharacter.from_row(
+            (entry.get("name", "Unknown"), entry.get("characterType", "Unknown").upper(), entry.get("uuid", ""),
+             char_uuid, combat_level, ",".join(prof_levels))))
+    return rows, failed
+
 
 async def run_sync_leaderboard(interaction: discord.Interaction,
                            level: Optional[int] = TARGET_LEVEL,
-                           hunted_range: Optional[int] = LEVEL_RANGE):
+                           hunted_range: Optional[int] = LEVEL_RANGE,
+                           boards: Optional[str] = None):
     await interaction.response.defer(thinking=True)
+    # Bulk enrichment: let interactive commands go first
+    request_priority.set("scan")
 
     try:
-        HICH_leaderboard_url = "https://api.wynncraft.com/v3/leaderboards/hichContent"
-        leaderboard_data = await fetch_json(HICH_leaderboard_url)
+        started = time.monotonic()
+        board_names = list(dict.fromkeys(
+            board.strip() for board in (boards or SYNC_LEADERBOARDS).split(",") if board.strip()))
+        results = await asyncio.gather(*(sync_board(board, level, hunted_range) for board in board_names))
 
-        if not isinstance(leaderboard_data, dict) or not leaderboard_data:
+        failed_boards = [board for board, result in zip(board_names, results) if result is None]
+        results = [result for result in results if result is not None]
+        if not results:
             await interaction.followup.send("⚠️ Failed to retrieve leaderboard data.")
             return
 
-        tracked_players = await get_advanced_tracked_players()
-        tracked_names = {line.split(",")[0].lower() for line in tracked_players}
-        new_tracked = []
-        matched_players = []
-
-        for _, entry in leaderboard_data.items():
-            player_name = entry.get("name", "Unknown")
-            uuid = entry.get("uuid", "")
-            character_type = entry.get("characterType", "Unknown")
-            character_uuid = entry.get("characterUuid", "Unknown")
-            character_type = character_type.upper()
-            character_data = entry.get("characterData", {})
-
-            level_value = character_data.get("level", 0)
-            deaths = character_data.get("deaths", 0)
-
-            # Skip players with deaths
-            if deaths > 0:
-                continue
-
-            # Match based on level range
-            if level - hunted_range <= level_value <= level + hunted_range:
-                matched_players.append(
-                    f"`{player_name}` - Level: `{level_value}` - Class: `{character_type}`"
-                )
-
-                # Add to tracker if not already tracked
-                if player_name.lower() not in tracked_names:
-                    combat_level,char_class,prof_levels = await get_detail_character_data(uuid,character_uuid)
-                    new_tracked.append(f"{player_name},{character_type},{uuid},{character_uuid},combat:{combat_level:.2f}," + ",".join(prof_levels) + "\n")
+        # A character on several boards is looked up once
+        to_enrich = {}
+        for result in results:
+            to_enrich.update(result["to_enrich"])
+        new_tracked, failed = await enrich(to_enrich)
 
         if new_tracked:
-            # Append new entries to the tracker file
-            async with aiofiles.open(ADVANCED_FILE_PATH, "a") as f:
-                await f.writelines(new_tracked)
-
-        if matched_players:
-            await interaction.followup.send(
-                f"📝 **Found {len(matched_players)} deathless HICH players in level range `{level} ± {hunted_range}`:**\n" +
-                "\n".join(matched_players)
-            )
-        else:
-            await interaction.followup.send(
-                f"⛔ No deathless HICH players found within level range `{level} ± {hunted_range}`.")
+            # Store all new entries in one transaction
+            registry = await tracker_registry.load()
+            await registry.upsert_characters(new_tracked)
+
+        # Failed lookups stay out of the snapshot so the next sync retries them
+        for result in results:
+            snapshot = {char_uuid: state for char_uuid, (state, _) in result["snapshot"].items()
+                        if char_uuid not in failed}
+            await tracker_store.save_leaderboard_snapshot(result["board"], result["criteria"], snapshot)
+
+        for result in results:
+            board = result["board"]
+            if result["matched"]:
+                await notifier.send(interaction, f"📝 **Found {len(result['matched'])} deathless players on "
+                                                 f"`{board}` in level range `{level} ± {hunted_range}`:**")
+                for entry in result["matched"]:
+                    await notifier.send(
+                        interaction,
+                        f"`{entry.get('name', 'Unknown')}` - Level: `{entry.get('characterData', {}).get('level', 0)}`"
+                        f" - Class: `{entry.get('characterType', 'Unknown').upper()}`")
+            else:
+                await notifier.send(interaction, f"⛔ No deathless players found on `{board}` "
+                                                 f"within level range `{level} ± {hunted_range}`.")
+
+        synced = ", ".join(f"`{result['board']}`" for result in results)
+        summary = (f"🔄 Synced {synced} in "
+                   f"`{time.monotonic() - started:.1f}s`: `{sum(result['changed'] for result in results)}` "
+                   f"new or changed entries, `{len(new_tracked)}` added to the tracker")
+        if failed:
+            summary += f", `{len(failed)}` lookup(s) failed and will be retried next sync"
+        if failed_boards:
+            summary += "\n⚠️ Failed to retrieve " + ", ".join(f"`{board}`" for board in failed_boards)
+        await notifier.send(interaction, summary, flush=True)
 
     except Exception as e:
-        await interaction.followup.send(f"⚠️ Error while checking HICH leaderboard: {e}")
\ No newline at end of file
+        await interaction.followup.send(f"⚠️ Error while checking HICH leaderboard: {e}")
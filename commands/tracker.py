@@ -3,16 +3,21 @@ import asyncio
 import discord
 from discord import Interaction
 from typing import Optional
-from player_data import get_player_data, check_player_details, get_tracked_players
+from player_data import get_player_data, check_player_details, get_player_profile
 import os
-from shared_state import tracker_task
+from shared_state import scheduler
 from fetch import fetch_json  # This must be an async function using aiohttp
-import aiofiles
+from tracker_registry import tracker_registry
+from notifier import notifier
+from presence import presence_index
+from adaptive import AdaptivePoller
+from scheduler import count_items
+from budget import check_admission
 
 # Configuration
 TARGET_LEVEL = int(os.getenv("TARGET_LEVEL", "26"))
 LEVEL_RANGE = int(os.getenv("LEVEL_RANGE", "10"))
-TRACKER_FILE_PATH = "tracker.txt"
+TRACKER_JOB_KEY = "tracker"
 
 async def run_tracker(
     interaction: Interaction,
@@ -22,8 +27,8 @@ async def run_tracker(
     find: Optional[bool],
     interval: Optional[int],
     stop: Optional[bool],
+    adaptive: Optional[bool] = None,
 ):
-    global tracker_task
     await interaction.response.defer(thinking=True)
 
 
@@ -36,53 +41,42 @@ async def run_tracker(
         await interaction.followup.send("⚠️ `interval` is only valid with `find=True`.")
         return
 
+    if adaptive and not interval:
+        await interaction.followup.send("⚠️ `adaptive` needs an `interval`.")
+        return
+
 
 
 
     # ✅ Add
     if add:
-        stats_url = f"https://api.wynncraft.com/v3/player/{add}?fullResult"
-        player_data = await fetch_json(stats_url)
-        if not player_data:
+        profile = await get_player_profile(add)
+        if not profile:
             await interaction.followup.send(f"❌ Could not find player `{add}` or API failed.")
             return
 
-        uuid = player_data.get("uuid")
+        uuid = profile.uuid
         if not uuid:
             await interaction.followup.send(f"❌ UUID not found for `{add}`.")
             return
 
-        with open(TRACKER_FILE_PATH, "r+") as f:
-            lines = f.readlines()
-            if any(line.lower().startswith(f"{add.lower()},") for line in lines):
-                await interaction.followup.send(f"⚠️ `{add}` is already in the tracker.")
-                return
-            f.write(f"{add},{uuid}\n")
+        if not await tracker_registry.add_player(add, uuid):
+            await interaction.followup.send(f"⚠️ `{add}` is already in the tracker.")
+            return
         await interaction.followup.send(f"✅ `{add}` added to tracker.")
 
     # ✅ Remove
     elif remove:
-        try:
-            with open(TRACKER_FILE_PATH, "r") as f:
-                lines = f.readlines()
-
-            updated = [line for line in lines if not line.lower().startswith(remove.lower() + ",")]
-
-            if len(updated) == len(lines):
-                await interaction.followup.send(f"⚠️ `{remove}` not found.")
-            else:
-                with open(TRACKER_FILE_PATH, "w") as f:
-                    f.writelines(updated)
-                await interaction.followup.send(f"🗑️ `{remove}` removed from tracker.")
-
-        except FileNotFoundError:
-            await interaction.followup.send("⚠️ Tracker file not found.")
+        if await tracker_registry.remove_player(remove):
+            await interaction.followup.send(f"🗑️ `{remove}` removed from tracker.")
+        else:
+            await interaction.followup.send(f"⚠️ `{remove}` not found.")
 
     # ✅ List
     elif list_players:
         try:
-            with open(TRACKER_FILE_PATH, "r") as f:
-                lines = [line.strip().split(",")[0] for line in f if "," in line]
+            registry = await tracker_registry.load()
+            lines = [player.name for player in registry.players]
 
             if not lines:
                 await interaction.followup.send("📭 No tracked players.")
@@ -95,67 +89,93 @@ async def run_tracker(
 
     # ✅ Stop
     elif stop:
-        if tracker_task and not tracker_task.done():
-            tracker_task.cancel()
-            tracker_task = None
+        if await scheduler.unregister(TRACKER_JOB_KEY):
             await interaction.followup.send("🛑 Tracker loop stopped.")
         else:
             await interaction.followup.send("⚠️ No tracker is currently running.")
 
     # ✅ Find (with or without interval)
     elif find:
-        if tracker_task and not tracker_task.done():
+        if scheduler.is_active(TRACKER_JOB_KEY):
             await interaction.followup.send("⚠️ Tracker is already running. Use `/tracker stop` to stop it.")
             return
 
-        await interaction.followup.send("🔍 Starting tracker..." + (f" Every {interval}s." if interval else ""))
-
-        async def tracker_loop():
-            try:
-                while True:
-                    found_any = False
-                    async with aiofiles.open(TRACKER_FILE_PATH, "r") as f:
-                        lines = await f.readlines()
-
-                    for line in lines:
-                        line = line.strip()
-                        if not line or "," not in line:
-                            continue
-
-                        name, uuid = line.split(",", 1)
-                        url = f"https://api.wynncraft.com/v3/player/{uuid}?fullResult"
-                        data = await fetch_json(url)
-
-                        if not data or "characters" not in data:
-                            continue
-
-                        if data.get("username", "").lower() != name.lower():
-                            continue
-
-                        active_char = data.get("activeCharacter")
-                        char_data = data.get("characters", {}).get(active_char, {})
-
-                        if data.get("online") and "hunted" in char_data.get("gamemode", []):
-                            found_any = True
-                            level = char_data.get("level", 0)
-                            class_type = char_data.get("type", "Unknown")
-                            server = data.get("server", "Unknown")
+        if interval:
+            registry = await tracker_registry.load()
+            allowed, budget_note = check_admission("tracker", len(registry.players), interval, bool(adaptive))
+            if budget_note:
+                await interaction.followup.send(budget_note)
+            if not allowed:
+                return
 
-                            await interaction.followup.send(
-                                f"{interaction.user.mention} 🧭 `{name}` is online in `{server}` "
-                                f"on a Hunted **{class_type}**, level **{level}**!"
-                            )
+        await interaction.followup.send("🔍 Starting tracker..." + (f" Every {interval}s." if interval else "")
+                                        + (" Adaptive." if adaptive else ""))
 
-                    if not interval:
-                        if not found_any:
-                            await interaction.followup.send("⛔ No hunted players currently online.")
-                        break
+        # Poll players whose state has not changed in a while less often
+        poller = AdaptivePoller(interval) if adaptive else None
+        online_last_pass = set()
 
-                    await asyncio.sleep(interval)
+        async def tracker_pass():
+            try:
+                found_any = False
+                registry = await tracker_registry.load()
+
+                # One roster lookup tells us who is online; only they need a full profile
+                players = registry.players
+                count_items(len(players))
+                if await presence_index.refresh():
+                    players = [player for player in players if presence_index.is_online(player.uuid)]
+                    if poller is not None:
+                        online = {player.uuid for player in players}
+                        for uuid in online - online_last_pass:
+                            poller.wake(uuid)  # Just logged in: check right away
+                        online_last_pass.clear()
+                        online_last_pass.update(online)
+
+                for player in players:
+                    name, uuid = player.name, player.uuid
+                    if poller is not None and not poller.due(uuid):
+                        continue
+                    profile = await get_player_profile(uuid)
+
+                    if not profile:
+                        continue
+
+                    if (profile.username or "").lower() != name.lower():
+                        continue
+
+                    character = profile.active()
+                    if poller is not None:
+                        poller.observe(uuid, (profile.server, profile.active_character,
+                                              character.level if character else None), active=profile.online)
+
+                    if profile.online and character and "hunted" in character.gamemodes:
+                        found_any = True
+                        level = character.level
+                        class_type = character.type or "Unknown"
+                        server = profile.server or "Unknown"
+
+                        await notifier.send(
+                            interaction,
+                            f"{interaction.user.mention} 🧭 `{name}` is online in `{server}` "
+                            f"on a Hunted **{class_type}**, level **{level}**!"
+                        )
+
+                if not interval:
+                    if found_any:
+                        await notifier.flush(interaction)
+                    else:
+                        await interaction.followup.send("⛔ No hunted players currently online.")
 
-            except asyncio.CancelledError:
-                await interaction.followup.send("🛑 Tracker loop was cancelled.")
             except Exception as e:
-                await interaction.followup.send(f"⚠️ Error in tracker loop: {e}")
+                await notifier.send(interaction, f"⚠️ Error in tracker loop: {e}")
 
-        tracker_task = asyncio.create_task(tracker_loop())
+        async def on_stop():
+            await notifier.send(interaction, "🛑 Tracker loop was cancelled.", flush=True)
+
+        if interval:
+            scheduler.register(TRACKER_JOB_KEY, "tracker", interval, tracker_pass,
+                               description=f"Player tracker every {interval}s" + (" (adaptive)" if adaptive else ""),
+                               on_stop=on_stop)
+        else:
+            await tracker_pass()
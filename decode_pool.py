@@ -0,0 +1,179 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+import asyncio
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib decoder is used without it
+    orjson = None
+
+# Configuration
+# "thread", "process" or "off" (always decode on the event loop)
+DECODE_EXECUTOR = os.getenv("DECODE_EXECUTOR", "thread").lower()
+DECODE_WORKERS = int(os.getenv("DECODE_WORKERS", "4"))
+# Bodies at least this large are decoded off the loop
+DECODE_OFFLOAD_BYTES = int(os.getenv("DECODE_OFFLOAD_BYTES", "32768"))
+# ...as is everything while at least this many requests are in flight (full sweeps)
+DECODE_OFFLOAD_DEPTH = int(os.getenv("DECODE_OFFLOAD_DEPTH", "8"))
+# Bodies handed to a worker together, and how long (seconds) to wait to fill a batch
+DECODE_BATCH_SIZE = int(os.getenv("DECODE_BATCH_SIZE", "16"))
+DECODE_BATCH_WAIT = float(os.getenv("DECODE_BATCH_WAIT", "0.005"))
+
+Decoder = Optional[Callable[[Any], Any]]
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode a JSON body with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_body(body: bytes, decode: Decoder = None) -> Any:
+    """Decode a body and apply the caller's projection (if any)."""
+    data = decode_json(body)
+    return data if decode is None else decode(data)
+
+
+def _decode_batch(items: List[Tuple[bytes, Decoder]]) -> List[Tuple[bool, Any]]:
+    """Worker entry point: decode every body, returning (ok, result or exception) per item."""
+    results = []
+    for body, decode in items:
+        try:
+            results.append((True, decode_body(body, decode)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class DecodePool:
+    """
+    Decodes API responses on a worker pool when doing it on the event loop
+    would stall heartbeats and other commands.
+
+    Small bodies are decoded inline while the bot is quiet. Large bodies, and
+    every body while many requests are in flight, are queued and handed to
+    the executor in batches of up to `batch_size` to amortise the hand-off.
+    Decoders must be module-level functions or classmethods when a process
+    pool is used, so they can be pickled.
+    """
+
+    def __init__(self, mode: str = DECODE_EXECUTOR, workers: int = DECODE_WORKERS,
+                 offload_bytes: int = DECODE_OFFLOAD_BYTES, offload_depth: int = DECODE_OFFLOAD_DEPTH,
+                 batch_size: int = DECODE_BATCH_SIZE, batch_wait: float = DECODE_BATCH_WAIT):
+        self.mode = mode
+        self.workers = workers
+        self.offload_bytes = offload_bytes
+        self.offload_depth = offload_depth
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+
+        self._executor: Optional[Executor] = None
+        self._owns_executor = False
+        self._pending: List[Tuple[bytes, Decoder, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        self.inline = 0
+        self.offloaded = 0
+        self.batches = 0
+
+    def configure(self, executor: Optional[Executor] = None) -> None:
+        """
+        Use an existing executor for thread mode (e.g. the bot's shared thread pool)
+
+        Args:
+            executor: Executor to submit batches to; process mode always uses its own pool
+        """
+        if self.mode == "thread" and executor is not None:
+            self._executor = executor
+            self._owns_executor = False
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="decode")
+            self._owns_executor = True
+        return self._executor
+
+    def should_offload(self, size: int, depth: int) -> bool:
+        return self.mode in ("thread", "process") and (size >= self.offload_bytes or depth >= self.offload_depth)
+
+    async def decode(self, body: bytes, decode: Decoder = None, depth: int = 0) -> Any:
+        """
+        Decode a response body, off the loop if it is large or the bot is busy
+
+        Args:
+            body: Raw response body
+            decode: Projection applied to the parsed JSON
+            depth: Requests currently in flight (queue-depth signal)
+
+        Returns:
+            The decoded (and projected) value
+
+        Raises:
+            ValueError: If the body is not valid JSON
+        """
+        if not self.should_offload(len(body), depth):
+            self.inline += 1
+            return decode_body(body, decode)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((body, decode, future))
+        self.offloaded += 1
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self.batches += 1
+        loop = asyncio.get_running_loop()
+        work = loop.run_in_executor(self._get_executor(), _decode_batch, [(body, decode) for body, decode, _ in batch])
+        work.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[bytes, Decoder, asyncio.Future]], done: asyncio.Future) -> None:
+        if done.cancelled() or done.exception() is not None:
+            error = asyncio.CancelledError() if done.cancelled() else done.exception()
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, _, future), (ok, value) in zip(batch, done.result()):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+            "batches": self.batches,
+            "avg_batch": self.offloaded / self.batches if self.batches else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+
+# Shared decode pool used by fetch_json
+decode_pool = DecodePool()
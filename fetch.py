@@ -1,25 +1,434 @@
-# fetch.py
-from typing import Any
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
 import asyncio
+import os
+import random
+import time
 import aiohttp
+from rate_limiter import SlidingWindowRateLimiter, PRIORITIES
+from scheduler import current_job, current_tally
+from decode_pool import decode_pool, decode_json, orjson
+from metrics import metrics, endpoint_family, ENDPOINT_FAMILIES
+from circuit_breaker import CircuitBreaker
+from http_cache import http_cache
+
+# Base URL of the Wynncraft API (point it at benchmarks/mock_api.py to benchmark locally)
+API_BASE = os.getenv("WYNNCRAFT_API_BASE", "https://api.wynncraft.com").rstrip("/")
 
 RATE_LIMIT_CALLS = 95
 RATE_LIMIT_PERIOD = 60
 
+# Connection pool tuning (shared session)
+CONNECTIONS_PER_HOST = int(os.getenv("CONNECTIONS_PER_HOST", "20"))
+DNS_CACHE_TTL = int(os.getenv("DNS_CACHE_TTL", "300"))
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "60"))
+WARM_UP_CONNECTIONS = int(os.getenv("WARM_UP_CONNECTIONS", "0"))
+WARM_UP_URL = f"{API_BASE}/v3/leaderboards/types"
+
+# Retry policy for 429s, 5xx responses, timeouts and connection errors
+FETCH_MAX_ATTEMPTS = int(os.getenv("FETCH_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+# Seconds to back off after a 429 without a usable Retry-After header
+RETRY_AFTER_DEFAULT = 5.0
+
+# Seconds a queued request waits before it is served as if it were one priority class higher
+PRIORITY_AGING = float(os.getenv("PRIORITY_AGING", "10"))
+
 semaphore = asyncio.Semaphore(RATE_LIMIT_CALLS)
 
-async def fetch_json(url: str) -> dict[Any, Any] | None:
+# Calls-per-period budget shared by every fetch_json caller (the semaphore only caps concurrency)
+rate_limiter = SlidingWindowRateLimiter(RATE_LIMIT_CALLS, RATE_LIMIT_PERIOD, aging=PRIORITY_AGING)
+
+# Priority class of requests made in this context (None = derived from the caller, see request_class)
+request_priority: ContextVar[Optional[str]] = ContextVar("request_priority", default=None)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+# Requests currently on the wire, keyed by URL and decoder, so identical concurrent calls share one response
+_inflight: dict[tuple[str, Optional[Callable]], asyncio.Task] = {}
+coalesce_stats = {
+    "coalesced": 0,
+}
+
+# Connection reuse counters, filled in by the session's trace hooks
+connection_stats = {
+    "requests": 0,
+    "connections_created": 0,
+    "connections_reused": 0,
+    "dns_cache_hits": 0,
+    "dns_cache_misses": 0,
+}
+
+# One circuit per endpoint family, so a failing leaderboard does not block roster scans
+breakers = {family: CircuitBreaker(family) for family in ENDPOINT_FAMILIES}
+
+metrics.register_collector("rate_limiter", rate_limiter.stats)
+metrics.register_collector("connections", lambda: get_connection_stats())
+metrics.register_collector("coalesce", lambda: get_coalesce_stats())
+metrics.register_collector("decode", decode_pool.stats)
+metrics.register_collector("http_cache", http_cache.stats)
+for _family, _breaker in breakers.items():
+    metrics.register_collector(f"breaker_{_family}", _breaker.stats)
+
+
+async def _on_request_start(session, ctx, params) -> None:
+    connection_stats["requests"] += 1
+
+
+async def _on_connection_create_end(session, ctx, params) -> None:
+    connection_stats["connections_created"] += 1
+
+
+async def _on_connection_reuseconn(session, ctx, params) -> None:
+    connection_stats["connections_reused"] += 1
+
+
+async def _on_dns_cache_hit(session, ctx, params) -> None:
+    connection_stats["dns_cache_hits"] += 1
+
+
+async def _on_dns_cache_miss(session, ctx, params) -> None:
+    connection_stats["dns_cache_misses"] += 1
+
+
+def _build_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_dns_cache_hit.append(_on_dns_cache_hit)
+    trace_config.on_dns_cache_miss.append(_on_dns_cache_miss)
+    return trace_config
+
+
+async def start_session(warm_up: int = WARM_UP_CONNECTIONS) -> aiohttp.ClientSession:
+    """
+    Create the shared HTTP session used by every fetch_json call.
+
+    Safe to call more than once (on_ready fires again after reconnects);
+    an already open session is kept.
+
+    Args:
+        warm_up: Number of connections to open up-front (0 disables warm-up)
+
+    Returns:
+        The shared aiohttp session
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+
+    connector = aiohttp.TCPConnector(
+        limit=RATE_LIMIT_CALLS,
+        limit_per_host=CONNECTIONS_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    _session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=10),
+        trace_configs=[_build_trace_config()],
+    )
+
+    if warm_up > 0:
+        await warm_up_connections(warm_up)
+
+    return _session
+
+
+async def warm_up_connections(count: int) -> None:
+    """Open `count` keep-alive connections so the first commands skip the TLS handshake."""
+    session = await get_session()
+
+    async def _touch() -> None:
+        try:
+            async with session.get(WARM_UP_URL) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[WARN] Connection warm-up failed: {e}")
+
+    await asyncio.gather(*(_touch() for _ in range(count)))
+    print(f"[INFO] Warmed up {count} connection(s) to the API")
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared session, creating it lazily if the bot did not start it yet."""
+    if _session is None or _session.closed:
+        return await start_session(warm_up=0)
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session on shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def configure_rate_limit(calls: int, period: int) -> None:
+    """
+    Set the request budget for all API calls
+
+    Args:
+        calls: Maximum calls per period (keep below the API's RATE_LIMIT_CALLS)
+        period: Window length in seconds
+    """
+    calls = max(1, min(calls, RATE_LIMIT_CALLS))
+    # A shorter window would let the same calls through more often than the API allows
+    min_period = calls * RATE_LIMIT_PERIOD / RATE_LIMIT_CALLS
+    if period < min_period:
+        print(f"[WARN] {calls} calls / {period}s is above the API limit of "
+              f"{RATE_LIMIT_CALLS} / {RATE_LIMIT_PERIOD}s, using a {min_period:.0f}s window")
+        period = min_period
+    rate_limiter.configure(calls, period)
+    print(f"[INFO] API rate limit set to {rate_limiter.calls} calls / {rate_limiter.period:.0f}s")
+
+
+def get_connection_stats() -> dict[str, Any]:
+    """
+    Snapshot of the connection reuse counters
+
+    Returns:
+        Counters plus the share of requests that reused a pooled connection
+    """
+    stats = dict(connection_stats)
+    total = stats["connections_created"] + stats["connections_reused"]
+    stats["reuse_ratio"] = stats["connections_reused"] / total if total else 0.0
+    return stats
+
+
+def get_coalesce_stats() -> dict[str, int]:
+    """Number of fetch_json calls that piggybacked on an identical in-flight request."""
+    return {**coalesce_stats, "in_flight": len(_inflight)}
+
+
+def request_class() -> str:
+    """
+    Priority class for a request made from the current context
+
+    Commands doing bulk work (sweeps, syncs) set `request_priority` to "scan";
+    scheduled polling jobs are "background"; anything else answers a user
+    directly and is "interactive".
+    """
+    priority = request_priority.get()
+    if priority is not None:
+        return priority
+    return "background" if current_job.get() is not None else "interactive"
+
+
+def _forget_inflight(key: tuple[str, Optional[Callable]], task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Mark the exception as retrieved even if every waiter was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def fetch_json(url: str, decode: Optional[Callable[[Any], Any]] = None,
+                     priority: Optional[str] = None) -> Any:
+    """
+    Fetch and decode a JSON API response
+
+    Concurrent calls for the same URL are coalesced: only one request goes out
+    and every caller receives the same parsed result (or the same exception).
+
+    Args:
+        url: Full API URL
+        decode: Projection applied to the parsed body (e.g. PlayerProfile.from_json),
+            so callers keep a compact record instead of the full nested dicts
+        priority: Request class from rate_limiter.PRIORITIES (defaults to request_class())
+
+    Returns:
+        Parsed JSON, or {} if the request failed. With `decode`, its result,
+        or None if the request failed.
+    """
+    priority = priority or request_class()
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown request priority {priority!r}")
+
+    key = (url, decode)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_json(url, decode, priority))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget_inflight(key, done))
+    else:
+        coalesce_stats["coalesced"] += 1
+
+    # Shield so a cancelled caller does not cancel the request other callers are waiting on
+    return await asyncio.shield(task)
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """
+    Seconds to wait from a Retry-After header
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP-date
+
+    Returns:
+        Seconds to wait (RETRY_AFTER_DEFAULT if the header is missing or malformed)
+    """
+    if not value:
+        return RETRY_AFTER_DEFAULT
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return RETRY_AFTER_DEFAULT
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before the next attempt
+
+    Args:
+        attempt: Attempt that just failed (1-based)
+        retry_after: Server-provided Retry-After, if any
+
+    Returns:
+        Retry-After plus a little jitter, or full-jitter exponential backoff
+    """
+    if retry_after is not None:
+        # Spread out the callers that were all told the same Retry-After
+        return retry_after + random.uniform(0, RETRY_BASE_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+async def _attempt(url: str, priority: str, headers: Optional[dict[str, str]] = None) -> tuple[str, Any]:
+    """
+    Send one request, holding a concurrency slot only while it is on the wire
+
+    Args:
+        url: Request URL
+        priority: Request class, decides the place in the rate limiter's queue
+        headers: Extra request headers (conditional request validators)
+
+    Returns:
+        ("ok", (body, response headers)), ("not_modified", None),
+        ("retry", (reason, retry_after)) or ("fail", reason)
+    """
+    endpoint = metrics.endpoint(url)
+    # Queue for the budget first, by priority, so waiting never holds a concurrency slot
+    await rate_limiter.acquire(priority)
+    tally = current_tally.get()
+    if tally is not None:
+        tally.requests += 1  # Charged to the job tick or command that asked (see budget.py)
     async with semaphore:
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 429:
-                        retry_after = int(response.headers.get("Retry-After", 5))
-                        print(f"[429] Retrying after {retry_after}s...")
-                        await asyncio.sleep(retry_after)
-                        return await fetch_json(url)  # Retry
-                    response.raise_for_status()
-                    return await response.json()
-            except aiohttp.ClientError as e:
-                print(f"[ERROR] Fetch failed: {e}")
-                return {}
+        session = await get_session()
+        started = time.monotonic()
+        endpoint.in_flight += 1
+        try:
+            # aiohttp already asks for gzip/deflate (and br when brotli is installed) and inflates the body
+            async with session.get(url, headers=headers, timeout=10) as response:
+                rate_limiter.update_from_headers(response.headers)
+                if response.status == 429:
+                    endpoint.record_response(429, time.monotonic() - started)
+                    return "retry", ("429", parse_retry_after(response.headers.get("Retry-After")))
+                if response.status == 304:
+                    endpoint.record_response(304, time.monotonic() - started)
+                    return "not_modified", None
+                body = await response.read()
+                # Bytes as received on the wire, before decompression
+                wire_size = getattr(response.content, "total_raw_bytes", None) or response.content_length
+                endpoint.record_response(response.status, time.monotonic() - started, len(body), wire_size)
+                if response.status >= 500:
+                    return "retry", (f"HTTP {response.status}", None)
+                if response.status >= 400:
+                    return "fail", f"HTTP {response.status}"
+                return "ok", (body, response.headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            endpoint.record_error()  # No response at all (timeout, connection reset, DNS, ...)
+            return "retry", (str(e) or type(e).__name__, None)
+        finally:
+            endpoint.in_flight -= 1
+
+
+async def _fetch_json(url: str, decode: Optional[Callable[[Any], Any]], priority: str) -> Any:
+    family = endpoint_family(url)
+    endpoint = metrics.endpoints[family]
+    breaker = breakers[family]
+    failed = {} if decode is None else None
+    cacheable = http_cache.enabled_for(url)
+    if cacheable:
+        await http_cache.load()
+    # Headers of a fresh 200, None when the body came from the cache
+    headers = None
+
+    for attempt in range(1, FETCH_MAX_ATTEMPTS + 1):
+        if not breaker.allow():
+            endpoint.short_circuited += 1
+            return failed
+
+        outcome, detail = await _attempt(url, priority, http_cache.conditional_headers(url) if cacheable else None)
+        if outcome == "not_modified":
+            breaker.record_success()
+            value = http_cache.recall(url, decode)
+            if value is not None:
+                return value
+            body = await http_cache.load_body(url)
+            if body is not None:
+                break
+            # The stored body is gone: ask again without validators
+            http_cache.forget(url)
+            if not breaker.allow():
+                endpoint.short_circuited += 1
+                return failed
+            outcome, detail = await _attempt(url, priority)
+        if outcome == "ok":
+            breaker.record_success()
+            body, headers = detail
+            break
+        if outcome == "fail":
+            # The API answered (e.g. 404 for an unknown player): nothing to retry
+            breaker.record_success()
+            print(f"[ERROR] Fetch failed: {detail}, url={url}")
+            return failed
+
+        reason, retry_after = detail
+        if retry_after is not None:
+            # Throttled: slow the whole bot down through the shared limiter, not just this task
+            rate_limiter.pause(retry_after)
+            breaker.record_neutral()
+        else:
+            breaker.record_failure()
+            if breaker.state == "open":
+                print(f"[ERROR] Fetch failed ({reason}), {family} circuit is open, url={url}")
+                return failed
+
+        if attempt == FETCH_MAX_ATTEMPTS:
+            print(f"[ERROR] Fetch failed after {attempt} attempts ({reason}), url={url}")
+            return failed
+
+        delay = retry_delay(attempt, retry_after)
+        endpoint.retries += 1
+        print(f"[RETRY] {reason} on {family} request, retrying in {delay:.1f}s (attempt {attempt + 1}/{FETCH_MAX_ATTEMPTS})")
+        # No semaphore slot is held while waiting
+        await asyncio.sleep(delay)
+
+    try:
+        # Large bodies, and everything during busy sweeps, are decoded on the worker pool
+        value = await decode_pool.decode(body, decode, depth=len(_inflight))
+    except ValueError as e:
+        print(f"[ERROR] Invalid JSON from {url}: {e}")
+        return failed
+    except (AttributeError, KeyError, TypeError) as e:
+        # Valid JSON, but not shaped like the record `decode` expects
+        print(f"[ERROR] Unexpected payload from {url}: {type(e).__name__}: {e}")
+        return failed
+    if cacheable:
+        if headers is not None:
+            # Queued, not awaited: the disk write happens in the background
+            http_cache.store(url, headers, body, value)
+        http_cache.remember(url, decode, value)
+    return value
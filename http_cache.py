@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+
+from metrics import endpoint_family
+
+# Configuration
+# SQLite file holding cached response bodies and their validators (empty = disabled)
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "http_cache.db")
+# Endpoint families revalidated with If-None-Match / If-Modified-Since. Rosters change
+# on every poll, so storing them would only cost disk writes. Profiles are only kept
+# while the player is offline: an online profile changes with every poll as well.
+HTTP_CACHE_FAMILIES = tuple(
+    family.strip() for family in os.getenv("HTTP_CACHE_FAMILIES", "profile,character,leaderboard").split(",")
+    if family.strip())
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "5000"))
+# Total size of the stored bodies, least recently used are dropped beyond it
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(64 * 2 ** 20)))
+# Seconds new responses are collected before they are written to disk in one transaction
+HTTP_CACHE_FLUSH_DELAY = float(os.getenv("HTTP_CACHE_FLUSH_DELAY", "1"))
+# Decoded responses kept in memory so a 304 skips decoding as well as the download
+HTTP_CACHE_DECODED_ENTRIES = int(os.getenv("HTTP_CACHE_DECODED_ENTRIES", "512"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL
+);
+"""
+
+# (ETag, Last-Modified) of a stored response
+Validators = Tuple[Optional[str], Optional[str]]
+
+
+class HttpCache:
+    """
+    On-disk cache of API responses that carry an ETag or Last-Modified header.
+
+    Requests for a cached URL are sent conditionally; a 304 is answered from
+    the stored body (or, if it was decoded recently, from memory). Validators
+    live in memory, bodies only on disk. Writes are queued and flushed in the
+    background in batches, so storing a response never delays the request that
+    fetched it. Blocking sqlite calls run in a worker thread, serialised by a
+    lock like the tracker store.
+    """
+
+    def __init__(self, path: str = HTTP_CACHE_PATH, families: Tuple[str, ...] = HTTP_CACHE_FAMILIES,
+                 max_entries: int = HTTP_CACHE_MAX_ENTRIES, max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 decoded_entries: int = HTTP_CACHE_DECODED_ENTRIES, flush_delay: float = HTTP_CACHE_FLUSH_DELAY):
+        self.path = path
+        self.families = families
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.decoded_entries = decoded_entries
+        self.flush_delay = flush_delay
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+        # url -> (validators, body size), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Validators, int]]" = OrderedDict()
+        # (url, decode) -> (validators, decoded value)
+        self._decoded: "OrderedDict[Tuple[str, Optional[Callable]], Tuple[Validators, Any]]" = OrderedDict()
+        # url -> (validators, body) to write, or None to delete, until the next flush
+        self._pending: Dict[str, Optional[Tuple[Validators, bytes]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._bytes = 0
+        self.not_modified = 0
+        self.decode_skipped = 0
+        self.stored = 0
+        self.bytes_saved = 0
+
+    def enabled_for(self, url: str) -> bool:
+        return bool(self.path) and endpoint_family(url) in self.families
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn, *args) -> Any:
+        def call():
+            with self._lock:
+                return fn(self._connect(), *args)
+        return await asyncio.to_thread(call)
+
+    async def load(self) -> None:
+        """Read the stored validators into memory (only the first call does any work)."""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                rows = await self._run(lambda conn: conn.execute(
+                    "SELECT url, etag, last_modified, length(body) FROM responses ORDER BY rowid").fetchall())
+            except sqlite3.Error as e:
+                print(f"[WARN] HTTP cache {self.path} unavailable, requests will not be revalidated: {e}")
+                self.path = ""
+                rows = []
+            for url, etag, last_modified, size in rows:
+                self._entries[url] = ((etag, last_modified), size)
+                self._bytes += size
+            self._loaded = True
+            if rows:
+                print(f"[INFO] Loaded {len(rows)} cached API response(s) from {self.path}")
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for a cached URL (empty if there is nothing to revalidate)."""
+        entry = self._entries.get(url)
+        if entry is None:
+            return {}
+        etag, last_modified = entry[0]
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def store(self, url: str, headers: Any, body: bytes, value: Any) -> None:
+        """
+        Queue a 200 response for storage if it can be revalidated later
+
+        Args:
+            url: Request URL
+            headers: Response headers
+            body: Response body (decompressed)
+            value: The decoded response, to tell whether it is worth keeping
+        """
+        validators = (headers.get("ETag"), headers.get("Last-Modified"))
+        if validators == (None, None) or not worth_keeping(url, value):
+            self.forget(url)
+            return
+        # The old validators no longer match what will be on disk
+        self._drop(url)
+        self._pending[url] = (validators, body)
+        self._schedule_flush()
+
+    def forget(self, url: str) -> None:
+        if url not in self._entries and url not in self._pending:
+            return
+        self._drop(url)
+        self._pending[url] = None
+        self._schedule_flush()
+
+    def _drop(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+        for key in [key for key in self._decoded if key[0] == url]:
+            del self._decoded[key]
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        """Write the queued responses and deletions, then evict beyond the size limits."""
+        await asyncio.sleep(self.flush_delay)
+        while self._pending:
+            batch, self._pending = self._pending, {}
+            try:
+                await self._run(_write_batch, batch)
+            except sqlite3.Error as e:
+                print(f"[WARN] Could not write {len(batch)} cached response(s): {e}")
+                continue
+
+            for url, item in batch.items():
+                if item is None or url in self._pending:
+                    continue
+                # Only advertise the validators once the matching body is on disk
+                validators, body = item
+                self._entries[url] = (validators, len(body))
+                self._bytes += len(body)
+                self.stored += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self.forget(next(iter(self._entries)))
+
+    def _write_pending_now(self) -> None:
+        """Write whatever is still queued from the calling thread (shutdown)."""
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        try:
+            with self._lock:
+                _write_batch(self._connect(), batch)
+        except sqlite3.Error as e:
+            print(f"[WARN] Could not write {len(batch)} cached response(s): {e}")
+
+    def recall(self, url: str, decode: Optional[Callable]) -> Any:
+        """Decoded value of a 304'd URL if it is still in memory, else None."""
+        if url not in self._entries:
+            return None
+        validators, size = self._entries[url]
+        self._entries.move_to_end(url)
+        self.not_modified += 1
+        self.bytes_saved += size
+        entry = self._decoded.get((url, decode))
+        if entry is None or entry[0] != validators:
+            return None
+        self._decoded.move_to_end((url, decode))
+        self.decode_skipped += 1
+        return entry[1]
+
+    async def load_body(self, url: str) -> Optional[bytes]:
+        """Stored body of a 304'd URL (None if it vanished from disk)."""
+        try:
+            row = await self._run(lambda conn: conn.execute(
+                "SELECT body FROM responses WHERE url = ?", (url,)).fetchone())
+        except sqlite3.Error as e:
+            print(f"[WARN] Could not read cached response for {url}: {e}")
+            row = None
+        return row[0] if row is not None else None
+
+    def remember(self, url: str, decode: Optional[Callable], value: Any) -> None:
+        """Keep a decoded value for URLs that may be answered with a 304 next time."""
+        entry = self._entries.get(url)
+        if entry is None or value is None or not self.decoded_entries:
+            return
+        self._decoded[(url, decode)] = (entry[0], value)
+        self._decoded.move_to_end((url, decode))
+        while len(self._decoded) > self.decoded_entries:
+            self._decoded.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "pending_writes": len(self._pending),
+            "decoded_entries": len(self._decoded),
+            "not_modified": self.not_modified,
+            "decode_skipped": self.decode_skipped,
+            "stored": self.stored,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        if self.path:
+            self._write_pending_now()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def worth_keeping(url: str, value: Any) -> bool:
+    """Profiles are kept only while the player is offline; other cached families always."""
+    if endpoint_family(url) != "profile":
+        return True
+    online = value.get("online") if isinstance(value, dict) else getattr(value, "online", None)
+    return online is False
+
+
+def _write_batch(conn: sqlite3.Connection, batch: Dict[str, Optional[Tuple[Validators, bytes]]]) -> None:
+    with conn:
+        conn.executemany("DELETE FROM responses WHERE url = ?",
+                         [(url,) for url, item in batch.items() if item is None])
+        conn.executemany("INSERT OR REPLACE INTO responses (url, etag, last_modified, body) VALUES (?, ?, ?, ?)",
+                         [(url, *item[0], item[1]) for url, item in batch.items() if item is not None])
+
+
+# Shared HTTP cache used by fetch_json
+http_cache = HttpCache()
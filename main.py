@@ -9,22 +9,31 @@ from datetime import datetime
 from dotenv import load_dotenv
 from discord import Intents, Message, app_commands
 from discord.ext import commands
-from commands.scan_hunted import run_scan_hunted
 from concurrent.futures import ThreadPoolExecutor
 from ratelimit import limits, sleep_and_retry
 import importlib
 
+# Load environment variables first: the modules below read their configuration when imported
+load_dotenv()
+
 # Import separated command modules
 from commands.hello import run_hello
-from commands.scan_hunted import run_scan_hunted
+from commands.scan_hunted import run_scan_hunted, SCAN_CONCURRENCY
 from commands.tracker import  run_tracker
 from commands.detect_world import run_detect_world
 from commands.sync_leaderboard import run_sync_leaderboard
 from commands.active_trackers import run_active_trackers
 from commands.advanced_tracker import run_advanced_tracker
+from commands.stats import run_stats
+from commands.budget import run_budget
 from player_data import get_player_data, check_player_details, get_tracked_players, get_advanced_tracked_players
-from fetch import fetch_json
-from shared_state import tracker_task, detect_world_tasks
+from fetch import fetch_json, start_session, close_session, get_connection_stats, configure_rate_limit
+from shared_state import scheduler
+from decode_pool import decode_pool
+from http_cache import http_cache
+from metrics import start_exporter
+from tracker_registry import tracker_registry
+from tracker_store import tracker_store
 
 # Configuration
 TARGET_LEVEL = int(os.getenv("TARGET_LEVEL", "26"))
@@ -33,34 +42,44 @@ SERVER_REGIONS = os.getenv("SERVER_REGIONS", "EU,NA,AS").split(",")
 SERVERS_PER_REGION = int(os.getenv("SERVERS_PER_REGION", "20"))
 CALLS = int(os.getenv("CALLS", "80")) #Adjust this if needed
 PERIOD = int(os.getenv("PERIOD", "60"))
-TRACKER_FILE_PATH = "tracker.txt"
-ADVANCED_TRACKER_FILE_PATH = "advanced_tracker.txt"
-
 
-# Create tracker file if it doesn't exist
-if not os.path.exists(TRACKER_FILE_PATH) and not os.path.exists(ADVANCED_TRACKER_FILE_PATH):
-    open(TRACKER_FILE_PATH, "w").close()
-    open(ADVANCED_TRACKER_FILE_PATH, "w").close()
+configure_rate_limit(CALLS, PERIOD)
 
-# Load environment variables and set up the bot
-load_dotenv()
+# Set up the bot
 TOKEN: Final[str] = os.getenv('DISCORD_TOKEN')
 if not TOKEN:
     raise ValueError("No Discord token found in environment variables!")
 
 # Bot setup
+class HuntedBot(commands.Bot):
+    async def close(self) -> None:
+        # Release pooled API connections before the event loop goes away
+        await close_session()
+        decode_pool.shutdown()
+        http_cache.close()
+        tracker_store.close()
+        await super().close()
+
+
 intents: Intents = Intents.default()
 intents.message_content = True
-client = commands.Bot(command_prefix="e.gg", intents=intents)
+client = HuntedBot(command_prefix="e.gg", intents=intents)
 
 # Create a thread executor for running blocking code
 thread_executor = ThreadPoolExecutor(max_workers=5)  # Increased from 1 for better performance
 
+# Large API responses are decoded on this pool during sweeps (DECODE_EXECUTOR=thread)
+decode_pool.configure(thread_executor)
+
 
 # Handle bot startup
 @client.event
 async def on_ready() -> None:
     print(f'{client.user} is now running!')
+    await start_session()
+    await tracker_registry.load()
+    start_exporter()
+    print(f"HTTP session ready: {get_connection_stats()}")
     try:
         synced = await client.tree.sync()
         print(f"Synced {len(synced)} command(s)")
@@ -80,14 +99,16 @@ async def hello(interaction: discord.Interaction):
                      description="Scan Wynncraft servers for hunted players within a specific level range")
 @app_commands.describe(
     target_level="Target level to search for (default: 26)",
-    level_range="Level range around target (default: 10)"
+    level_range="Level range around target (default: 10)",
+    concurrency="How many requests the scan may have in flight at once (default: 20, 1 = one at a time)"
 )
 async def scan_hunted(
         interaction: discord.Interaction,
         target_level: int = TARGET_LEVEL,
-        level_range: int = LEVEL_RANGE):
+        level_range: int = LEVEL_RANGE,
+        concurrency: int = SCAN_CONCURRENCY):
     # Call the imported function, passing the thread_executor
-    await run_scan_hunted(interaction, target_level, level_range)
+    await run_scan_hunted(interaction, target_level, level_range, concurrency)
 
 
 # Update the tracker command to handle its own task
@@ -99,6 +120,7 @@ async def scan_hunted(
     find="Find if tracked players are online with hunted class",
     interval="How often (in seconds) to check for hunted players (only with 'find')",
     stop="Stop the currently running tracker scan",
+    adaptive="Check players that have not changed in a while less often (only with 'interval')",
 )
 async def tracker(
         interaction: discord.Interaction,
@@ -108,8 +130,9 @@ async def tracker(
         find: Optional[bool] = None,
         interval: Optional[int] = None,
         stop: Optional[bool] = None,
+        adaptive: Optional[bool] = None,
 ):
-    await run_tracker(interaction, add, remove, list_players, find, interval, stop)
+    await run_tracker(interaction, add, remove, list_players, find, interval, stop, adaptive)
 
 @client.tree.command(
     name="advance-tracking",
@@ -122,7 +145,10 @@ async def tracker(
     list_entries="List all tracked character entries",
     compare="Compare a player's progress 3minutes ago",
     interval="How often the command compare",
-    stop="Stop the currently running tracker scan"
+    stop="Stop the currently running tracker scan",
+    progress="Show levelling progress for a player name (or 'all' to rank everyone) from recorded history",
+    hours="Progress window in hours (default: 24)",
+    adaptive="Compare offline or idle characters less often (only with 'compare')"
 )
 async def track_character(
     interaction: discord.Interaction,
@@ -132,9 +158,13 @@ async def track_character(
     list_entries: Optional[bool] = None,
     compare: Optional[bool] = None,
     interval: Optional[int] = None,
-    stop: Optional[bool] = None
+    stop: Optional[bool] = None,
+    progress: Optional[str] = None,
+    hours: Optional[int] = None,
+    adaptive: Optional[bool] = None
 ):
-    await run_advanced_tracker(interaction,add,char_uuid,remove,list_entries,compare,interval,stop)
+    await run_advanced_tracker(interaction,add,char_uuid,remove,list_entries,compare,interval,stop,progress,hours,
+                               adaptive)
 
 
 @client.tree.command(
@@ -146,7 +176,8 @@ async def track_character(
     level="Your combat level (Default is 26)",
     level_range="Level range around target (default: 10)",
     interval="How often (in seconds) to scan the world (leave empty for a one-time scan)",
-    stop="Set to True to stop a running detect-world task for the specified world"
+    stop="Set to True to stop a running detect-world task for the specified world",
+    adaptive="Scan less often while the world's hunted players do not change (only with 'interval')"
 )
 async def detect_world(
         interaction: discord.Interaction,
@@ -155,8 +186,9 @@ async def detect_world(
         level_range: int = LEVEL_RANGE,
         interval: Optional[int] = None,
         stop: Optional[bool] = None,
+        adaptive: Optional[bool] = None,
 ):
-    await run_detect_world(interaction, world, level, level_range, interval, stop)
+    await run_detect_world(interaction, world, level, level_range, interval, stop, adaptive)
 
 
 @client.tree.command(
@@ -165,12 +197,14 @@ async def detect_world(
 )
 @app_commands.describe(
     level="Target level (Default is 26)",
-    hunted_range="Target level Range (Default is 10)"
+    hunted_range="Target level Range (Default is 10)",
+    boards="Comma-separated leaderboard types to sync together (Default is hichContent)"
 )
 async def sync_leaderboard(interaction: discord.Interaction,
                            level: Optional[int] = TARGET_LEVEL,
-                           hunted_range: Optional[int] = LEVEL_RANGE):
-    await run_sync_leaderboard(interaction, level, hunted_range)
+                           hunted_range: Optional[int] = LEVEL_RANGE,
+                           boards: Optional[str] = None):
+    await run_sync_leaderboard(interaction, level, hunted_range, boards)
 
 
 # Add a command to see all active world trackers and optionally stop them all
@@ -186,6 +220,30 @@ async def active_trackers(
     await run_active_trackers(interaction, stop_all)
 
 
+@client.tree.command(
+    name="stats",
+    description="Show API request metrics, cache hit ratios and queue statistics"
+)
+async def stats(interaction: discord.Interaction):
+    await run_stats(interaction)
+
+
+@client.tree.command(
+    name="budget",
+    description="Project API calls per minute of the running loops, optionally with a new one"
+)
+@app_commands.describe(
+    kind="Proposed workload: tracker, detect-world, compare or scan",
+    items="Players, worlds, characters or servers it covers (default: everything tracked / all servers)",
+    interval="Seconds between its runs"
+)
+async def budget(interaction: discord.Interaction,
+                 kind: Optional[str] = None,
+                 items: Optional[int] = None,
+                 interval: Optional[int] = None):
+    await run_budget(interaction, kind, items, interval)
+
+
 @client.tree.command(name="help", description="List all available commands")
 async def help_command(interaction: discord.Interaction):
     commands = [
@@ -194,7 +252,9 @@ async def help_command(interaction: discord.Interaction):
         "`/tracker` - Manage tracked players (add, remove, list, find, stop)",
         "`/detect-world` - Track hunted players in a specific world",
         "`/sync-leaderboard` - Sync with HICH leaderboard",
-        "`/active-trackers` - List or stop all active trackers"
+        "`/active-trackers` - List or stop all active trackers",
+        "`/stats` - Show API request metrics and cache statistics",
+        "`/budget` - Check whether the running (and a proposed) loop fit in the API rate limit"
     ]
 
     await interaction.response.send_message(
@@ -0,0 +1,213 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import os
+import re
+
+# Configuration
+# Prometheus text-format file written periodically (empty = disabled)
+METRICS_FILE = os.getenv("METRICS_FILE", "metrics.prom")
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "30"))
+
+# Request latency buckets (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ENDPOINT_FAMILIES = ("roster", "profile", "character", "leaderboard", "other")
+
+
+def endpoint_family(url: str) -> str:
+    """Group an API URL into the family its request budget is reported under."""
+    path = urlsplit(url).path
+    if path.startswith("/v3/leaderboards"):
+        return "leaderboard"
+    if path.rstrip("/") == "/v3/player":
+        return "roster"
+    if re.match(r"^/v3/player/[^/]+/characters", path):
+        return "character"
+    if path.startswith("/v3/player/"):
+        return "profile"
+    return "other"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None without observations)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result = []
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            result.append((f"{bound:g}", seen))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class EndpointMetrics:
+    """Counters for one endpoint family."""
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses: Dict[str, int] = {}
+        self.retries = 0
+        self.short_circuited = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.wire_bytes = 0
+        self.in_flight = 0
+        self.latency = Histogram()
+
+    def record_response(self, status: int, seconds: float, size: int = 0, wire_size: Optional[int] = None) -> None:
+        """
+        Count one answered request
+
+        Args:
+            status: HTTP status
+            seconds: Time until the body was read
+            size: Body bytes after decompression
+            wire_size: Body bytes as transferred (defaults to `size`)
+        """
+        self.requests += 1
+        key = str(status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        self.latency.observe(seconds)
+        self.bytes_received += size
+        self.wire_bytes += size if wire_size is None else wire_size
+
+    def compression_ratio(self) -> Optional[float]:
+        """Decompressed / transferred bytes (None before any body was received)."""
+        return self.bytes_received / self.wire_bytes if self.wire_bytes else None
+
+    def record_error(self) -> None:
+        self.requests += 1
+        self.errors += 1
+
+    def status_share(self, prefix: str) -> int:
+        return sum(count for status, count in self.statuses.items() if status.startswith(prefix))
+
+
+class Metrics:
+    """
+    Per-endpoint-family request metrics, plus named collectors that other
+    modules register to report their own counters (caches, queues, ...).
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointMetrics] = {family: EndpointMetrics() for family in ENDPOINT_FAMILIES}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def endpoint(self, url: str) -> EndpointMetrics:
+        return self.endpoints[endpoint_family(url)]
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """
+        Add a source of extra metrics
+
+        Args:
+            name: Metric prefix (e.g. "profile_cache")
+            collect: Returns a flat dict; numeric values are exported, the rest ignored
+        """
+        self._collectors[name] = collect
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        snapshot = {}
+        for name, collect in self._collectors.items():
+            try:
+                snapshot[name] = collect()
+            except Exception as e:
+                print(f"[WARN] Metrics collector {name} failed: {e}")
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """Everything in the Prometheus text exposition format."""
+        lines = [
+            "# HELP hunted_api_requests_total API requests by endpoint family and status",
+            "# TYPE hunted_api_requests_total counter",
+        ]
+        for family, m in self.endpoints.items():
+            for status, count in sorted(m.statuses.items()):
+                lines.append(f'hunted_api_requests_total{{endpoint="{family}",status="{status}"}} {count}')
+            if m.errors:
+                lines.append(f'hunted_api_requests_total{{endpoint="{family}",status="error"}} {m.errors}')
+
+        for name, attr, kind, help_text in (
+                ("hunted_api_retries_total", "retries", "counter", "Requests retried (429, 5xx, timeouts)"),
+                ("hunted_api_short_circuited_total", "short_circuited", "counter",
+                 "Requests failed fast by an open circuit breaker"),
+                ("hunted_api_bytes_received_total", "bytes_received", "counter", "Response body bytes (decompressed)"),
+                ("hunted_api_wire_bytes_total", "wire_bytes", "counter", "Response body bytes as transferred"),
+                ("hunted_api_in_flight", "in_flight", "gauge", "Requests currently on the wire")):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{endpoint="{family}"}} {getattr(m, attr)}' for family, m in self.endpoints.items()]
+
+        lines += ["# HELP hunted_api_request_seconds API request latency",
+                  "# TYPE hunted_api_request_seconds histogram"]
+        for family, m in self.endpoints.items():
+            for bound, count in m.latency.cumulative():
+                lines.append(f'hunted_api_request_seconds_bucket{{endpoint="{family}",le="{bound}"}} {count}')
+            lines.append(f'hunted_api_request_seconds_sum{{endpoint="{family}"}} {m.latency.sum:.6f}')
+            lines.append(f'hunted_api_request_seconds_count{{endpoint="{family}"}} {m.latency.count}')
+
+        for name, values in self.collect().items():
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"hunted_{name}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared metrics registry
+metrics = Metrics()
+
+
+def write_atomic(path: str, content: str) -> None:
+    # Write then rename so a scraper never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+_exporter: Optional[asyncio.Task] = None
+
+
+def start_exporter(path: str = METRICS_FILE, interval: float = METRICS_INTERVAL) -> None:
+    """Write the Prometheus file every `interval` seconds (no-op if disabled or already running)."""
+    global _exporter
+    if not path or (_exporter is not None and not _exporter.done()):
+        return
+
+    async def export() -> None:
+        while True:
+            try:
+                # Render on the loop (collectors read live state), write in a thread
+                await asyncio.to_thread(write_atomic, path, metrics.render_prometheus())
+            except OSError as e:
+                print(f"[WARN] Could not write metrics file {path}: {e}")
+            await asyncio.sleep(interval)
+
+    _exporter = asyncio.create_task(export())
+    print(f"[INFO] Writing Prometheus metrics to {path} every {interval:.0f}s")
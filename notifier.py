@@ -0,0 +1,240 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import discord
+
+from metrics import metrics
+
+# Discord message length limit
+MESSAGE_LIMIT = 2000
+# Seconds a notification may wait for more lines before its batch is sent
+FLUSH_DELAY = float(os.getenv("NOTIFY_FLUSH_DELAY", "2"))
+# Interaction tokens (followup.send / message edits) are only valid for 15 minutes
+INTERACTION_TOKEN_LIFETIME = 15 * 60
+# Switch to the channel webhook this many seconds before the token expires
+TOKEN_EXPIRY_MARGIN = int(os.getenv("NOTIFY_TOKEN_MARGIN", "60"))
+WEBHOOK_NAME = "Hunted Tracker"
+
+
+def pack_messages(lines: List[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    """
+    Pack lines into as few messages as possible, each at most `limit` characters
+
+    Args:
+        lines: Notification blocks (may themselves contain newlines)
+        limit: Maximum message length
+
+    Returns:
+        List of message contents, in order
+    """
+    # Keep multi-line blocks together where possible; break up the ones that cannot fit
+    pieces = []
+    for line in lines:
+        pieces.extend(line.split("\n") if len(line) > limit else [line])
+
+    messages = []
+    current = ""
+    for line in pieces:
+        # A single oversized line is split hard so it still fits
+        while len(line) > limit:
+            if current:
+                messages.append(current)
+                current = ""
+            messages.append(line[:limit])
+            line = line[limit:]
+
+        if not current:
+            current = line
+        elif len(current) + 1 + len(line) <= limit:
+            current += "\n" + line
+        else:
+            messages.append(current)
+            current = line
+
+    if current:
+        messages.append(current)
+    return messages
+
+
+def token_seconds_left(interaction: discord.Interaction) -> float:
+    """Seconds until this interaction's token can no longer send followups."""
+    created_at = interaction.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age = (datetime.now(timezone.utc) - created_at).total_seconds()
+    return INTERACTION_TOKEN_LIFETIME - age
+
+
+class ChannelOutbox:
+    """Pending notifications for one channel, sent as packed batches."""
+
+    def __init__(self, notifier: "Notifier", channel_id: int):
+        self.notifier = notifier
+        self.channel_id = channel_id
+        self.interaction: Optional[discord.Interaction] = None
+        self.pending: List[str] = []
+        self.pending_length = 0
+        self.webhook: Optional[discord.Webhook] = None
+        self.webhook_failed = False
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def add(self, interaction: discord.Interaction, content: str) -> None:
+        # Prefer whichever interaction in this channel has the most time left on its token
+        if self.interaction is None or token_seconds_left(interaction) > token_seconds_left(self.interaction):
+            self.interaction = interaction
+        self.pending.append(content)
+        self.pending_length += len(content) + 1
+        self.notifier.notifications += 1
+
+    @property
+    def full(self) -> bool:
+        return self.pending_length >= MESSAGE_LIMIT
+
+    def schedule_flush(self) -> None:
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.notifier.flush_delay)
+        # Lines queued while this batch is being sent start a new timer
+        self._timer = None
+        await self.flush()
+
+    async def flush(self, keep_partial: bool = False) -> None:
+        """
+        Send pending notifications
+
+        Args:
+            keep_partial: Only send full messages and leave the last, partly
+                filled one pending for more lines (size-triggered flushes)
+        """
+        async with self._lock:
+            if not self.pending:
+                return
+            lines, self.pending, self.pending_length = self.pending, [], 0
+            messages = pack_messages(lines)
+            if keep_partial and len(messages) > 1:
+                tail = messages.pop()
+                self.pending.insert(0, tail)
+                self.pending_length += len(tail) + 1
+            for content in messages:
+                await self._deliver(content)
+
+    async def _deliver(self, content: str) -> None:
+        interaction = self.interaction
+        try:
+            if token_seconds_left(interaction) > TOKEN_EXPIRY_MARGIN:
+                await interaction.followup.send(content)
+            else:
+                await self._send_via_channel(interaction, content)
+            self.notifier.messages_sent += 1
+        except discord.DiscordException as e:
+            # Forbidden, deleted channel, expired token, ...: log it rather than kill the flush
+            self.notifier.failed_messages += 1
+            print(f"[ERROR] Failed to deliver notification to channel {self.channel_id} "
+                  f"({len(content)} chars dropped): {type(e).__name__}: {e}")
+
+    async def _send_via_channel(self, interaction: discord.Interaction, content: str) -> None:
+        """Send without the interaction token: channel webhook if allowed, plain message otherwise."""
+        channel = interaction.channel
+        if channel is None and interaction.client is not None:
+            channel = interaction.client.get_channel(self.channel_id)
+        if channel is None:
+            raise discord.ClientException(f"channel {self.channel_id} is not cached")
+        thread = channel if isinstance(channel, discord.Thread) else None
+        parent = thread.parent if thread is not None else channel
+
+        if self.webhook is None and not self.webhook_failed:
+            try:
+                hooks = await parent.webhooks()
+                self.webhook = next((hook for hook in hooks if hook.name == WEBHOOK_NAME and hook.token), None)
+                if self.webhook is None:
+                    self.webhook = await parent.create_webhook(name=WEBHOOK_NAME)
+                print(f"[INFO] Interaction token expiring, switched channel {self.channel_id} to webhook delivery")
+            except (AttributeError, discord.HTTPException) as e:
+                # No Manage Webhooks permission (or not a text channel): post as the bot instead
+                print(f"[WARN] Webhook unavailable for channel {self.channel_id}, using channel.send: {e}")
+                self.webhook_failed = True
+
+        if self.webhook is not None:
+            try:
+                if thread is not None:
+                    await self.webhook.send(content, thread=thread)
+                else:
+                    await self.webhook.send(content)
+                self.notifier.webhook_messages += 1
+                return
+            except (discord.NotFound, discord.Forbidden) as e:
+                # Webhook deleted or permissions changed: post as the bot from now on
+                print(f"[WARN] Webhook for channel {self.channel_id} failed, using channel.send: {e}")
+                self.webhook = None
+                self.webhook_failed = True
+        await channel.send(content)
+
+
+class Notifier:
+    """
+    Output queue for scan and tracker notifications.
+
+    Lines sent to the same channel are collected and packed into as few
+    2000-character messages as possible. A batch goes out once it is full
+    or `flush_delay` seconds after its first line, so bursts from scans and
+    polling loops cost a handful of messages instead of one per line.
+    """
+
+    def __init__(self, flush_delay: float = FLUSH_DELAY):
+        self.flush_delay = flush_delay
+        self._outboxes: Dict[int, ChannelOutbox] = {}
+        self.notifications = 0
+        self.messages_sent = 0
+        self.webhook_messages = 0
+        self.failed_messages = 0
+
+    def _outbox(self, interaction: discord.Interaction) -> ChannelOutbox:
+        channel_id = interaction.channel_id
+        outbox = self._outboxes.get(channel_id)
+        if outbox is None:
+            outbox = self._outboxes[channel_id] = ChannelOutbox(self, channel_id)
+        return outbox
+
+    async def send(self, interaction: discord.Interaction, content: str, flush: bool = False) -> None:
+        """
+        Queue a notification for the interaction's channel
+
+        Args:
+            interaction: Interaction the notification belongs to
+            content: Message line(s)
+            flush: Send everything pending for this channel now (e.g. final summaries)
+        """
+        outbox = self._outbox(interaction)
+        outbox.add(interaction, content)
+        if flush or outbox.full:
+            await outbox.flush(keep_partial=not flush)
+        if outbox.pending:
+            outbox.schedule_flush()
+
+    async def flush(self, interaction: discord.Interaction) -> None:
+        """Send everything pending for the interaction's channel now."""
+        outbox = self._outboxes.get(interaction.channel_id)
+        if outbox is not None:
+            await outbox.flush()
+
+    async def flush_all(self) -> None:
+        for outbox in list(self._outboxes.values()):
+            await outbox.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "notifications": self.notifications,
+            "messages_sent": self.messages_sent,
+            "webhook_messages": self.webhook_messages,
+            "failed_messages": self.failed_messages,
+            "pending": sum(len(outbox.pending) for outbox in self._outboxes.values()),
+        }
+
+
+# Shared notification queue used by every command
+notifier = Notifier()
+metrics.register_collector("notifier", notifier.stats)
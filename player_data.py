@@ -1,13 +1,33 @@
 from typing import Tuple, List, Dict, Any, Optional, Union
-from fetch import fetch_json
+from fetch import API_BASE, fetch_json
+from cache import TTLCache, NegativeCache
+from tracker_registry import tracker_registry, TrackedPlayer, TrackedCharacter
+from scheduler import current_share_window
+from records import PlayerProfile, CharacterSummary, character_from_json
+from metrics import metrics
 import os
 
 # Configuration
-TRACKER_FILE_PATH = "tracker.txt"
-ADVANCED_TRACKER_FILE_PATH = "advanced_tracker.txt"
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "30"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "2000"))
+# How long profiles are kept for polling jobs that share data within their period
+PROFILE_CACHE_RETENTION = float(os.getenv("PROFILE_CACHE_RETENTION", "600"))
+# How long (seconds) each kind of hunted-query rejection is trusted
+NOT_HUNTED_TTL = float(os.getenv("NEGATIVE_CACHE_NOT_HUNTED_TTL", "1800"))
+OVER_LEVEL_TTL = float(os.getenv("NEGATIVE_CACHE_OVER_LEVEL_TTL", "21600"))
+UNDER_LEVEL_TTL = float(os.getenv("NEGATIVE_CACHE_UNDER_LEVEL_TTL", "600"))
 
+# Shared ?fullResult profile cache, keyed by lowercase UUID (usernames are aliases)
+profile_cache = TTLCache(ttl=PROFILE_CACHE_TTL, max_size=PROFILE_CACHE_SIZE, max_retention=PROFILE_CACHE_RETENTION)
 
-async def get_player_data(server_id: str) -> Dict[str, Any]:
+# Players that cannot match a hunted query, keyed by lowercase UUID
+negative_cache = NegativeCache()
+
+metrics.register_collector("profile_cache", profile_cache.stats)
+metrics.register_collector("negative_cache", lambda: negative_cache.stats())
+
+
+async def get_player_data(server_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetch player data for a specific server
 
@@ -15,46 +35,98 @@ async def get_player_data(server_id: str) -> Dict[str, Any]:
         server_id: The server ID to fetch data for
 
     Returns:
-        Dictionary containing server data
+        Dictionary containing server data, or None if the roster could not be fetched
+        (so a failed request is never mistaken for an empty world)
     """
     # Your original endpoint seems more appropriate
-    server_url = f"https://api.wynncraft.com/v3/player?identifier=uuid&server={server_id}"
-    return await fetch_json(server_url) or {"players": []}
+    server_url = f"{API_BASE}/v3/player?identifier=uuid&server={server_id}"
+    return await fetch_json(server_url) or None
 
 
-async def check_player_details(player_uuid: str, target_level: int, level_range: int) -> Union[
+async def get_player_profile(identifier: str, fresh: bool = False) -> Optional[PlayerProfile]:
+    """
+    Fetch a player's full profile (`/v3/player/{id}?fullResult`), served from the
+    shared cache when a recent enough copy exists
+
+    Inside a scheduled polling job, a profile fetched by any job earlier in
+    the same period is reused, so a player watched by several loops costs one
+    request per period.
+
+    Only the fields the trackers read are kept (see records.PlayerProfile).
+
+    Args:
+        identifier: Player UUID or username
+        fresh: Skip the cache and always hit the API (the result still refreshes the cache)
+
+    Returns:
+        PlayerProfile, or None if the player could not be fetched
+    """
+    key = identifier.lower()
+    if not fresh:
+        share_window = current_share_window()
+        max_age = max(PROFILE_CACHE_TTL, share_window) if share_window is not None else None
+        cached = profile_cache.get(key, max_age)
+        if cached is not None:
+            return cached
+
+    stats_url = f"{API_BASE}/v3/player/{identifier}?fullResult"
+    profile = await fetch_json(stats_url, PlayerProfile.from_json)
+    if profile is None:
+        return None
+
+    # A different active character invalidates any hunted-query rejection
+    negative_cache.observe_active_character(profile.uuid.lower(), profile.active_character)
+
+    # One entry per profile, keyed by UUID; the name it was asked for and the username reach it too
+    profile_cache.set(profile.uuid.lower(), profile,
+                      aliases=[key] + ([profile.username.lower()] if profile.username else []))
+    return profile
+
+
+async def check_player_details(player_uuid: str, target_level: int, level_range: int,
+                               server: Optional[str] = None) -> Union[
     Tuple[None, List[Any]], Tuple[str, List[Dict[str, Any]]]]:
     """
     Check if a player's active character is within the target level range and
     has "hunted" gamemode or completed "A Hunter's Calling".
 
+    Players recently rejected for a reason that still rules them out of this
+    query are skipped without a request (see negative_cache).
+
+    Args:
+        player_uuid: Player UUID
+        target_level: Target level to search for
+        level_range: Level range around target
+        server: World the player was seen on, if known (a world change drops cached rejections)
+
     Returns:
         (player_name, matches)
     """
-    stats_url = f"https://api.wynncraft.com/v3/player/{player_uuid}?fullResult"
-    player_data = await fetch_json(stats_url)
+    rejection = negative_cache.lookup(player_uuid.lower(), target_level, level_range, server)
+    if rejection is not None:
+        return rejection["name"], []
 
-    if not player_data or "characters" not in player_data:
+    profile = await get_player_profile(player_uuid)
+
+    if profile is None:
         return None, []
 
-    player_name = player_data.get("username", "Unknown")
-    active_character_id = player_data.get("activeCharacter")
+    player_name = profile.username or "Unknown"
+    active_character_id = profile.active_character
     matches = []
 
-    if not active_character_id or active_character_id not in player_data.get("characters", {}):
+    character = profile.active()
+    if character is None:
         return player_name, []
 
-    character = player_data["characters"][active_character_id]
-
-    level = character.get("level", 0)
-    gamemodes = character.get("gamemode", [])
-    deaths = character.get("deaths") or 0  # Safe fallback if deaths=None
-    quests = character.get("quests", [])
+    level = character.level
+    gamemodes = list(character.gamemodes)
+    deaths = character.deaths
 
     # Check conditions
     is_in_level_range = abs(level - target_level) <= level_range
     has_hunted_gamemode = "hunted" in gamemodes
-    has_hunters_calling = "A Hunter's Calling" in quests
+    has_hunters_calling = character.hunters_calling
 
     toggle_hunted = has_hunters_calling
 
@@ -69,91 +141,88 @@ async def check_player_details(player_uuid: str, target_level: int, level_range:
     if (has_hunted_gamemode or has_hunters_calling) and is_in_level_range:
         matches.append({
             "player_name": player_name,
-            "character_type": character.get("type", "Unknown"),
+            "character_type": character.type or "Unknown",
             "character_id": active_character_id,
             "level": level,
             "is_hich": is_hich,
             "gamemodes": gamemodes,
             "deaths": deaths,
-            "toggleHunted": toggle_hunted
+            "toggleHunted": toggle_hunted,
+            "profile": profile,  # Lets callers enrich the match without another request
         })
+        negative_cache.invalidate(player_uuid.lower())
+    else:
+        # Remember why this player was rejected and how long that stays true
+        if not (has_hunted_gamemode or has_hunters_calling):
+            reason, ttl = "not_hunted", NOT_HUNTED_TTL
+        elif level > target_level + level_range:
+            reason, ttl = "over_level", OVER_LEVEL_TTL
+        else:
+            reason, ttl = "under_level", UNDER_LEVEL_TTL
+        negative_cache.record(player_uuid.lower(), reason, ttl, player_name, level, active_character_id, server)
 
     return player_name, matches
 
 
-async def get_tracked_players() -> List[str]:
+async def get_tracked_players() -> List[TrackedPlayer]:
     """
-    Get list of tracked players from the tracker file
+    Get the players on the basic tracker
 
     Returns:
-        List of tracked player entries (format: "name,uuid")
+        List of TrackedPlayer records (name, uuid)
     """
-    try:
-        with open(TRACKER_FILE_PATH, "r") as f:
-            return [line.strip() for line in f if line.strip() and "," in line]
-    except FileNotFoundError:
-        return []
+    registry = await tracker_registry.load()
+    return registry.players
 
-async def get_advanced_tracked_players() -> List[str]:
-    try:
-        with open(ADVANCED_TRACKER_FILE_PATH, "r") as f:
-            return [line.strip() for line in f if line.strip() and "," in line]
-    except FileNotFoundError:
-        return []
+async def get_advanced_tracked_players() -> List[TrackedCharacter]:
+    """
+    Get the characters on the advanced tracker
 
+    Returns:
+        List of TrackedCharacter records
+    """
+    registry = await tracker_registry.load()
+    return registry.characters
 
-async def get_detail_character_data(playerName, character_uuid):
-    try:
-        # First try fetching via the player endpoint (which might be more stable)
-        player_url = f"https://api.wynncraft.com/v3/player/{playerName}"
-        player_data = await fetch_json(player_url)
-
-        # Check if we got player data
-        if player_data and "characters" in player_data:
-            # Try to find the specific character by UUID
-            characters = player_data.get("characters", {})
-            for char_id, char_data in characters.items():
-                if char_id == character_uuid:
-                    combat_level = int(char_data.get("level", 0)) + (char_data.get("xpPercent", 0) * 0.01)
-                    professions = char_data.get("professions", {})
-                    char_class = char_data.get("type", None)
-
-                    # Build profession string with level + xpPercent * 0.01
-                    prof_levels = []
-                    for prof, prof_data in professions.items():
-                        level = prof_data.get("level", 0)
-                        xp_percent = prof_data.get("xpPercent", 0)
-                        adjusted_level = level + (xp_percent * 0.01)
-                        prof_levels.append(f"{prof}:{adjusted_level:.2f}")
-
-                    prof_levels.sort()
-                    return combat_level, char_class, prof_levels
-
-        # If we couldn't find the character via player endpoint, try direct character endpoint
-        char_url = f"https://api.wynncraft.com/v3/player/{playerName}/characters/{character_uuid}"
-        data = await fetch_json(char_url)
-
-        if not data or "type" not in data:
-            print(f"❌ Character data not found for {playerName}, UUID: {character_uuid}")
-            return 0, "Unknown", []
 
-        combat_level = int(data.get("level", 0)) + (data.get("xpPercent", 0) * 0.01)
-        professions = data.get("professions", {})
-        char_class = data.get("type", None)
+async def get_character_snapshot(player: str, character_uuid: str,
+                                 profile: Optional[PlayerProfile] = None) -> Optional[CharacterSummary]:
+    """
+    Current state of one character, from as few requests as possible
+
+    A profile the caller already holds costs nothing; otherwise the shared
+    (cached) ?fullResult profile is used, which lists every character. The
+    character endpoint is only asked when the profile does not list it.
 
-        # Build profession string with level + xpPercent * 0.01
-        prof_levels = []
-        for prof, prof_data in professions.items():
-            level = prof_data.get("level", 0)
-            xp_percent = prof_data.get("xpPercent", 0)
-            adjusted_level = level + (xp_percent * 0.01)
-            prof_levels.append(f"{prof}:{adjusted_level:.2f}")
+    Args:
+        player: Player UUID or username
+        character_uuid: Character UUID
+        profile: Full profile of the player if the caller already fetched it
 
-        prof_levels.sort()
+    Returns:
+        CharacterSummary, or None if the character could not be found
+    """
+    if profile is None:
+        profile = await get_player_profile(player)
+    character = profile.characters.get(character_uuid) if profile else None
+    if character is None:
+        char_url = f"{API_BASE}/v3/player/{player}/characters/{character_uuid}"
+        character = await fetch_json(char_url, character_from_json)
+    return character
+
+
+async def get_detail_character_data(playerName, character_uuid, profile: Optional[PlayerProfile] = None):
+    try:
+        character = await get_character_snapshot(playerName, character_uuid, profile)
+
+        if character is None:
+            print(f"❌ Character data not found for {playerName}, UUID: {character_uuid}")
+            return 0, "Unknown", []
 
-        return combat_level, char_class, prof_levels
+        # Combat level and professions as level + xpPercent * 0.01
+        return character.combat_level, character.type, character.profession_levels()
 
     except Exception as e:
         print(f"Error fetching character data for {playerName}: {e}")
         # Return default values in case of error
-        return 0, "Unknown", []
\ No newline at end of file
+        return 0, "Unknown", []
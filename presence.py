@@ -0,0 +1,110 @@
+from typing import Dict, Optional
+import asyncio
+import os
+import time
+
+from fetch import API_BASE, fetch_json
+from player_data import get_player_data
+from scheduler import current_share_window
+
+# Configuration
+SERVER_REGIONS = os.getenv("SERVER_REGIONS", "EU,NA,AS").split(",")
+SERVERS_PER_REGION = int(os.getenv("SERVERS_PER_REGION", "20"))
+# How long a roster snapshot is trusted outside scheduled jobs
+PRESENCE_TTL = float(os.getenv("PRESENCE_TTL", "30"))
+
+ONLINE_PLAYERS_URL = f"{API_BASE}/v3/player?identifier=uuid"
+
+
+class PresenceIndex:
+    """
+    Who is online and where, built from the online-player rosters.
+
+    One refresh costs a single request for the global roster (or one request
+    per world when the global list is unavailable) and answers "is this
+    player online?" for every tracked player at once.
+    """
+
+    def __init__(self, ttl: float = PRESENCE_TTL):
+        self.ttl = ttl
+        self._worlds: Dict[str, str] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.refreshes = 0
+        self.fallbacks = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._refreshed_at is not None
+
+    def __len__(self) -> int:
+        return len(self._worlds)
+
+    def world_of(self, player_uuid: str) -> Optional[str]:
+        """World the player is on, or None if they were not in the last roster."""
+        return self._worlds.get(player_uuid.lower())
+
+    def is_online(self, player_uuid: str) -> bool:
+        return player_uuid.lower() in self._worlds
+
+    async def refresh(self) -> bool:
+        """
+        Refresh the index if it is older than the TTL (or the current job's period)
+
+        Returns:
+            True if the index holds a usable roster, False if every roster request failed
+        """
+        share_window = current_share_window()
+        max_age = max(self.ttl, share_window) if share_window is not None else self.ttl
+
+        async with self._lock:
+            if self._refreshed_at is not None and time.monotonic() - self._refreshed_at <= max_age:
+                return True
+
+            worlds = await self._fetch_global()
+            if worlds is None:
+                worlds = await self._fetch_per_world()
+            if worlds is None:
+                return self.ready
+
+            self._worlds = worlds
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+            return True
+
+    async def _fetch_global(self) -> Optional[Dict[str, str]]:
+        data = await fetch_json(ONLINE_PLAYERS_URL)
+        players = (data or {}).get("players")
+        # A failed request ({}) or an unexpected shape falls back; an empty roster is a real answer
+        if not isinstance(players, dict):
+            return None
+        return {player_uuid.lower(): world for player_uuid, world in players.items() if world}
+
+    async def _fetch_per_world(self) -> Optional[Dict[str, str]]:
+        self.fallbacks += 1
+        server_ids = [f"{region}{server_number}"
+                      for region in SERVER_REGIONS
+                      for server_number in range(1, SERVERS_PER_REGION + 1)]
+        rosters = await asyncio.gather(*(get_player_data(server_id) for server_id in server_ids))
+
+        if all(roster is None for roster in rosters):
+            return None
+
+        worlds: Dict[str, str] = {}
+        failed = set()
+        for server_id, roster in zip(server_ids, rosters):
+            if roster is None:
+                failed.add(server_id)
+                continue
+            for player_uuid in roster.get("players", []):
+                worlds[player_uuid.lower()] = server_id
+        if failed:
+            # Keep the last known players of worlds that failed rather than marking them offline
+            print(f"[WARN] Could not fetch {len(failed)} world roster(s), keeping their previous players")
+            for player_uuid, world in self._worlds.items():
+                if world in failed:
+                    worlds.setdefault(player_uuid, world)
+        return worlds
+
+# Shared presence index used by the trackers
+presence_index = PresenceIndex()
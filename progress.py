@@ -0,0 +1,152 @@
+from typing import Optional
+import asyncio
+import os
+import time
+import discord
+
+from notifier import token_seconds_left
+from scheduler import RequestTally, current_tally
+
+# Minimum seconds between two edits of the same status message
+PROGRESS_EDIT_INTERVAL = float(os.getenv("PROGRESS_EDIT_INTERVAL", "5"))
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """
+    Status message for a long-running command.
+
+    Callers update the progress as often as they like; the latest state is
+    kept in memory and the message is edited at most once per
+    `min_interval` seconds. `finish` always writes the final state.
+
+    The request rate counts only this command's requests: the tally of the
+    command run, or of each job tick that reported progress.
+    """
+
+    def __init__(self, interaction: discord.Interaction, title: str, total: Optional[int] = None,
+                 unit: str = "servers", min_interval: float = PROGRESS_EDIT_INTERVAL):
+        self.interaction = interaction
+        self.title = title
+        self.total = total
+        self.unit = unit
+        self.min_interval = min_interval
+
+        self.done = 0
+        self.checked = 0
+        self.detail = ""
+        self.message: Optional[discord.WebhookMessage] = None
+        self.started_at = time.monotonic()
+        # Requests of earlier job ticks, plus the tally of the tick or run in progress
+        self.requests_before = 0
+        self._tally: Optional[RequestTally] = None
+        self.edits = 0
+        self.updates = 0
+        self._last_edit = 0.0
+        self._rendered = ""
+        self._pending: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def _follow_tally(self) -> None:
+        tally = current_tally.get()
+        if tally is None or tally is self._tally:
+            return
+        if self._tally is not None:
+            self.requests_before += self._tally.requests
+        self._tally = tally
+
+    @property
+    def requests(self) -> int:
+        return self.requests_before + (self._tally.requests if self._tally is not None else 0)
+
+    def render(self) -> str:
+        elapsed = time.monotonic() - self.started_at
+        requests = self.requests
+        parts = []
+        if self.total:
+            parts.append(f"`{self.done}/{self.total}` {self.unit}")
+        else:
+            parts.append(f"`{self.done}` {self.unit}")
+        if self.checked:
+            parts.append(f"`{self.checked}` players checked")
+        if elapsed > 0:
+            parts.append(f"`{requests / elapsed:.1f}` req/s")
+        if self.total and 0 < self.done < self.total:
+            eta = elapsed / self.done * (self.total - self.done)
+            parts.append(f"ETA `{format_duration(eta)}`")
+
+        content = f"{self.title}: " + " · ".join(parts)
+        if self.detail:
+            content += f"\n{self.detail}"
+        return content
+
+    async def start(self) -> "ProgressReporter":
+        """Send the initial status message."""
+        self._follow_tally()
+        self._rendered = self.render()
+        self.message = await self.interaction.followup.send(self._rendered, wait=True)
+        self._last_edit = time.monotonic()
+        return self
+
+    def update(self, done: Optional[int] = None, checked: Optional[int] = None,
+               detail: Optional[str] = None, advance: int = 0, add_checked: int = 0) -> None:
+        """
+        Record new progress; the status message catches up within `min_interval`
+
+        Args:
+            done: Absolute number of finished units
+            checked: Absolute number of players checked
+            detail: Second status line (e.g. the last server scanned)
+            advance: Finished units to add to `done`
+            add_checked: Players to add to `checked`
+        """
+        if done is not None:
+            self.done = done
+        if checked is not None:
+            self.checked = checked
+        if detail is not None:
+            self.detail = detail
+        self.done += advance
+        self.checked += add_checked
+        self.updates += 1
+        self._follow_tally()
+
+        if self._closed or (self._pending is not None and not self._pending.done()):
+            return
+        delay = max(0.0, self._last_edit + self.min_interval - time.monotonic())
+        self._pending = asyncio.create_task(self._edit_after(delay))
+
+    async def _edit_after(self, delay: float) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+        await self._edit(self.render())
+
+    async def _edit(self, content: str) -> None:
+        if self.message is None or content == self._rendered:
+            return
+        # Followup messages can only be edited while the interaction token is valid
+        if token_seconds_left(self.interaction) <= 0:
+            return
+        self._last_edit = time.monotonic()
+        self._rendered = content
+        try:
+            await self.message.edit(content=content)
+            self.edits += 1
+        except discord.HTTPException as e:
+            print(f"[WARN] Progress edit failed: {e}")
+
+    async def finish(self, content: Optional[str] = None) -> None:
+        """Cancel any pending edit and write the final state (or `content`)."""
+        self._closed = True
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+        await self._edit(content or self.render())
+        print(f"[INFO] {self.title}: {self.updates} progress update(s), {self.edits} status edit(s)")
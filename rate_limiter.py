@@ -0,0 +1,193 @@
+from collections import deque
+from typing import Any, Dict, List, Mapping, Optional
+import asyncio
+import itertools
+import time
+
+# Request classes, most urgent first
+PRIORITIES = ("interactive", "scan", "background")
+
+
+class _Waiter:
+    __slots__ = ("rank", "priority", "queued_at", "seq", "future")
+
+    def __init__(self, priority: str, queued_at: float, seq: int, future: asyncio.Future):
+        self.rank = PRIORITIES.index(priority)
+        self.priority = priority
+        self.queued_at = queued_at
+        self.seq = seq
+        self.future = future
+
+
+class SlidingWindowRateLimiter:
+    """
+    Allows at most `calls` requests in any rolling `period` seconds.
+
+    The local window is the hard cap; the API's rate-limit headers are used to
+    tighten it further when the server reports fewer remaining calls than we
+    think we have (e.g. another process shares the same IP).
+
+    When callers have to queue, slots go to the most urgent priority class
+    first (see PRIORITIES). A waiter moves up one class for every `aging`
+    seconds it has waited, so background work is delayed but never starved.
+    """
+
+    def __init__(self, calls: int, period: float, aging: float = 10.0):
+        self.calls = calls
+        self.period = period
+        self.aging = aging
+        self._timestamps: deque[float] = deque()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._server_remaining: Optional[int] = None
+        self._server_reset_at = 0.0
+        self._paused_until = 0.0
+        self.total_acquired = 0
+        self.total_wait = 0.0
+        self.acquired: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self.wait_time: Dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+        self.max_wait: Dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+
+    def configure(self, calls: int, period: float) -> None:
+        """Change the budget at runtime (e.g. from the CALLS/PERIOD env vars)."""
+        self.calls = max(1, calls)
+        self.period = max(1.0, float(period))
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.period
+        while self._timestamps and self._timestamps[0] <= cutoff:
+            self._timestamps.popleft()
+
+    def _wait_time(self, now: float) -> float:
+        self._prune(now)
+
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if self._server_remaining is not None:
+            if now >= self._server_reset_at:
+                # Server window rolled over, fall back to the local window until the next response
+                self._server_remaining = None
+            elif self._server_remaining <= 0:
+                return self._server_reset_at - now
+
+        if len(self._timestamps) >= self.calls:
+            return self._timestamps[0] + self.period - now
+
+        return 0.0
+
+    def _grant(self, now: float, priority: str, queued_at: float) -> None:
+        self._timestamps.append(now)
+        if self._server_remaining is not None:
+            self._server_remaining -= 1
+        waited = now - queued_at
+        self.total_acquired += 1
+        self.total_wait += waited
+        self.acquired[priority] += 1
+        self.wait_time[priority] += waited
+        self.max_wait[priority] = max(self.max_wait[priority], waited)
+
+    async def acquire(self, priority: str = "interactive") -> None:
+        """
+        Wait until a request may be sent
+
+        Args:
+            priority: Request class from PRIORITIES; queued interactive requests
+                are served before scans, scans before background polling
+        """
+        now = time.monotonic()
+        if not self._waiters and self._wait_time(now) <= 0:
+            self._grant(now, priority, now)
+            return
+
+        waiter = _Waiter(priority, now, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def _next_waiter(self, now: float) -> _Waiter:
+        # Lower is more urgent; waiting `aging` seconds is worth one class
+        return min(self._waiters, key=lambda w: (w.rank - (now - w.queued_at) / self.aging, w.seq))
+
+    async def _dispatch(self) -> None:
+        """Hand out slots to queued callers as the window allows."""
+        while self._waiters:
+            now = time.monotonic()
+            wait = self._wait_time(now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            waiter = self._next_waiter(now)
+            self._waiters.remove(waiter)
+            if waiter.future.done():
+                continue  # Caller was cancelled
+            self._grant(now, waiter.priority, waiter.queued_at)
+            waiter.future.set_result(None)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Sync with the API's view of our budget
+
+        Args:
+            headers: Response headers (RateLimit-Remaining / RateLimit-Reset in seconds)
+        """
+        remaining = _parse_int(headers.get("RateLimit-Remaining"))
+        reset = _parse_int(headers.get("RateLimit-Reset"))
+        if remaining is None or reset is None:
+            return
+
+        now = time.monotonic()
+        self._server_remaining = remaining
+        self._server_reset_at = now + reset
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out slots for `seconds` (used after a 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def utilisation(self) -> float:
+        """
+        Share of the enforced budget used in the current window
+
+        The local window is measured against the configured `calls`; when the
+        API reports fewer remaining calls than that leaves, its count wins.
+        """
+        now = time.monotonic()
+        self._prune(now)
+        remaining = self.calls - len(self._timestamps)
+        if self._server_remaining is not None and now < self._server_reset_at:
+            remaining = min(remaining, self._server_remaining)
+        return min(1.0, max(0.0, 1 - remaining / self.calls))
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        self._prune(now)
+        stats = {
+            "calls": self.calls,
+            "period": self.period,
+            "used_in_window": len(self._timestamps),
+            "server_remaining": self._server_remaining,
+            "paused_for": max(0.0, self._paused_until - now),
+            "total_acquired": self.total_acquired,
+            "avg_wait": self.total_wait / self.total_acquired if self.total_acquired else 0.0,
+        }
+        for priority in PRIORITIES:
+            stats[f"{priority}_queued"] = sum(1 for w in self._waiters if w.priority == priority)
+            stats[f"{priority}_acquired"] = self.acquired[priority]
+            stats[f"{priority}_avg_wait"] = (self.wait_time[priority] / self.acquired[priority]
+                                             if self.acquired[priority] else 0.0)
+            stats[f"{priority}_max_wait"] = self.max_wait[priority]
+        return stats
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
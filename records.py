@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+HUNTERS_CALLING_QUEST = "A Hunter's Calling"
+
+
+def adjusted_level(data: Dict[str, Any]) -> float:
+    """Level plus progress towards the next one (level + xpPercent * 0.01)."""
+    return int(data.get("level") or 0) + (data.get("xpPercent") or 0) * 0.01
+
+
+class CharacterSummary:
+    """The fields of a character the trackers read, projected from the API payload."""
+    __slots__ = ("character_uuid", "type", "level", "xp_percent", "gamemodes", "deaths",
+                 "hunters_calling", "professions")
+
+    def __init__(self, character_uuid: Optional[str], type: Optional[str], level: int, xp_percent: float,
+                 gamemodes: Tuple[str, ...], deaths: int, hunters_calling: bool, professions: Dict[str, float]):
+        self.character_uuid = character_uuid
+        self.type = type
+        self.level = level
+        self.xp_percent = xp_percent
+        self.gamemodes = gamemodes
+        self.deaths = deaths
+        self.hunters_calling = hunters_calling
+        self.professions = professions
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], character_uuid: Optional[str] = None) -> "CharacterSummary":
+        """
+        Project a character object (from a profile's `characters` map or the character endpoint)
+
+        Args:
+            data: Decoded character JSON
+            character_uuid: Character UUID if the payload is keyed by it rather than containing it
+
+        Returns:
+            CharacterSummary
+        """
+        return cls(
+            character_uuid or data.get("uuid"),
+            data.get("type"),
+            int(data.get("level") or 0),
+            data.get("xpPercent") or 0,
+            tuple(data.get("gamemode") or ()),
+            data.get("deaths") or 0,  # Safe fallback if deaths=None
+            HUNTERS_CALLING_QUEST in (data.get("quests") or ()),
+            {prof: adjusted_level(prof_data) for prof, prof_data in (data.get("professions") or {}).items()},
+        )
+
+    @property
+    def combat_level(self) -> float:
+        return self.level + self.xp_percent * 0.01
+
+    def profession_levels(self) -> List[str]:
+        """Sorted "prof:x.xx" strings as stored by the advanced tracker."""
+        return sorted(f"{prof}:{level:.2f}" for prof, level in self.professions.items())
+
+
+class PlayerProfile:
+    """Compact `?fullResult` player profile."""
+    __slots__ = ("uuid", "username", "online", "server", "active_character", "characters")
+
+    def __init__(self, uuid: str, username: Optional[str], online: bool, server: Optional[str],
+                 active_character: Optional[str], characters: Dict[str, CharacterSummary]):
+        self.uuid = uuid
+        self.username = username
+        self.online = online
+        self.server = server
+        self.active_character = active_character
+        self.characters = characters
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> Optional["PlayerProfile"]:
+        """Project a decoded profile, or None if it is not a player profile."""
+        if not isinstance(data, dict) or "uuid" not in data:
+            return None
+        return cls(
+            data["uuid"],
+            data.get("username"),
+            bool(data.get("online")),
+            data.get("server"),
+            data.get("activeCharacter"),
+            {char_uuid: CharacterSummary.from_json(char_data, char_uuid)
+             for char_uuid, char_data in (data.get("characters") or {}).items()
+             if isinstance(char_data, dict)},
+        )
+
+    def active(self) -> Optional[CharacterSummary]:
+        """The active character, if the profile lists it."""
+        if not self.active_character:
+            return None
+        return self.characters.get(self.active_character)
+
+
+def character_from_json(data: Dict[str, Any]) -> Optional[CharacterSummary]:
+    """Decoder for the `/v3/player/{player}/characters/{uuid}` endpoint."""
+    if not isinstance(data, dict) or "type" not in data:
+        return None
+    return CharacterSummary.from_json(data)
@@ -0,0 +1,271 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import os
+import random
+import time
+
+# Each period is randomly stretched or shrunk by up to this fraction of the interval
+JITTER_FRACTION = float(os.getenv("SCHEDULER_JITTER", "0.1"))
+
+# Job whose tick is currently running in this task (None outside scheduled work)
+current_job: ContextVar[Optional["Job"]] = ContextVar("current_job", default=None)
+
+
+class RequestTally:
+    """API requests made on behalf of one job tick or command run, and how many items it covered."""
+    __slots__ = ("requests", "items")
+
+    def __init__(self):
+        self.requests = 0
+        self.items: Optional[int] = None
+
+
+# Tally of the job tick or command running in this context (fetch_json counts into it)
+current_tally: ContextVar[Optional[RequestTally]] = ContextVar("current_tally", default=None)
+
+
+def count_items(items: int) -> None:
+    """Record how many players / characters / worlds / servers the current tick or run covers."""
+    tally = current_tally.get()
+    if tally is not None:
+        tally.items = items
+
+
+class StopJob(Exception):
+    """Raised from a tick to end its job (e.g. the world no longer exists)."""
+
+
+class Job:
+    """A periodic polling job registered with the scheduler."""
+
+    def __init__(self, key: str, kind: str, interval: float, tick: Callable[[], Awaitable[Any]],
+                 description: str = "", on_stop: Optional[Callable[[], Awaitable[Any]]] = None):
+        self.key = key
+        self.kind = kind
+        self.interval = interval
+        self.tick = tick
+        self.description = description or key
+        self.on_stop = on_stop
+
+        self.created_at = time.monotonic()
+        self.next_run = self.created_at
+        self.last_started: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.runs = 0
+        self.errors = 0
+        self.requests = 0
+        self.last_requests: Optional[int] = None
+        self.items: Optional[int] = None
+        self.phase_set = False
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "key": self.key,
+            "kind": self.kind,
+            "description": self.description,
+            "interval": self.interval,
+            "runs": self.runs,
+            "errors": self.errors,
+            "running": self.running,
+            "next_run_in": max(0.0, self.next_run - now),
+            "last_duration": self.last_duration,
+            "requests_per_tick": self.requests / self.runs if self.runs else None,
+        }
+
+
+def current_share_window() -> Optional[float]:
+    """
+    How old data fetched by any job may be and still be reused by the job
+    running in this context, or None outside scheduled work.
+
+    Slightly shorter than the job's shortest jittered period, so a job always
+    refetches its own previous results but reuses what other jobs fetched
+    earlier in the same period.
+    """
+    job = current_job.get()
+    if job is None:
+        return None
+    return job.interval * (1 - JITTER_FRACTION) * 0.9
+
+
+class PollingScheduler:
+    """
+    Runs every background polling loop from one driver task.
+
+    Jobs run their first tick immediately; later ticks are phase-shifted into
+    the largest gap between other jobs' runs and jittered, so loops with the
+    same interval do not fire their requests at the same instant. A job never
+    overlaps with itself: a slow tick just delays that job's next run.
+    """
+
+    def __init__(self, jitter: float = JITTER_FRACTION):
+        self.jitter = jitter
+        self._jobs: Dict[str, Job] = {}
+        self._driver: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Per job kind (plus "scan"): runs, requests, items and seconds, for budget planning
+        self.kind_stats: Dict[str, Dict[str, float]] = {}
+
+    def get(self, key: str) -> Optional[Job]:
+        return self._jobs.get(key)
+
+    def is_active(self, key: str) -> bool:
+        return key in self._jobs
+
+    def jobs(self, kind: Optional[str] = None) -> List[Job]:
+        return [job for job in self._jobs.values() if kind is None or job.kind == kind]
+
+    def register(self, key: str, kind: str, interval: float, tick: Callable[[], Awaitable[Any]],
+                 description: str = "", on_stop: Optional[Callable[[], Awaitable[Any]]] = None) -> Job:
+        """
+        Add a periodic job
+
+        Args:
+            key: Unique job key (e.g. "detect-world:EU1")
+            kind: Job family used for reporting ("tracker", "detect-world", "compare")
+            interval: Seconds between ticks
+            tick: Coroutine function doing one pass of the job
+            description: Human readable label for /active-trackers
+            on_stop: Coroutine function called when the job is unregistered
+
+        Returns:
+            The registered job
+
+        Raises:
+            ValueError: If a job with this key is already registered
+        """
+        if key in self._jobs:
+            raise ValueError(f"Job {key} is already registered")
+
+        job = Job(key, kind, interval, tick, description, on_stop)
+        self._jobs[key] = job
+        self._ensure_driver()
+        self._wake()
+        return job
+
+    async def unregister(self, key: str) -> bool:
+        """Stop a job, cancelling a tick in progress. Returns False if no such job."""
+        job = self._jobs.pop(key, None)
+        if job is None:
+            return False
+
+        if job.running and job.task is not asyncio.current_task():
+            job.task.cancel()
+        self._wake()
+
+        if job.on_stop is not None:
+            try:
+                await job.on_stop()
+            except Exception as e:
+                print(f"[ERROR] on_stop for job {key} failed: {e}")
+        return True
+
+    def run_now(self, key: str) -> bool:
+        """Bring a job's next tick forward to now. Returns False if no such job."""
+        job = self._jobs.get(key)
+        if job is None:
+            return False
+        job.next_run = time.monotonic()
+        self._wake()
+        return True
+
+    def record_run(self, kind: str, tally: RequestTally, seconds: float) -> None:
+        """Add one measured tick (or command run) to the history of its kind."""
+        stats = self.kind_stats.setdefault(kind, {"runs": 0, "requests": 0, "items": 0, "seconds": 0.0})
+        stats["runs"] += 1
+        stats["requests"] += tally.requests
+        stats["seconds"] += seconds
+        stats["items"] += tally.items or 0
+
+    async def stop_all(self, kind: Optional[str] = None) -> int:
+        keys = [job.key for job in self.jobs(kind)]
+        for key in keys:
+            await self.unregister(key)
+        return len(keys)
+
+    def _ensure_driver(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.create_task(self._drive())
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _drive(self) -> None:
+        while self._jobs:
+            self._wakeup.clear()
+            now = time.monotonic()
+            for job in list(self._jobs.values()):
+                if not job.running and job.next_run <= now:
+                    job.task = asyncio.create_task(self._run_job(job))
+
+            pending = [job.next_run for job in self._jobs.values() if not job.running]
+            timeout = max(0.0, min(pending) - time.monotonic()) if pending else None
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job: Job) -> None:
+        current_job.set(job)
+        tally = RequestTally()
+        current_tally.set(tally)
+        started = time.monotonic()
+        job.last_started = started
+        try:
+            await job.tick()
+        except StopJob:
+            # Same path as a user stop, so on_stop can finish progress messages and say why
+            if self._jobs.get(job.key) is job:
+                await self.unregister(job.key)
+        except asyncio.CancelledError:
+            tally.items = None  # A cut-short tick says nothing about the cost of a full one
+            raise
+        except Exception as e:
+            job.errors += 1
+            print(f"[ERROR] Job {job.key} tick failed: {e}")
+        finally:
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            job.requests += tally.requests
+            job.last_requests = tally.requests
+            if tally.items is not None:
+                # Ticks that did no work (adaptive skips, cancellations) stay out of the kind history
+                job.items = tally.items
+                self.record_run(job.kind, tally, job.last_duration)
+            self._schedule_next(job)
+            self._wake()
+
+    def _schedule_next(self, job: Job) -> None:
+        base = job.last_started + job.interval
+        if not job.phase_set:
+            # First reschedule: move this job into the quietest part of the period
+            base += self._pick_phase(job, base)
+            job.phase_set = True
+        jitter = random.uniform(-self.jitter, self.jitter) * job.interval
+        job.next_run = max(time.monotonic(), base + jitter)
+
+    def _pick_phase(self, job: Job, base: float) -> float:
+        """Offset in [0, interval) that lands furthest from other jobs' upcoming runs."""
+        others = sorted(
+            (other.next_run - base) % job.interval
+            for other in self._jobs.values() if other is not job
+        )
+        if not others:
+            return 0.0
+
+        # Largest circular gap between the other jobs' phases; aim for its middle
+        gaps = [(others[(i + 1) % len(others)] - others[i]) % job.interval or job.interval
+                for i in range(len(others))]
+        widest = max(range(len(gaps)), key=gaps.__getitem__)
+        return (others[widest] + gaps[widest] / 2) % job.interval
@@ -1,6 +1,5 @@
-from typing import Optional
-import asyncio
+from scheduler import PollingScheduler
 
 # Shared variables
-tracker_task: Optional[asyncio.Task] = None
-detect_world_tasks: dict[str, asyncio.Task] = {}
\ No newline at end of file
+# Every background loop (/tracker find, /detect-world, /advance-tracking compare) is a job here
+scheduler = PollingScheduler()
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+import fetch
+from circuit_breaker import CircuitBreaker
+
+ROSTER_URL = f"{fetch.API_BASE}/v3/player"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("circuit_breaker.time.monotonic", clock)
+    return clock
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_closed_breaker_allows_requests(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    for _ in range(10):
+        assert breaker.allow()
+        breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failures_below_threshold_keep_it_closed(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_threshold_failures_open_it(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    open_breaker(breaker)
+    assert breaker.state == "open"
+    assert breaker.times_opened == 1
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_cooldown_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    open_breaker(breaker)
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_it(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_it(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 1
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_throttled_probe_releases_it(clock):
+    breaker = CircuitBreaker("test", threshold=3, cooldown=30)
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_neutral()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_fetch_recovers_after_throttled_probe(clock, monkeypatch):
+    breaker = CircuitBreaker("roster", threshold=3, cooldown=30)
+    monkeypatch.setitem(fetch.breakers, "roster", breaker)
+    monkeypatch.setattr(fetch, "retry_delay", lambda attempt, retry_after=None: 0)
+    monkeypatch.setattr(fetch.rate_limiter, "pause", lambda seconds: None)
+    open_breaker(breaker)
+    clock.now += 30
+
+    responses = [("retry", ("429", 5.0)), ("ok", (b'{"total": 1}', {}))]
+    calls = []
+
+    async def attempt(url, priority, headers=None):
+        calls.append(url)
+        return responses.pop(0)
+
+    monkeypatch.setattr(fetch, "_attempt", attempt)
+    assert asyncio.run(fetch._fetch_json(ROSTER_URL, None, "background")) == {"total": 1}
+    assert len(calls) == 2
+    assert breaker.state == "closed"
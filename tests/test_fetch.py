@@ -0,0 +1,34 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import fetch
+from records import PlayerProfile
+
+ROSTER_URL = f"{fetch.API_BASE}/v3/player"
+
+
+def test_retry_after_seconds():
+    assert fetch.parse_retry_after("7") == 7.0
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= fetch.parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+
+
+def test_retry_after_in_the_past():
+    assert fetch.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_retry_after_missing_or_malformed():
+    assert fetch.parse_retry_after(None) == fetch.RETRY_AFTER_DEFAULT
+    assert fetch.parse_retry_after("soon") == fetch.RETRY_AFTER_DEFAULT
+
+
+def test_unexpected_payload_is_a_failed_fetch(monkeypatch):
+    async def attempt(url, priority, headers=None):
+        return "ok", (b'["not", "a", "profile"]', {})
+
+    monkeypatch.setattr(fetch, "_attempt", attempt)
+    assert asyncio.run(fetch._fetch_json(ROSTER_URL, PlayerProfile.from_json, "background")) is None
@@ -0,0 +1,175 @@
+from typing import Dict, Iterable, List, Optional
+import asyncio
+
+from tracker_store import TrackerStore, CharacterRow, tracker_store
+
+
+class TrackedPlayer:
+    """Entry of the basic /tracker list."""
+    __slots__ = ("name", "uuid")
+
+    def __init__(self, name: str, uuid: str):
+        self.name = name
+        self.uuid = uuid
+
+
+class TrackedCharacter:
+    """Parsed /advance-tracking entry."""
+    __slots__ = ("name", "char_class", "player_uuid", "char_uuid", "combat_level", "professions")
+
+    def __init__(self, name: str, char_class: Optional[str], player_uuid: Optional[str], char_uuid: str,
+                 combat_level: float, professions: Dict[str, float]):
+        self.name = name
+        self.char_class = char_class
+        self.player_uuid = player_uuid
+        self.char_uuid = char_uuid
+        self.combat_level = combat_level
+        self.professions = professions
+
+    @classmethod
+    def from_row(cls, row: CharacterRow) -> "TrackedCharacter":
+        name, char_class, player_uuid, char_uuid, combat, professions = row
+        levels = {}
+        for item in professions.split(","):
+            if ":" in item:
+                prof, value = item.split(":", 1)
+                try:
+                    levels[prof] = float(value)
+                except ValueError:
+                    continue
+        return cls(name, char_class, player_uuid, char_uuid, float(combat), levels)
+
+    def professions_string(self) -> str:
+        return ",".join(f"{prof}:{level:.2f}" for prof, level in sorted(self.professions.items()))
+
+    def to_row(self) -> CharacterRow:
+        return (self.name, self.char_class, self.player_uuid, self.char_uuid, self.combat_level,
+                self.professions_string())
+
+
+class TrackerRegistry:
+    """
+    In-memory view of everything the trackers watch, loaded once from the
+    tracker store. Lookups are O(1) and case-insensitive; every change is
+    written through to the store.
+    """
+
+    def __init__(self, store: TrackerStore):
+        self.store = store
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+        self._players: Dict[str, TrackedPlayer] = {}
+        self._players_by_uuid: Dict[str, TrackedPlayer] = {}
+
+        # Every index is keyed by lower-cased name or UUID
+        self._characters: Dict[str, TrackedCharacter] = {}
+        self._characters_by_name: Dict[str, Dict[str, TrackedCharacter]] = {}
+        self._characters_by_player_uuid: Dict[str, Dict[str, TrackedCharacter]] = {}
+
+    async def load(self) -> "TrackerRegistry":
+        """Load the store into memory (only the first call does any work)."""
+        if self._loaded:
+            return self
+        async with self._load_lock:
+            if not self._loaded:
+                for name, uuid in await self.store.list_players():
+                    self._index_player(TrackedPlayer(name, uuid))
+                for row in await self.store.list_characters():
+                    self._index_character(TrackedCharacter.from_row(row))
+                self._loaded = True
+        return self
+
+    # Basic tracker
+
+    def _index_player(self, player: TrackedPlayer) -> None:
+        self._players[player.name.lower()] = player
+        self._players_by_uuid[player.uuid.lower()] = player
+
+    @property
+    def players(self) -> List[TrackedPlayer]:
+        return list(self._players.values())
+
+    def get_player(self, name: str) -> Optional[TrackedPlayer]:
+        return self._players.get(name.lower())
+
+    def get_player_by_uuid(self, uuid: str) -> Optional[TrackedPlayer]:
+        return self._players_by_uuid.get(uuid.lower())
+
+    async def add_player(self, name: str, uuid: str) -> bool:
+        """Returns False if the player is already tracked."""
+        await self.load()
+        if name.lower() in self._players:
+            return False
+        self._index_player(TrackedPlayer(name, uuid))
+        await self.store.add_player(name, uuid)
+        return True
+
+    async def remove_player(self, name: str) -> bool:
+        await self.load()
+        player = self._players.pop(name.lower(), None)
+        if player is None:
+            return False
+        self._players_by_uuid.pop(player.uuid.lower(), None)
+        await self.store.remove_player(name)
+        return True
+
+    # Advanced tracker
+
+    def _index_character(self, character: TrackedCharacter) -> None:
+        key = character.char_uuid.lower()
+        self._unindex_character(key)
+        self._characters[key] = character
+        self._characters_by_name.setdefault(character.name.lower(), {})[key] = character
+        if character.player_uuid:
+            self._characters_by_player_uuid.setdefault(character.player_uuid.lower(), {})[key] = character
+
+    def _unindex_character(self, char_uuid: str) -> Optional[TrackedCharacter]:
+        char_uuid = char_uuid.lower()
+        character = self._characters.pop(char_uuid, None)
+        if character is None:
+            return None
+        for index, key in ((self._characters_by_name, character.name.lower()),
+                           (self._characters_by_player_uuid, (character.player_uuid or "").lower())):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(char_uuid, None)
+                if not bucket:
+                    del index[key]
+        return character
+
+    @property
+    def characters(self) -> List[TrackedCharacter]:
+        return list(self._characters.values())
+
+    def get_character(self, char_uuid: str) -> Optional[TrackedCharacter]:
+        return self._characters.get(char_uuid.lower())
+
+    def characters_for_name(self, name: str) -> List[TrackedCharacter]:
+        return list(self._characters_by_name.get(name.lower(), {}).values())
+
+    def characters_for_player_uuid(self, uuid: str) -> List[TrackedCharacter]:
+        return list(self._characters_by_player_uuid.get(uuid.lower(), {}).values())
+
+    def is_character_tracked(self, name: Optional[str] = None, player_uuid: Optional[str] = None) -> bool:
+        """True if any character of this player (by name or UUID) is advance-tracked."""
+        return bool((name and name.lower() in self._characters_by_name)
+                    or (player_uuid and player_uuid.lower() in self._characters_by_player_uuid))
+
+    async def upsert_characters(self, characters: Iterable[TrackedCharacter]) -> int:
+        """Add or update characters in memory and write them through in one transaction."""
+        await self.load()
+        characters = list(characters)
+        for character in characters:
+            self._index_character(character)
+        return await self.store.upsert_characters(character.to_row() for character in characters)
+
+    async def remove_characters(self, name: str) -> int:
+        await self.load()
+        for character in self.characters_for_name(name):
+            self._unindex_character(character.char_uuid)
+        return await self.store.remove_characters(name)
+
+
+# Shared registry used by every command
+tracker_registry = TrackerRegistry(tracker_store)
@@ -0,0 +1,335 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+
+# Configuration
+TRACKER_DB_PATH = os.getenv("TRACKER_DB_PATH", "tracker.db")
+TRACKER_FILE_PATH = "tracker.txt"
+ADVANCED_TRACKER_FILE_PATH = "advanced_tracker.txt"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracked_players (
+    name_lower TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    uuid TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tracked_players_uuid ON tracked_players (uuid);
+
+CREATE TABLE IF NOT EXISTS advanced_tracked (
+    char_uuid TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    char_class TEXT,
+    player_uuid TEXT,
+    combat REAL NOT NULL DEFAULT 0,
+    professions TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_advanced_tracked_name ON advanced_tracked (name_lower);
+CREATE INDEX IF NOT EXISTS idx_advanced_tracked_player_uuid ON advanced_tracked (player_uuid);
+
+-- Append-only level history: one row per skill ("combat" or a profession) per observation
+CREATE TABLE IF NOT EXISTS progress_history (
+    char_uuid TEXT NOT NULL,
+    skill TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    level REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_progress_history_char_skill_time
+    ON progress_history (char_uuid, skill, observed_at);
+CREATE INDEX IF NOT EXISTS idx_progress_history_time ON progress_history (observed_at);
+
+-- Last synced state of each leaderboard, so a re-sync only processes what changed
+CREATE TABLE IF NOT EXISTS leaderboard_snapshot (
+    board TEXT NOT NULL,
+    char_uuid TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    deaths INTEGER NOT NULL,
+    PRIMARY KEY (board, char_uuid)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# (name, char_class, player_uuid, char_uuid, combat, professions) where professions is "fishing:1.00,mining:2.50"
+CharacterRow = Tuple[str, Optional[str], Optional[str], str, float, str]
+
+# (rank, level, deaths) of a leaderboard entry, keyed by character UUID
+LeaderboardEntry = Tuple[int, int, int]
+
+# (char_uuid, skill, start_level, end_level, start_at, end_at)
+ProgressRow = Tuple[str, str, float, float, float, float]
+
+# Level of each skill at the start and end of a time window. The start level is the
+# last observation before the window if there is one, else the first one inside it.
+PROGRESS_QUERY = """
+WITH window AS (
+    SELECT char_uuid, skill, MIN(observed_at) AS first_at, MAX(observed_at) AS last_at
+    FROM progress_history
+    WHERE observed_at >= :since {char_filter}
+    GROUP BY char_uuid, skill
+),
+baseline AS (
+    SELECT w.char_uuid, w.skill, w.first_at, w.last_at,
+           (SELECT b.level FROM progress_history b
+            WHERE b.char_uuid = w.char_uuid AND b.skill = w.skill AND b.observed_at < :since
+            ORDER BY b.observed_at DESC LIMIT 1) AS base_level
+    FROM window w
+)
+SELECT b.char_uuid, b.skill,
+       COALESCE(b.base_level,
+                (SELECT f.level FROM progress_history f
+                 WHERE f.char_uuid = b.char_uuid AND f.skill = b.skill AND f.observed_at = b.first_at LIMIT 1)),
+       (SELECT l.level FROM progress_history l
+        WHERE l.char_uuid = b.char_uuid AND l.skill = b.skill AND l.observed_at = b.last_at LIMIT 1),
+       CASE WHEN b.base_level IS NULL THEN b.first_at ELSE :since END,
+       b.last_at
+FROM baseline b
+"""
+
+
+def parse_advanced_line(line: str) -> Optional[CharacterRow]:
+    """
+    Parse a legacy advanced tracker line
+    (`name,class,player_uuid,char_uuid,combat:x,prof:y,...`)
+
+    Returns:
+        CharacterRow, or None if the line is malformed
+    """
+    parts = line.strip().split(",")
+    if len(parts) < 5 or not parts[4].startswith("combat:"):
+        return None
+    try:
+        combat = float(parts[4].split(":", 1)[1])
+    except ValueError:
+        combat = 0.0
+    professions = ",".join(part for part in parts[5:] if ":" in part)
+    return parts[0], parts[1], parts[2], parts[3], combat, professions
+
+
+class TrackerStore:
+    """
+    SQLite (WAL) storage for the basic and advanced trackers.
+
+    Blocking sqlite calls run in a worker thread; a lock serialises them so
+    concurrent writers from different commands never interleave.
+    """
+
+    def __init__(self, path: str = TRACKER_DB_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._import_legacy_files(conn)
+        return self._conn
+
+    def _import_legacy_files(self, conn: sqlite3.Connection) -> None:
+        """One-time import of tracker.txt / advanced_tracker.txt."""
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            return
+
+        players = []
+        characters = []
+        for path in (TRACKER_FILE_PATH, ADVANCED_TRACKER_FILE_PATH):
+            try:
+                with open(path, "r") as f:
+                    lines = [line.strip() for line in f if line.strip() and "," in line]
+            except FileNotFoundError:
+                continue
+
+            for line in lines:
+                # Some commands appended advanced-format lines to tracker.txt; route them by shape
+                row = parse_advanced_line(line)
+                if row is not None:
+                    characters.append(row)
+                elif path == TRACKER_FILE_PATH:
+                    name, uuid = line.split(",", 1)
+                    players.append((name.lower(), name, uuid.split(",")[0]))
+
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tracked_players (name_lower, name, uuid) VALUES (?, ?, ?)", players)
+            self._upsert_characters(conn, characters)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', '1')")
+
+        if players or characters:
+            print(f"[INFO] Imported {len(players)} tracked player(s) and {len(characters)} "
+                  f"tracked character(s) into {self.path}")
+
+    async def _run(self, fn, *args) -> Any:
+        def call():
+            with self._lock:
+                return fn(self._connect(), *args)
+        return await asyncio.to_thread(call)
+
+    # Basic tracker
+
+    async def add_player(self, name: str, uuid: str) -> bool:
+        """Returns False if the player is already tracked."""
+        def op(conn: sqlite3.Connection) -> bool:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO tracked_players (name_lower, name, uuid) VALUES (?, ?, ?)",
+                    (name.lower(), name, uuid))
+            return cursor.rowcount > 0
+        return await self._run(op)
+
+    async def remove_player(self, name: str) -> bool:
+        def op(conn: sqlite3.Connection) -> bool:
+            with conn:
+                cursor = conn.execute("DELETE FROM tracked_players WHERE name_lower = ?", (name.lower(),))
+            return cursor.rowcount > 0
+        return await self._run(op)
+
+    async def list_players(self) -> List[Tuple[str, str]]:
+        """Returns [(name, uuid), ...] in insertion order."""
+        return await self._run(
+            lambda conn: conn.execute("SELECT name, uuid FROM tracked_players ORDER BY rowid").fetchall())
+
+    # Advanced tracker
+
+    @staticmethod
+    def _upsert_characters(conn: sqlite3.Connection, rows: Iterable[CharacterRow]) -> int:
+        cursor = conn.executemany(
+            """
+            INSERT INTO advanced_tracked (name, name_lower, char_class, player_uuid, char_uuid, combat, professions)
+            VALUES (?, lower(?), ?, ?, ?, ?, ?)
+            ON CONFLICT (char_uuid) DO UPDATE SET
+                name = excluded.name,
+                name_lower = excluded.name_lower,
+                char_class = excluded.char_class,
+                player_uuid = excluded.player_uuid,
+                combat = excluded.combat,
+                professions = excluded.professions
+            """,
+            [(name, name, char_class, player_uuid, char_uuid, combat, professions)
+             for name, char_class, player_uuid, char_uuid, combat, professions in rows])
+        return cursor.rowcount
+
+    async def upsert_characters(self, rows: Iterable[CharacterRow]) -> int:
+        """Insert or update tracked characters (keyed by character UUID) in one transaction."""
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        def op(conn: sqlite3.Connection) -> int:
+            with conn:
+                return self._upsert_characters(conn, rows)
+        return await self._run(op)
+
+    async def remove_characters(self, name: str) -> int:
+        def op(conn: sqlite3.Connection) -> int:
+            with conn:
+                return conn.execute("DELETE FROM advanced_tracked WHERE name_lower = ?", (name.lower(),)).rowcount
+        return await self._run(op)
+
+    async def list_characters(self) -> List[CharacterRow]:
+        return await self._run(lambda conn: conn.execute(
+            "SELECT name, char_class, player_uuid, char_uuid, combat, professions "
+            "FROM advanced_tracked ORDER BY rowid").fetchall())
+
+    # Progress history
+
+    async def append_progress(self, snapshots: Iterable[Tuple[str, float, Dict[str, float]]]) -> int:
+        """
+        Append observed levels to the history
+
+        Args:
+            snapshots: (char_uuid, observed_at, {skill: level}) tuples, "combat" included as a skill
+
+        Returns:
+            Number of rows written
+        """
+        rows = [(char_uuid, skill, observed_at, level)
+                for char_uuid, observed_at, levels in snapshots
+                for skill, level in levels.items()]
+        if not rows:
+            return 0
+
+        def op(conn: sqlite3.Connection) -> int:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO progress_history (char_uuid, skill, observed_at, level) VALUES (?, ?, ?, ?)", rows)
+            return len(rows)
+        return await self._run(op)
+
+    async def has_progress(self, char_uuid: str) -> bool:
+        return await self._run(lambda conn: conn.execute(
+            "SELECT 1 FROM progress_history WHERE char_uuid = ? LIMIT 1", (char_uuid,)).fetchone() is not None)
+
+    async def progress_since(self, since: float, char_uuids: Optional[List[str]] = None) -> List[ProgressRow]:
+        """
+        Start and end level of every skill over [since, now]
+
+        Args:
+            since: Unix timestamp where the window starts
+            char_uuids: Restrict to these characters (None = all)
+
+        Returns:
+            List of ProgressRow tuples
+        """
+        params: Dict[str, Any] = {"since": since}
+        char_filter = ""
+        if char_uuids is not None:
+            if not char_uuids:
+                return []
+            placeholders = ", ".join(f":c{i}" for i in range(len(char_uuids)))
+            char_filter = f"AND char_uuid IN ({placeholders})"
+            params.update({f"c{i}": char_uuid for i, char_uuid in enumerate(char_uuids)})
+
+        query = PROGRESS_QUERY.format(char_filter=char_filter)
+        return await self._run(lambda conn: conn.execute(query, params).fetchall())
+
+    # Leaderboard snapshots
+
+    async def load_leaderboard_snapshot(self, board: str) -> Tuple[Optional[str], Dict[str, LeaderboardEntry]]:
+        """
+        Last synced state of a leaderboard
+
+        Args:
+            board: Leaderboard type (e.g. "hichContent")
+
+        Returns:
+            (criteria the snapshot was processed with, {char_uuid: (rank, level, deaths)})
+        """
+        def op(conn: sqlite3.Connection) -> Tuple[Optional[str], Dict[str, LeaderboardEntry]]:
+            criteria = conn.execute("SELECT value FROM meta WHERE key = ?", (f"leaderboard:{board}",)).fetchone()
+            rows = conn.execute("SELECT char_uuid, rank, level, deaths FROM leaderboard_snapshot WHERE board = ?",
+                                (board,)).fetchall()
+            return (criteria[0] if criteria else None,
+                    {char_uuid: (rank, level, deaths) for char_uuid, rank, level, deaths in rows})
+        return await self._run(op)
+
+    async def save_leaderboard_snapshot(self, board: str, criteria: str, entries: Dict[str, LeaderboardEntry]) -> None:
+        """Replace the stored snapshot of a leaderboard in one transaction."""
+        def op(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.execute("DELETE FROM leaderboard_snapshot WHERE board = ?", (board,))
+                conn.executemany(
+                    "INSERT INTO leaderboard_snapshot (board, char_uuid, rank, level, deaths) VALUES (?, ?, ?, ?, ?)",
+                    [(board, char_uuid, *entry) for char_uuid, entry in entries.items()])
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             (f"leaderboard:{board}", criteria))
+        await self._run(op)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared store used by every command
+tracker_store = TrackerStore()